@@ -0,0 +1,96 @@
+# PATH: benchmark_arranque.py
+
+"""
+Presupuesto de arranque de cada comando de la CLI, medido con
+`python -X importtime -m src <comando> ...` (las rutas reales: argparse y
+los imports de cada handler cmd_*). Los comandos con datos se lanzan con
+una entrada inexistente, así que se mide todo lo que cargan hasta tocar
+los datos y el comando termina con error sin efectos. Se comprueba:
+
+  - que el tiempo total de imports (mínimo de N repeticiones) no supera
+    su presupuesto;
+  - que no se carga ninguna dependencia pesada que ese comando no usa
+    (con `--help`, ninguna).
+
+Uso:  python benchmark_arranque.py [--repeticiones N] [--escala F]
+Devuelve código 1 si algún comando se sale del presupuesto.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+PESADOS = {"ortools", "plotly", "pandas", "numpy", "pyarrow", "openpyxl", "xlsxwriter", "tkinter"}
+NO_EXISTE = os.path.join("__benchmark_no_existe__", "entrada.xlsx")
+SUBCOMANDOS = ("preprocess", "plan", "gantt", "actions", "batch", "serve", "dump", "tune")
+
+# comando: (argumentos de python, dependencias pesadas permitidas, presupuesto ms)
+COMANDOS = {
+    "--help": (["-m", "src", "--help"], set(), 150),
+    **{f"{c} --help": (["-m", "src", c, "--help"], set(), 150) for c in SUBCOMANDOS},
+    "launcher GUI": (
+        ["-c", "import carbody_autoplanner, generar_gantt_desde_raw, postprocess_results_get_actions"],
+        set(), 200),
+    "preprocess": (["-m", "src", "preprocess", NO_EXISTE], {"pandas", "numpy"}, 1000),
+    "plan": (["-m", "src", "plan", NO_EXISTE], {"ortools", "pandas", "numpy"}, 1200),
+    # pyarrow / plotly se cargan al leer los resultados y al dibujar, no al arrancar
+    "gantt": (["-m", "src", "gantt", NO_EXISTE], set(), 200),
+    "actions": (["-m", "src", "actions", NO_EXISTE], {"pandas", "numpy"}, 1000),
+}
+
+def medir_imports(argumentos):
+    """(ms totales de import, paquetes de primer nivel cargados) de un proceso limpio."""
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argumentos],
+                          cwd=raiz, capture_output=True, text=True)
+    # Con la entrada inexistente el comando falla a propósito (código 1); el 2
+    # es un error de argparse: la línea de comandos del benchmark ya no vale
+    if proc.returncode == 2 or ("--help" in argumentos and proc.returncode != 0):
+        errores = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(errores[-1] if errores else f"código {proc.returncode}")
+
+    total_us = 0
+    paquetes = set()
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        self_us, _, modulo = linea[len("import time:"):].split("|")
+        total_us += int(self_us)
+        paquetes.add(modulo.strip().split(".")[0])
+    return total_us / 1000, paquetes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--escala", type=float, default=1.0,
+                        help="multiplica los presupuestos (máquinas lentas / CI)")
+    args = parser.parse_args(argv)
+
+    fallos = 0
+    print(f"{'comando':<18} {'ms':>8} {'presup.':>8}  estado")
+    for comando, (argumentos, permitidos, presupuesto) in COMANDOS.items():
+        try:
+            medidas = [medir_imports(argumentos) for _ in range(args.repeticiones)]
+        except RuntimeError as e:
+            print(f"{comando:<18} {'-':>8} {'-':>8}  ERROR: {e}")
+            fallos += 1
+            continue
+
+        ms = min(m for m, _ in medidas)
+        if "pandas" in permitidos:
+            permitidos = permitidos | {"pyarrow"}  # pandas >= 2 lo importa si está instalado
+        sobran = sorted((medidas[0][1] & PESADOS) - permitidos)
+        limite = presupuesto * args.escala
+        estado = "ok"
+        if ms > limite:
+            estado = "LENTO"
+        if sobran:
+            estado = f"IMPORTA {', '.join(sobran)}"
+        fallos += estado != "ok"
+        print(f"{comando:<18} {ms:8.0f} {limite:8.0f}  {estado}")
+
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
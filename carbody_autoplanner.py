@@ -1,13 +1,11 @@
 # PATH: carbody_autoplanner.py
 
-from src.model.solver import planificar_linea_produccion
-from src.results_gen.entry import mostrar_resultados
-
 import os
 import sys
-from tkinter import Tk, filedialog
 
 def seleccionar_archivo_excel():
+    from tkinter import Tk, filedialog
+
     Tk().withdraw()
     ruta = filedialog.askopenfilename(
         title="Selecciona archivo Excel de entrada",
@@ -23,6 +21,10 @@ if __name__ == "__main__":
         print("❌ No se seleccionó ningún archivo. Saliendo...")
         sys.exit(1)
 
+    # ortools/pandas sólo cuando de verdad se va a planificar
+    from src.model.solver import planificar_linea_produccion
+    from src.results_gen.entry import mostrar_resultados
+
     output_dir = os.path.join(os.path.dirname(ruta_archivo_base), "output", "google-or")
     modo_debug = True
 
@@ -38,5 +40,8 @@ if __name__ == "__main__":
         exportar=True,
         output_dir=output_dir,
         generar_gantt=False,
-        guardar_raw=True
+        guardar_raw=True,
+        guardar_historial=True,
+        gantt_html=True,
+        generar_acciones=True
     )
@@ -2,24 +2,37 @@
 
 import os
 import pickle
-import tkinter as tk
-from tkinter import filedialog
 
 from src.results_gen.generar_diagrama_gantt import generar_diagrama_gantt
+from src.results_gen.cargar_resultados_raw import cargar_resultados_raw, convertir_pickle_a_columnar
+from src.results_gen.historial_runs import ultimo_run
+
+COLUMNAS_GANTT = [
+    "pedido", "t_idx", "start", "end", "x_op", "duration", "machine",
+    "timestamp_ini", "timestamp_fin", "fecha_entrega_requerida", "fecha_entrega_estimada",
+    "delta_entrega_dias_laborales", "leadtime_dias_laborales",
+]
 
 def cargar_y_generar_gantt(path_raw):
-    if not os.path.isfile(path_raw):
+    if not os.path.exists(path_raw):
         print(f"❌ No se encontró el archivo: {path_raw}")
         return
 
     print(f"\n📂 Cargando resultados desde: {path_raw}")
-    with open(path_raw, "rb") as f:
-        datos = pickle.load(f)
+    if path_raw.endswith(".pkl"):
+        with open(path_raw, "rb") as f:
+            datos = pickle.load(f)
 
-    tareas = datos.get("tareas", [])
-    timeline = datos.get("timeline", [])
-    capacidades = datos.get("capacidades", [])
-    resumen_pedidos = datos.get("resumen_pedidos", None)
+        tareas = datos.get("tareas", [])
+        timeline = datos.get("timeline", [])
+        capacidades = datos.get("capacidades", [])
+        resumen_pedidos = datos.get("resumen_pedidos", None)
+    else:
+        raw = cargar_resultados_raw(path_raw)
+        tareas = raw.registros("tareas", COLUMNAS_GANTT)
+        timeline = raw.registros("timeline")
+        capacidades = raw.tabla("capacidades")
+        resumen_pedidos = (raw.metricas, None) if raw.metricas else None
 
     print(f"   • tareas: {len(tareas)} registros")
     print(f"   • timeline: {len(timeline)} eventos")
@@ -41,14 +54,37 @@ def buscar_ultimo_pickle_en(directorio):
     archivos.sort(key=lambda f: os.path.getmtime(os.path.join(directorio, f)), reverse=True)
     return os.path.join(directorio, archivos[0])
 
+def buscar_ultimo_raw_en_historial(ruta_historial):
+    """Ruta de resultados crudos del último run registrado, sin recorrer carpetas."""
+    run = ultimo_run(ruta_historial)
+    if not run or not run.get("ruta_raw"):
+        print(f"⚠️ No hay runs con resultados crudos en {ruta_historial}")
+        return None
+    return run["ruta_raw"]
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
-    path_raw = filedialog.askopenfilename(
-        title="Selecciona el archivo .pkl",
-        filetypes=[("Pickle files", "*.pkl")],
-        initialdir="archivos/db_dev/output/google-or/raw"
-    )
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--ultimo":
+        # python generar_gantt_desde_raw.py --ultimo [historial_runs.sqlite]
+        ruta_historial = sys.argv[2] if len(sys.argv) > 2 else "archivos/db_dev/output/google-or/historial_runs.sqlite"
+        path_raw = buscar_ultimo_raw_en_historial(ruta_historial)
+    else:
+        import tkinter as tk
+        from tkinter import filedialog
+
+        root = tk.Tk()
+        root.withdraw()
+        path_raw = filedialog.askopenfilename(
+            title="Selecciona el archivo .pkl o el manifest.json de resultados",
+            filetypes=[("Resultados", "*.pkl manifest.json"), ("Pickle files", "*.pkl")],
+            initialdir="archivos/db_dev/output/google-or/raw"
+        )
 
     if path_raw:
+        if path_raw.endswith("manifest.json"):
+            path_raw = os.path.dirname(path_raw)
+        elif path_raw.endswith(".pkl"):
+            # Los .pkl antiguos se convierten una vez al formato columnar
+            path_raw = convertir_pickle_a_columnar(path_raw)
         cargar_y_generar_gantt(path_raw)
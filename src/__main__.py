@@ -0,0 +1,8 @@
+# PATH: src/__main__.py
+
+import sys
+
+from src.cli import main
+
+if __name__ == "__main__":  # los procesos 'spawn' del servicio reimportan este módulo
+    sys.exit(main())
@@ -0,0 +1,380 @@
+# PATH: src/cli.py
+
+"""
+CLI sin interfaz gráfica (para el servidor de planificación o scripts):
+
+    python -m src preprocess <libro.xlsx> [...]
+    python -m src plan <libro.xlsx> [--output-dir DIR] [--tiempo-max S] [--workers N]
+    python -m src gantt <carpeta_raw | manifest.json | .pkl> [--output-dir DIR | --mostrar]
+    python -m src gantt --ultimo [--historial historial_runs.sqlite] [...]
+    python -m src actions <solucion.xlsx> [--operarios-max N]
+    python -m src batch <carpeta> [--procesos P] [--workers N]
+    python -m src serve [--directorio DIR] [--puerto 8765] [--procesos P] [--workers N]
+    python -m src dump <libro.xlsx> [...] --corpus DIR [--replicar 1 4 16]
+    python -m src tune <corpus> [--modo aleatorio|rejilla] [--perfiles N] [--tiempo-max S] [--salida DIR]
+
+Los módulos pesados (ortools, plotly, ...) se importan dentro de cada
+subcomando para que `--help` y los subcomandos ligeros arranquen rápido.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+TIEMPO_MAX_DEFECTO = 1200  # s; mismos valores que src.model.solver
+WORKERS_DEFECTO = 8
+TIEMPO_DIAGNOSTICO_DEFECTO = 30  # s; src.model.infeasibility_diagnosis
+HISTORIAL_DEFECTO = os.path.join("archivos", "db_dev", "output", "google-or", "historial_runs.sqlite")
+
+
+def _output_dir_defecto(ruta_excel):
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_excel)), "output", "google-or")
+
+def _leer_perfiles(ruta):
+    if not ruta:
+        return None
+    import json
+
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+def _opciones_plan(args):
+    """Opciones de planificación/salida comunes a plan y batch (picklables)."""
+    return {
+        "output_dir": args.output_dir,
+        "tiempo_max": args.tiempo_max,
+        "num_workers": args.workers,
+        "contraer": args.contraer,
+        "debug": args.debug,
+        "formatos": tuple(args.formatos),
+        "gantt_html": not args.sin_gantt,
+        "guardar_raw": not args.sin_raw,
+        "guardar_historial": not args.sin_historial,
+        "generar_acciones": not args.sin_acciones,
+        "dir_cache": args.cache,
+        "prechecks": None if args.prechecks == "no" else args.prechecks,
+        "diagnostico": args.diagnostico,
+        "tiempo_diagnostico": args.tiempo_diagnostico,
+        "portfolio": args.portfolio,
+        "perfiles_solver": _leer_perfiles(args.perfil_solver),
+        "telemetria": args.telemetria,
+        "lns": args.lns,
+        "jerarquico": args.jerarquico,
+        "parada": {"gap_relativo": args.gap_relativo, "gap_absoluto": args.gap_absoluto,
+                   "estancamiento_s": args.estancamiento, "objetivo": args.objetivo_aceptable},
+    }
+
+def planificar_archivo(ruta_excel, opciones, observadores=None, parar=None):
+    """
+    Planifica un libro y genera sus salidas. Devuelve un dict resumen
+    (archivo, estado, objetivo, tiempos, rutas de salida, error); no lanza
+    excepciones para que un libro defectuoso no tumbe un batch.
+    observadores / parar se pasan a resolver_modelo; si la búsqueda se
+    cancela con parar no se generan salidas (estado CANCELADO).
+    """
+    t0 = time.perf_counter()
+    resumen = {"archivo": os.path.basename(ruta_excel), "estado": None, "objetivo": None,
+               "motivo_parada": None, "tiempo_solver_s": None, "tiempo_total_s": None, "rutas": None,
+               "error": None}
+    try:
+        from src.model.solver import planificar_linea_produccion
+        from src.model.termination import CriterioParada
+        from src.results_gen.entry import mostrar_resultados
+
+        sol_tareas, timeline, df_capac, resumen_pedidos = planificar_linea_produccion(
+            ruta_excel, opciones["debug"], contraer=opciones["contraer"],
+            tiempo_max=opciones["tiempo_max"], num_workers=opciones["num_workers"],
+            observadores=observadores, parar=parar, dir_cache=opciones.get("dir_cache"),
+            prechecks=opciones.get("prechecks", "abortar"), diagnostico=opciones.get("diagnostico"),
+            tiempo_diagnostico=opciones.get("tiempo_diagnostico", TIEMPO_DIAGNOSTICO_DEFECTO),
+            portfolio=opciones.get("portfolio"), perfiles_solver=opciones.get("perfiles_solver"),
+            telemetria=opciones.get("telemetria", False), lns=opciones.get("lns"),
+            jerarquico=opciones.get("jerarquico"),
+            criterio_parada=CriterioParada(**opciones["parada"]) if opciones.get("parada") else None)
+
+        output_dir = opciones["output_dir"] or _output_dir_defecto(ruta_excel)
+        if opciones.get("subcarpeta_por_libro"):
+            # En batch con carpeta compartida, cada libro en su subcarpeta (los nombres llevan sólo timestamp)
+            output_dir = os.path.join(output_dir, os.path.splitext(os.path.basename(ruta_excel))[0])
+
+        if parar is not None and parar.is_set():
+            resumen["estado"] = "CANCELADO"
+        elif sol_tareas:
+            meta = getattr(sol_tareas, "metadatos", {})
+            resumen.update(estado=meta.get("estado"), objetivo=meta.get("objetivo"),
+                           motivo_parada=meta.get("motivo_parada"), tiempo_solver_s=meta.get("tiempo_solver_s"))
+            resumen["rutas"] = mostrar_resultados(
+                ruta_excel, df_capac,
+                tareas=sol_tareas, timeline=timeline, resumen_pedidos=resumen_pedidos,
+                exportar=True,
+                output_dir=output_dir,
+                guardar_raw=opciones["guardar_raw"],
+                guardar_historial=opciones["guardar_historial"],
+                ruta_historial=opciones.get("ruta_historial"),
+                gantt_html=opciones["gantt_html"],
+                generar_acciones=opciones["generar_acciones"],
+                formatos_exportacion=opciones["formatos"],
+            )
+        else:
+            resumen["estado"] = "SIN_SOLUCION"
+    except Exception as e:
+        resumen["estado"] = "ERROR"
+        resumen["error"] = f"{type(e).__name__}: {e}"
+    resumen["tiempo_total_s"] = round(time.perf_counter() - t0, 2)
+    return resumen
+
+def imprimir_tabla_resumen(resumenes):
+    cols = ["archivo", "estado", "objetivo", "motivo_parada", "tiempo_solver_s", "tiempo_total_s", "error"]
+    filas = [[("" if r.get(c) is None else str(r[c])) for c in cols] for r in resumenes]
+    anchos = [max([len(c)] + [len(f[i]) for f in filas]) for i, c in enumerate(cols)]
+    print("\n" + "  ".join(c.ljust(a) for c, a in zip(cols, anchos)))
+    print("  ".join("-" * a for a in anchos))
+    for f in filas:
+        print("  ".join(v.ljust(a) for v, a in zip(f, anchos)))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Subcomandos
+# ──────────────────────────────────────────────────────────────────────────────
+def cmd_preprocess(args):
+    from src.data_preprocessing.preparar_tareas_por_tiempos_validados import preparar_tareas_por_tiempos_validados
+    from src.data_preprocessing.generar_calendario_turnos import generar_calendario_formateado
+
+    for ruta in args.excel:
+        preparar_tareas_por_tiempos_validados(ruta, debug=args.debug)
+        generar_calendario_formateado(ruta, debug=args.debug)
+    return 0
+
+def cmd_plan(args):
+    resumen = planificar_archivo(args.excel, _opciones_plan(args))
+    imprimir_tabla_resumen([resumen])
+    return 0 if resumen["estado"] not in ("ERROR", "SIN_SOLUCION") else 1
+
+def cmd_gantt(args):
+    from src.results_gen.cargar_resultados_raw import cargar_resultados_raw, convertir_pickle_a_columnar
+    from src.results_gen.generar_diagrama_gantt import generar_diagrama_gantt, exportar_gantt_html
+
+    ruta = args.raw
+    if args.ultimo:
+        from src.results_gen.historial_runs import ultimo_run
+
+        run = ultimo_run(args.historial)
+        if not run or not run.get("ruta_raw"):
+            print(f"No hay runs con resultados crudos en {args.historial}", file=sys.stderr)
+            return 1
+        ruta = run["ruta_raw"]
+        print(f"📂 Último run del historial ({run['run_id']}): {ruta}")
+    elif not ruta:
+        print("Indica la carpeta de resultados crudos o --ultimo", file=sys.stderr)
+        return 2
+    if ruta.endswith(".pkl"):
+        ruta = convertir_pickle_a_columnar(ruta)
+    raw = cargar_resultados_raw(ruta)
+    tareas = raw.tabla("tareas")
+    timeline = raw.tabla("timeline")
+    capacidades = raw.tabla("capacidades")
+    resumen_pedidos = (raw.metricas, None) if raw.metricas else None
+
+    if args.mostrar:
+        generar_diagrama_gantt(tareas, timeline, capacidades, resumen_pedidos, nivel_detalle=args.nivel_detalle)
+    else:
+        output_dir = args.output_dir or os.path.dirname(os.path.dirname(os.path.abspath(raw.ruta)))
+        exportar_gantt_html(tareas, timeline, capacidades, resumen_pedidos, output_dir,
+                            nivel_detalle=args.nivel_detalle)
+    return 0
+
+def cmd_actions(args):
+    from src.results_gen.generar_acciones import ACCIONES_SHEET, anadir_acciones_a_libro
+
+    try:
+        ruta_salida = anadir_acciones_a_libro(args.excel, operarios_max=args.operarios_max)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"✅  Hoja '{ACCIONES_SHEET}' generada correctamente → {ruta_salida}")
+    return 0
+
+def cmd_batch(args):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    rutas = sorted(p for p in glob.glob(os.path.join(args.directorio, args.patron))
+                   if not os.path.basename(p).startswith("~$"))
+    if not rutas:
+        print(f"⚠️ No hay libros '{args.patron}' en {args.directorio}")
+        return 1
+
+    # Reparto de núcleos: procesos x hilos de CP-SAT <= núcleos disponibles
+    nucleos = os.cpu_count() or 1
+    procesos = args.procesos or max(1, nucleos // args.workers)
+    procesos = min(procesos, len(rutas))
+    print(f"🚀 {len(rutas)} libros | {procesos} procesos x {args.workers} hilos CP-SAT ({nucleos} núcleos)")
+
+    opciones = _opciones_plan(args)
+    if args.output_dir:
+        opciones["subcarpeta_por_libro"] = True
+        opciones["ruta_historial"] = os.path.join(args.output_dir, "historial_runs.sqlite")
+    t0 = time.perf_counter()
+    resumenes = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {pool.submit(planificar_archivo, ruta, opciones): ruta for ruta in rutas}
+        for fut in as_completed(futuros):
+            resumen = fut.result()
+            resumenes.append(resumen)
+            print(f"   ✔ {resumen['archivo']}: {resumen['estado']} ({resumen['tiempo_total_s']} s)")
+
+    resumenes.sort(key=lambda r: r["archivo"])
+    imprimir_tabla_resumen(resumenes)
+    print(f"\n⏱️ Total batch: {time.perf_counter() - t0:.1f} s")
+    return 0 if all(r["estado"] not in ("ERROR", "SIN_SOLUCION") for r in resumenes) else 1
+
+def cmd_dump(args):
+    from src.model.solver import preparar_entradas
+    from src.tuning.corpus import replicar_pedidos, volcar_instancia
+
+    for ruta in args.excel:
+        entradas = preparar_entradas(ruta, args.debug)
+        base = os.path.splitext(os.path.basename(ruta))[0]
+        for factor in args.replicar:
+            datos = entradas if factor == 1 else replicar_pedidos(entradas, factor, semilla=args.semilla)
+            nombre = base if factor == 1 else f"{base}_x{factor}"
+            destino = volcar_instancia(datos, args.corpus, nombre, origen=os.path.abspath(ruta),
+                                       contraer=args.contraer)
+            print(f"💾 {nombre}: {sum(len(t) for t in datos['job_dict'].values())} tareas → {destino}")
+    return 0
+
+def cmd_tune(args):
+    from src.tuning.ajuste import ajustar, generar_perfiles, imprimir_recomendaciones
+
+    perfiles = generar_perfiles(modo=args.modo, n=args.perfiles, semilla=args.semilla)
+    try:
+        _, recomendaciones = ajustar(args.corpus, perfiles, args.tiempo_max, num_workers=args.workers,
+                                     procesos=args.procesos, semillas=args.semillas,
+                                     directorio_salida=args.salida)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    imprimir_recomendaciones(recomendaciones)
+    print(f"\n📁 Resultados en {args.salida} (runs.csv, recomendaciones.json; usar con plan --perfil-solver)")
+    return 0
+
+def cmd_serve(args):
+    from src.servicio.servidor import servir
+
+    servir(args.directorio, host=args.host, puerto=args.puerto, procesos=args.procesos,
+           workers_por_trabajo=args.workers, tiempo_max=args.tiempo_max)
+    return 0
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Parser
+# ──────────────────────────────────────────────────────────────────────────────
+def _argumentos_plan(parser):
+    parser.add_argument("--output-dir", help="carpeta de salida (por defecto <carpeta del libro>/output/google-or)")
+    parser.add_argument("--tiempo-max", type=float, default=TIEMPO_MAX_DEFECTO, help="límite de tiempo de CP-SAT (s)")
+    parser.add_argument("--workers", type=int, default=WORKERS_DEFECTO, help="hilos de CP-SAT por libro")
+    parser.add_argument("--contraer", action="store_true", help="contrae cadenas lineales de tareas")
+    parser.add_argument("--formatos", nargs="+", default=["xlsx"], choices=["xlsx", "parquet", "csv"])
+    parser.add_argument("--sin-gantt", action="store_true", help="no exporta el Gantt HTML")
+    parser.add_argument("--sin-raw", action="store_true", help="no guarda resultados crudos")
+    parser.add_argument("--sin-historial", action="store_true", help="no registra el run en el historial")
+    parser.add_argument("--sin-acciones", action="store_true", help="no genera la hoja Acciones")
+    parser.add_argument("--cache", help="carpeta de la caché de soluciones (reutiliza resultados de entradas idénticas)")
+    parser.add_argument("--prechecks", default="abortar", choices=["abortar", "avisar", "no"],
+                        help="comprobaciones de viabilidad antes de resolver (abortar si los datos son inviables)")
+    parser.add_argument("--portfolio", type=int, metavar="K",
+                        help="K procesos de CP-SAT en carrera con semillas/configuraciones distintas (K x workers hilos)")
+    parser.add_argument("--lns", type=int, metavar="P",
+                        help="LNS propio por pedidos/ubicaciones/ventanas con P procesos (instancias grandes)")
+    parser.add_argument("--jerarquico", type=int, metavar="P",
+                        help="planifica en dos niveles (semanas + detalle por semana en P procesos); horizontes largos")
+    parser.add_argument("--perfil-solver", metavar="JSON",
+                        help="recomendaciones.json de 'tune': aplica el perfil de CP-SAT de la clase de tamaño")
+    parser.add_argument("--gap-relativo", type=float, metavar="G",
+                        help="termina cuando el gap relativo objetivo/cota baja de G (p.ej. 0.01)")
+    parser.add_argument("--gap-absoluto", type=float, metavar="G",
+                        help="termina cuando objetivo - cota baja de G")
+    parser.add_argument("--estancamiento", type=float, metavar="S",
+                        help="termina si el incumbente no mejora en S segundos")
+    parser.add_argument("--objetivo-aceptable", type=float, metavar="V",
+                        help="termina en cuanto el objetivo sea <= V")
+    parser.add_argument("--telemetria", action="store_true",
+                        help="guarda la curva objetivo/cota (CSV/JSON + HTML) y las estadísticas de la búsqueda")
+    parser.add_argument("--diagnostico", choices=["inviable", "paralelo"],
+                        help="explica el conflicto si no hay solución (después o a la vez que la resolución)")
+    parser.add_argument("--tiempo-diagnostico", type=float, default=TIEMPO_DIAGNOSTICO_DEFECTO,
+                        help="límite de tiempo del diagnóstico de inviabilidad (s)")
+    parser.add_argument("--debug", action="store_true")
+
+def construir_parser():
+    parser = argparse.ArgumentParser(prog="python -m src", description="Planificador de la línea de cajas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("preprocess", help="genera TAREAS y el calendario formateado en el libro")
+    p.add_argument("excel", nargs="+")
+    p.add_argument("--debug", action="store_true")
+    p.set_defaults(func=cmd_preprocess)
+
+    p = sub.add_parser("plan", help="planifica un libro y exporta resultados")
+    p.add_argument("excel")
+    _argumentos_plan(p)
+    p.set_defaults(func=cmd_plan)
+
+    p = sub.add_parser("gantt", help="Gantt desde resultados crudos")
+    p.add_argument("raw", nargs="?", help="carpeta columnar, su manifest.json o un .pkl antiguo")
+    p.add_argument("--ultimo", action="store_true", help="usa los resultados crudos del último run del historial")
+    p.add_argument("--historial", default=HISTORIAL_DEFECTO, help=f"historial de runs (por defecto {HISTORIAL_DEFECTO})")
+    p.add_argument("--output-dir", help="carpeta del HTML (por defecto la de salida del run)")
+    p.add_argument("--mostrar", action="store_true", help="abre el Gantt en el navegador en lugar de exportar HTML")
+    p.add_argument("--nivel-detalle", default="auto", choices=["auto", "detalle", "agregado"])
+    p.set_defaults(func=cmd_gantt)
+
+    p = sub.add_parser("actions", help="añade la hoja Acciones a un libro de resultados")
+    p.add_argument("excel")
+    p.add_argument("--operarios-max", type=int, default=5)
+    p.set_defaults(func=cmd_actions)
+
+    p = sub.add_parser("batch", help="planifica todos los libros de una carpeta en paralelo")
+    p.add_argument("directorio")
+    p.add_argument("--patron", default="*.xlsx")
+    p.add_argument("--procesos", type=int, help="procesos en paralelo (por defecto núcleos // workers)")
+    _argumentos_plan(p)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("serve", help="servicio HTTP local con cola de trabajos")
+    p.add_argument("--directorio", default="servicio_planificacion", help="carpeta de subidas y resultados")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8765)
+    p.add_argument("--procesos", type=int, help="trabajos simultáneos (por defecto núcleos // workers)")
+    p.add_argument("--workers", type=int, default=WORKERS_DEFECTO, help="hilos de CP-SAT por trabajo")
+    p.add_argument("--tiempo-max", type=float, default=TIEMPO_MAX_DEFECTO, help="límite de tiempo máximo por trabajo (s)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("dump", help="vuelca el modelo CP-SAT de libros a un corpus para 'tune'")
+    p.add_argument("excel", nargs="+")
+    p.add_argument("--corpus", required=True, help="carpeta del corpus (<nombre>.pb.txt + <nombre>.json)")
+    p.add_argument("--replicar", type=int, nargs="+", default=[1],
+                   help="factores de réplica de pedidos para instancias sintéticas (1 = el libro tal cual)")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--contraer", action="store_true", help="vuelca el modelo con cadenas contraídas")
+    p.add_argument("--debug", action="store_true")
+    p.set_defaults(func=cmd_dump)
+
+    p = sub.add_parser("tune", help="ajuste de parámetros de CP-SAT sobre un corpus volcado")
+    p.add_argument("corpus")
+    p.add_argument("--modo", default="aleatorio", choices=["aleatorio", "rejilla"])
+    p.add_argument("--perfiles", type=int, default=20, help="nº de perfiles en modo aleatorio")
+    p.add_argument("--semillas", type=int, default=1, help="runs por instancia y perfil")
+    p.add_argument("--semilla", type=int, default=0, help="semilla del muestreo de perfiles")
+    p.add_argument("--tiempo-max", type=float, default=60, help="presupuesto por run (s)")
+    p.add_argument("--workers", type=int, default=1, help="hilos de CP-SAT por run")
+    p.add_argument("--procesos", type=int, help="runs en paralelo (por defecto núcleos // workers)")
+    p.add_argument("--salida", default="ajuste_solver", help="carpeta de runs.csv y recomendaciones.json")
+    p.set_defaults(func=cmd_tune)
+
+    return parser
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    return args.func(args)
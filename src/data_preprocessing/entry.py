@@ -3,7 +3,6 @@
 import pandas as pd
 import sys
 import os
-from tkinter import Tk, filedialog
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
@@ -11,6 +10,8 @@ from src.data_preprocessing.preparar_tareas_por_tiempos_validados import prepara
 from src.data_preprocessing.generar_calendario_turnos import generar_calendario_formateado
 
 def seleccionar_archivo_excel():
+    from tkinter import Tk, filedialog
+
     Tk().withdraw()  # Oculta la ventana principal de tkinter
     ruta = filedialog.askopenfilename(
         title="Selecciona archivo Excel de entrada",
@@ -1,8 +1,10 @@
 # PATH: src/model/data_processing.py
 
-import math
+import numpy as np
 import pandas as pd
 
+from src.model.precedence_graph import validar_grafo_precedencias
+
 def leer_datos(ruta_excel):
     xls = pd.ExcelFile(ruta_excel)
     df_entregas = pd.read_excel(xls, sheet_name="ENTREGAS")
@@ -26,59 +28,157 @@ def leer_datos(ruta_excel):
         "df_capac": df_capac
     }
 
-def construir_estructura_tareas(df_tareas, df_capac):
-    machine_capacity = {}
-    for _, rowc in df_capac.iterrows():
-        ub = int(rowc["ubicación"])
-        machine_capacity[ub] = int(rowc["capacidad"])
+TIPOS_TAREA = ("OPERATIVA", "VERIFICADO")
+
+def construir_arrays_tareas(df_tareas, df_capac):
+    """
+    Construye la estructura de tareas en forma de arrays NumPy compactos,
+    una posición por tarea (ordenadas por material_padre e id_interno).
+
+    Claves del diccionario devuelto:
+      - pedidos:         referencias únicas, en orden
+      - pedido_indptr:   tareas del pedido k en [pedido_indptr[k], pedido_indptr[k+1])
+      - tarea_pedido:    código de pedido de cada tarea
+      - t_idx:           índice local de la tarea dentro de su pedido
+      - id_interno, ubicacion, tiempo_base (min), min_op, max_op
+      - tipo_codigo / tipos: código de tipo_tarea y su tabla de valores
+      - pred_indptr / pred_indices: precedencias en CSR, las predecesoras
+        (índices globales) de la tarea i son pred_indices[pred_indptr[i]:pred_indptr[i+1]]
+      - referencias_colgantes: (pedido, id_interno, predecesora) que no existen
+      - machine_capacity: ubicación -> capacidad
+    """
+    machine_capacity = dict(zip(df_capac["ubicación"].astype(int).tolist(),
+                                df_capac["capacidad"].astype(int).tolist()))
+
+    df = df_tareas[df_tareas["material_padre"].notna()]
+    df = df.sort_values(by=["material_padre", "id_interno"]).reset_index(drop=True)
+    n = len(df)
+
+    codigos, pedidos = pd.factorize(df["material_padre"], sort=False)
+    codigos = codigos.astype(np.int64)
+    pedido_indptr = np.searchsorted(codigos, np.arange(len(pedidos) + 1)).astype(np.int64)
+    t_idx = np.arange(n, dtype=np.int64) - pedido_indptr[codigos]
+
+    tipo = df["tipo_tarea"].astype(str).to_numpy()
+    es_operativa = tipo == "OPERATIVA"
+    es_verificado = tipo == "VERIFICADO"
+
+    # Duraciones en minutos: horas de operario (OPERATIVA) o de verificado
+    t_oper = np.ceil(df["tiempo_operario"].to_numpy(dtype=float) * 60)
+    t_verif = np.ceil(df["tiempo_verificado"].to_numpy(dtype=float) * 60)
+    tiempo_base = np.where(es_operativa, t_oper, np.where(es_verificado, t_verif, 0)).astype(np.int64)
+
+    # Las operativas requieren al menos 1 operario; el resto, ninguno
+    nmax = np.trunc(df["num_operarios_max"].to_numpy(dtype=float)).astype(np.int64)
+    min_op = es_operativa.astype(np.int64)
+    max_op = np.where(es_operativa, nmax, 0).astype(np.int64)
+
+    tipos = np.array(TIPOS_TAREA + tuple(sorted(set(tipo) - set(TIPOS_TAREA))), dtype=object)
+    tipo_codigo = pd.Index(tipos).get_indexer(tipo).astype(np.int8)
+
+    pred_indptr, pred_indices, colgantes = _construir_csr_precedencias(df, codigos, n)
+
+    return {
+        "pedidos": np.asarray(pedidos, dtype=object),
+        "pedido_indptr": pedido_indptr,
+        "tarea_pedido": codigos,
+        "t_idx": t_idx,
+        "id_interno": df["id_interno"].to_numpy(),
+        "ubicacion": df["ubicación"].to_numpy().astype(np.int64),
+        "tiempo_base": tiempo_base,
+        "min_op": min_op,
+        "max_op": max_op,
+        "tipo_codigo": tipo_codigo,
+        "tipos": tipos,
+        "pred_indptr": pred_indptr,
+        "pred_indices": pred_indices,
+        "referencias_colgantes": colgantes,
+        "machine_capacity": machine_capacity,
+    }
+
+def _construir_csr_precedencias(df, codigos, n):
+    """
+    Traduce la columna 'predecesora' ("3;5") a aristas (pred -> tarea) con
+    índices globales, buscando cada id_interno en un índice hash (pedido, id).
+    """
+    indice = pd.MultiIndex.from_arrays([codigos, df["id_interno"].to_numpy()])
+    indice_unico = indice[~indice.duplicated(keep="first")]
+    posiciones = np.flatnonzero(~indice.duplicated(keep="first"))
+
+    preds = df["predecesora"]
+    preds = preds[preds.notna()].astype(str)
+    tokens = preds.str.split(";").explode().str.strip()
+    tokens = tokens[tokens.notna() & (tokens != "")]
+
+    if tokens.empty:
+        return np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int64), []
+
+    filas = tokens.index.to_numpy()
+    ids_pred = pd.to_numeric(tokens, errors="coerce").to_numpy()
+    if np.isnan(ids_pred).any():
+        malos = tokens[np.isnan(ids_pred)]
+        raise ValueError(f"Valores de 'predecesora' no numéricos: {sorted(set(malos))}")
+    ids_pred = ids_pred.astype(np.int64)
+
+    pos_a = indice_unico.get_indexer(pd.MultiIndex.from_arrays([codigos[filas], ids_pred]))
+    pos_b = indice_unico.get_indexer(indice[filas])
+
+    # Las referencias a id_interno inexistentes se apartan para que la etapa
+    # de validación del grafo las notifique todas juntas
+    colgantes = pos_a < 0
+    pedidos_ref = df["material_padre"].to_numpy()
+    ids_ref = df["id_interno"].to_numpy()
+    referencias_colgantes = [(pedidos_ref[f], ids_ref[f], int(p))
+                             for f, p in zip(filas[colgantes], ids_pred[colgantes])]
+
+    origen = posiciones[pos_a[~colgantes]]
+    destino = posiciones[pos_b[~colgantes]]
+
+    orden = np.argsort(destino, kind="stable")
+    pred_indices = origen[orden].astype(np.int64)
+    pred_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(destino, minlength=n), out=pred_indptr[1:])
+    return pred_indptr, pred_indices, referencias_colgantes
+
+def estructura_a_diccionarios(estructura):
+    """
+    Adaptador: genera job_dict / precedences / machine_capacity (formato
+    histórico) a partir de los arrays de construir_arrays_tareas.
+    """
+    pedidos = estructura["pedidos"]
+    indptr = estructura["pedido_indptr"]
+    tipos = estructura["tipos"]
+
+    ids = estructura["id_interno"].tolist()
+    locs = estructura["ubicacion"].tolist()
+    bases = estructura["tiempo_base"].tolist()
+    mins = estructura["min_op"].tolist()
+    maxs = estructura["max_op"].tolist()
+    tipo_tarea = tipos[estructura["tipo_codigo"]].tolist()
+
+    pred_indptr = estructura["pred_indptr"]
+    pred_indices = estructura["pred_indices"]
+    tarea_pedido = estructura["tarea_pedido"]
+    destinos = np.repeat(np.arange(len(pred_indptr) - 1), np.diff(pred_indptr))
+    inicio_pedido = indptr[tarea_pedido[destinos]] if len(destinos) else destinos
+    loc_a = (pred_indices - inicio_pedido).tolist()
+    loc_b = (destinos - inicio_pedido).tolist()
+    ped_arista = tarea_pedido[destinos].tolist()
 
     job_dict = {}
     precedences = {}
-    df_tareas = df_tareas.sort_values(by=["material_padre", "id_interno"])
-
-    for pedido, grupo in df_tareas.groupby("material_padre"):
-        job_dict[pedido] = []
+    for k, pedido in enumerate(pedidos):
+        ini, fin = indptr[k], indptr[k + 1]
+        job_dict[pedido] = list(zip(ids[ini:fin], locs[ini:fin], bases[ini:fin],
+                                    mins[ini:fin], maxs[ini:fin], tipo_tarea[ini:fin]))
         precedences[pedido] = []
 
-        lista_tareas = list(grupo["id_interno"])
-        for _, rowt in grupo.iterrows():
-            tid = rowt["id_interno"]
-            loc = int(rowt["ubicación"])
-            tipo = str(rowt["tipo_tarea"])
-            base_op = rowt["tiempo_operario"]  # en horas
-            t_verif = rowt["tiempo_verificado"]
-            nmax = int(rowt["num_operarios_max"])
-
-            if tipo == "OPERATIVA":
-                # Para tareas operativas, requerimos al menos 1 operario
-                tiempo_base = math.ceil(base_op * 60)
-                min_op = 1
-                max_op = nmax
-            elif tipo == "VERIFICADO":
-                # Para tareas de verificado, no se necesitan operarios
-                tiempo_base = math.ceil(t_verif * 60)
-                min_op = 0
-                max_op = 0
-            else:
-                tiempo_base = 0
-                min_op = 0
-                max_op = 0
-
-            # Ahora agregamos 6 elementos en el tuple
-            job_dict[pedido].append((tid, loc, tiempo_base, min_op, max_op, tipo))
-
-        for _, rowt in grupo.iterrows():
-            current_id = rowt["id_interno"]
-            preds_str = rowt["predecesora"]
-            if pd.isna(preds_str) or preds_str == "":
-                continue
-            for p in str(preds_str).split(";"):
-                p = p.strip()
-                if p:
-                    idxA = lista_tareas.index(int(p))
-                    idxB = lista_tareas.index(int(current_id))
-                    precedences[pedido].append((idxA, idxB))
-
-    return job_dict, precedences, machine_capacity
+    for k, a, b in zip(ped_arista, loc_a, loc_b):
+        precedences[pedidos[k]].append((a, b))
 
+    return job_dict, precedences, estructura["machine_capacity"]
 
+def construir_estructura_tareas(df_tareas, df_capac):
+    estructura = construir_arrays_tareas(df_tareas, df_capac)
+    validar_grafo_precedencias(estructura)
+    return estructura_a_diccionarios(estructura)
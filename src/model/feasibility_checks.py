@@ -0,0 +1,217 @@
+# PATH: src/model/feasibility_checks.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.model.time_management import comprimir_tiempos
+
+MAX_DETALLE = 20   # elementos de detalle por problema en el informe
+
+def _problema(codigo, mensaje, detalle=None):
+    detalle = list(detalle) if detalle is not None else []
+    return {"codigo": codigo, "mensaje": mensaje, "n": len(detalle), "detalle": detalle[:MAX_DETALLE]}
+
+def _fin_minimo_tareas(duracion, pred_indptr, pred_indices):
+    """
+    Fin más temprano de cada tarea respecto al inicio de su pedido (camino
+    crítico con duraciones mínimas). Relajación vectorizada sobre el CSR de
+    predecesoras: tantas pasadas como la profundidad del DAG.
+    """
+    fin = duracion.astype(np.int64).copy()
+    tiene_pred = np.diff(pred_indptr) > 0
+    if not tiene_pred.any():
+        return fin
+    destinos = np.flatnonzero(tiene_pred)
+    inicios = pred_indptr[:-1][tiene_pred]
+    for _ in range(len(fin)):
+        max_pred = np.maximum.reduceat(fin[pred_indices], inicios)
+        nuevo = fin.copy()
+        nuevo[destinos] = duracion[destinos] + max_pred
+        if np.array_equal(nuevo, fin):
+            break
+        fin = nuevo
+    return fin
+
+def _capacidad_acumulada(hasta, comp_start, comp_end, capacidad):
+    """Operario-minutos disponibles en [0, hasta) para cada valor de hasta."""
+    hasta = np.asarray(hasta, dtype=np.int64)[:, None]
+    solape = np.clip(np.minimum(comp_end[None, :], hasta) - comp_start[None, :], 0, None)
+    return (solape * capacidad[None, :]).sum(axis=1)
+
+def comprobar_viabilidad(estructura, df_entregas, intervals, capacity_per_interval):
+    """
+    Condiciones necesarias baratas antes de construir el modelo. Devuelve
+    {"errores", "avisos", "resumen", "tiempo_ms"}; cada problema es
+    {"codigo", "mensaje", "n", "detalle"}.
+
+    Errores (el plan no puede salir bien): operativas sin operarios,
+    ubicaciones sin capacidad, fechas vacías, recepción después del
+    calendario, energía o carga por ubicación mayores que el calendario,
+    pedidos cuyo camino crítico no cabe en él.
+    Avisos: pedidos de ENTREGAS sin tareas, ubicaciones sin fila en
+    CAPACIDADES, entrega antes de recepción y retrasos inevitables.
+    """
+    t0 = time.perf_counter()
+    errores, avisos = [], []
+
+    pedidos = estructura["pedidos"]
+    referencias = df_entregas["referencia"].astype(str).to_numpy()
+    en_entregas = pd.Index(referencias).get_indexer(pd.Index(pedidos).astype(str))
+    tarea_en_plan = en_entregas[estructura["tarea_pedido"]] >= 0
+
+    tarea_pedido = estructura["tarea_pedido"][tarea_en_plan]
+    ids = estructura["id_interno"][tarea_en_plan]
+    ubicacion = estructura["ubicacion"][tarea_en_plan]
+    tiempo_base = estructura["tiempo_base"][tarea_en_plan]
+    min_op = estructura["min_op"][tarea_en_plan]
+    max_op = estructura["max_op"][tarea_en_plan]
+    operativa = estructura["tipos"][estructura["tipo_codigo"][tarea_en_plan]] == "OPERATIVA"
+    ref_tarea = pedidos[tarea_pedido]
+
+    comp_start = np.array([seg["comp_start"] for seg in intervals], dtype=np.int64)
+    comp_end = np.array([seg["comp_end"] for seg in intervals], dtype=np.int64)
+    capacidad = np.asarray(capacity_per_interval, dtype=np.int64)
+    minutos_calendario = int(comp_end[-1]) if len(comp_end) else 0
+    energia_disponible = int((capacidad * (comp_end - comp_start)).sum())
+
+    # ── Datos ────────────────────────────────────────────────────────────────
+    sin_operarios = operativa & (max_op < np.maximum(min_op, 1))
+    if sin_operarios.any():
+        errores.append(_problema(
+            "operativa_sin_operarios", "Tareas OPERATIVA con num_operarios_max = 0",
+            zip(ref_tarea[sin_operarios].tolist(), ids[sin_operarios].tolist())))
+
+    machine_capacity = estructura["machine_capacity"]
+    ubic_usadas, carga_idx = np.unique(ubicacion, return_inverse=True)
+    cap_ubic = np.array([machine_capacity.get(int(u), 1) for u in ubic_usadas], dtype=np.int64)
+    desconocidas = [int(u) for u in ubic_usadas if int(u) not in machine_capacity]
+    if desconocidas:
+        avisos.append(_problema("ubicacion_desconocida",
+                                "Ubicaciones sin fila en CAPACIDADES (se asume capacidad 1)", desconocidas))
+    con_trabajo = np.bincount(carga_idx, weights=tiempo_base, minlength=len(ubic_usadas)) > 0
+    sin_capacidad = (cap_ubic <= 0) & con_trabajo
+    if sin_capacidad.any():
+        errores.append(_problema("ubicacion_sin_capacidad", "Ubicaciones con tareas y capacidad 0",
+                                 ubic_usadas[sin_capacidad].tolist()))
+
+    con_tareas = set(pedidos[np.unique(tarea_pedido)].astype(str).tolist())
+    sin_tareas = [r for r in referencias if r not in con_tareas]
+    if sin_tareas:
+        avisos.append(_problema("pedido_sin_tareas",
+                                "Pedidos de ENTREGAS sin tareas (¿vértice sin validaciones?); no se planificarán",
+                                sin_tareas))
+
+    fecha_entrega = pd.to_datetime(df_entregas["fecha_entrega"])
+    fecha_recep = pd.to_datetime(df_entregas["fecha_recepcion_materiales"])
+    sin_fecha = (fecha_entrega.isna() | fecha_recep.isna()).to_numpy()
+    if sin_fecha.any():
+        errores.append(_problema("fechas_vacias", "Pedidos sin fecha de entrega o de recepción",
+                                 referencias[sin_fecha].tolist()))
+    invertidas = (fecha_entrega < fecha_recep).to_numpy()
+    if invertidas.any():
+        avisos.append(_problema("entrega_antes_recepcion", "Fecha de entrega anterior a la recepción de materiales",
+                                referencias[invertidas].tolist()))
+
+    if operativa.any() and (len(capacidad) == 0 or capacidad.max() <= 0):
+        errores.append(_problema("calendario_sin_operarios",
+                                 "El calendario no tiene turnos con operarios y hay tareas OPERATIVA"))
+
+    recep_min = comprimir_tiempos(fecha_recep, intervals)
+    due_min = comprimir_tiempos(fecha_entrega, intervals)
+    recep_tarde = ~sin_fecha & (recep_min >= minutos_calendario)
+    if recep_tarde.any():
+        errores.append(_problema("recepcion_fuera_calendario",
+                                 "Recepción de materiales en o después del final del calendario",
+                                 referencias[recep_tarde].tolist()))
+
+    # ── Energía total y por ventanas de entrega ──────────────────────────────
+    energia = np.where(operativa, tiempo_base, 0)      # x * ceil(tb / x) >= tb
+    energia_requerida = int(energia.sum())
+    if energia_requerida > energia_disponible:
+        errores.append(_problema(
+            "energia_calendario",
+            f"Se necesitan {energia_requerida} operario-min y el calendario ofrece {energia_disponible}"))
+
+    energia_pedido = pd.Series(energia).groupby(ref_tarea.astype(str)).sum()
+    energia_ent = energia_pedido.reindex(referencias).fillna(0).to_numpy()
+    validas = ~sin_fecha
+    orden = np.argsort(due_min[validas], kind="stable")
+    due_ord = due_min[validas][orden]
+    necesaria = np.cumsum(energia_ent[validas][orden])
+    disponible = _capacidad_acumulada(due_ord, comp_start, comp_end, capacidad)
+    corte = necesaria > disponible
+    if corte.any():
+        # pedidos con entrega <= la primera ventana que no cabe
+        limite = due_ord[np.argmax(corte)]
+        afectados = referencias[validas][orden][due_ord <= limite]
+        avisos.append(_problema(
+            "energia_ventana",
+            "Retraso inevitable: el trabajo de los pedidos con entrega hasta "
+            f"el minuto {int(limite)} supera los operario-min disponibles hasta entonces",
+            afectados.tolist()))
+
+    # ── Carga por ubicación ──────────────────────────────────────────────────
+    dur_min = np.where(operativa, -(-tiempo_base // np.maximum(max_op, 1)), tiempo_base)
+    ocupacion = np.bincount(carga_idx, weights=dur_min, minlength=len(ubic_usadas))
+    carga = np.divide(ocupacion, cap_ubic, out=np.zeros_like(ocupacion), where=cap_ubic > 0)
+    sobrecargadas = (cap_ubic > 0) & (carga > minutos_calendario)
+    if sobrecargadas.any():
+        errores.append(_problema(
+            "carga_ubicacion", "Ubicaciones cuya carga mínima supera los minutos del calendario",
+            [(int(u), int(c)) for u, c in zip(ubic_usadas[sobrecargadas], carga[sobrecargadas])]))
+
+    # ── Camino crítico por pedido ────────────────────────────────────────────
+    dur_total = np.zeros(len(estructura["tiempo_base"]), dtype=np.int64)
+    dur_total[tarea_en_plan] = dur_min
+    fin_rel = _fin_minimo_tareas(dur_total, estructura["pred_indptr"], estructura["pred_indices"])
+    critico = pd.Series(fin_rel[tarea_en_plan]).groupby(ref_tarea.astype(str)).max()
+    critico = critico.reindex(referencias).fillna(0).to_numpy(dtype=np.int64)
+    fin_temprano = np.maximum(recep_min, 0) + critico
+
+    no_cabe = validas & (critico > 0) & (fin_temprano > minutos_calendario) & ~recep_tarde
+    if no_cabe.any():
+        errores.append(_problema("camino_critico_calendario",
+                                 "Pedidos cuyo camino crítico no cabe en el calendario desde su recepción",
+                                 referencias[no_cabe].tolist()))
+    tarde = validas & (critico > 0) & (fin_temprano > due_min) & ~no_cabe & ~recep_tarde
+    if tarde.any():
+        avisos.append(_problema("camino_critico_entrega",
+                                "Retraso inevitable: camino crítico desde la recepción supera la entrega",
+                                [(r, int(f - d)) for r, f, d in zip(referencias[tarde], fin_temprano[tarde],
+                                                                    due_min[tarde])]))
+
+    return {
+        "errores": errores,
+        "avisos": avisos,
+        "resumen": {
+            "tareas": int(tarea_en_plan.sum()),
+            "pedidos": len(referencias),
+            "minutos_calendario": minutos_calendario,
+            "energia_requerida": energia_requerida,
+            "energia_disponible": energia_disponible,
+        },
+        "tiempo_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+
+def imprimir_informe_viabilidad(informe):
+    r = informe["resumen"]
+    print(f"\n🔎 Comprobaciones previas ({informe['tiempo_ms']} ms): {r['tareas']} tareas, {r['pedidos']} pedidos, "
+          f"{r['energia_requerida']}/{r['energia_disponible']} operario-min")
+    for icono, problemas in (("❌", informe["errores"]), ("⚠️", informe["avisos"])):
+        for p in problemas:
+            detalle = f": {p['detalle']}" if p["detalle"] else ""
+            extra = f" (+{p['n'] - len(p['detalle'])})" if p["n"] > len(p["detalle"]) else ""
+            print(f"   {icono} [{p['codigo']}] {p['mensaje']}{detalle}{extra}")
+
+def validar_viabilidad(informe, modo="abortar"):
+    """
+    modo="abortar": imprime el informe y lanza ValueError si hay errores.
+    modo="avisar": sólo imprime. Los avisos nunca abortan.
+    """
+    if informe["errores"] or informe["avisos"]:
+        imprimir_informe_viabilidad(informe)
+    if modo == "abortar" and informe["errores"]:
+        codigos = ", ".join(p["codigo"] for p in informe["errores"])
+        raise ValueError(f"❌ Datos de entrada inviables ({codigos}); se cancela la resolución.")
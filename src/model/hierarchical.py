@@ -0,0 +1,504 @@
+# PATH: src/model/hierarchical.py
+
+import os
+import math
+import time
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from src.model.model import crear_modelo_cp
+from src.model.model_restrictions import peso_retraso
+from src.model.time_management import comprimir_calendario, comprimir_tiempos
+
+FACTOR_CARGA = 0.85              # fracción de la capacidad semanal que puede asignar el nivel agregado
+FRACCION_TIEMPO_AGREGADO = 0.2   # del tiempo total, para el modelo de semanas
+TIEMPO_DETALLE_MIN_S = 5
+TIEMPO_RESTANTE_MIN_S = 1        # por debajo no se empieza otra ronda
+RONDAS_REPARACION = 3
+PREFIJO_RESERVA = "__reserva_"
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Semanas y tareas
+# ──────────────────────────────────────────────────────────────────────────────
+def agrupar_semanas(intervals, capacity_per_interval):
+    """
+    Agrupa los turnos por semana ISO. Por semana: clave (año, semana),
+    turnos [i0, i1), tramo comprimido [c0, c1), minutos, operario-minutos
+    y máximo de operarios en un turno.
+    """
+    semanas = []
+    for i, seg in enumerate(intervals):
+        clave = tuple(seg["dt_inicio"].isocalendar()[:2])
+        if not semanas or semanas[-1]["clave"] != clave:
+            semanas.append({"clave": clave, "i0": i, "c0": seg["comp_start"], "operario_minutos": 0,
+                            "max_operarios": 0})
+        semana = semanas[-1]
+        semana["i1"], semana["c1"] = i + 1, seg["comp_end"]
+        semana["operario_minutos"] += capacity_per_interval[i] * (seg["comp_end"] - seg["comp_start"])
+        semana["max_operarios"] = max(semana["max_operarios"], capacity_per_interval[i])
+    for semana in semanas:
+        semana["minutos"] = semana["c1"] - semana["c0"]
+    return semanas
+
+def _duraciones_tarea(tarea, tabla=None):
+    """[(x, duración)] posibles de una tarea (misma regla que crear_variables_tarea)."""
+    _, _, tiempo_base, min_op, max_op, _ = tarea
+    if min_op == max_op == 0:
+        return [(0, tiempo_base)]
+    if tabla is not None:
+        return list(zip(range(min_op, max_op + 1), tabla))
+    return [(x, math.ceil(tiempo_base / x) if tiempo_base > 0 else 0) for x in range(min_op, max_op + 1)]
+
+def _tramos_larga(duracion, w, semanas):
+    """Reparto de una tarea que empieza al inicio de la semana w y ocupa las siguientes: [(semana, minutos)]."""
+    tramos, resto = [], duracion
+    for v in range(w, len(semanas)):
+        parte = min(resto, semanas[v]["minutos"])
+        tramos.append((v, parte))
+        resto -= parte
+        if resto <= 0:
+            return tramos
+    return None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Nivel agregado: tareas -> semanas
+# ──────────────────────────────────────────────────────────────────────────────
+def asignar_semanas(job_dict, precedences, machine_capacity, semanas, recepcion, entrega, pesos,
+                    tablas_duracion=None, factores=None, fijas=None, tiempo_max=60, num_workers=8):
+    """
+    Modelo agregado: cada tarea a una semana (las que no caben en ninguna
+    semana, a una semana de inicio y las siguientes que necesite) con
+    capacidad de operario-minutos y de ubicación (capacidad x minutos) por
+    semana, escaladas por factores[w]; precedencias en orden de semanas;
+    recepción de materiales. Minimiza el retraso ponderado en semanas y,
+    después, la suma de semanas de fin de los pedidos.
+
+    recepcion / entrega: pedido -> minuto comprimido. fijas: (pedido, t_idx)
+    -> semana ya resuelta que se mantiene. Devuelve (asignacion, largas) con
+    asignacion (pedido, t_idx) -> semana de inicio y largas
+    (pedido, t_idx) -> {"x", "duracion", "tramos"}; o (None, None).
+    """
+    tablas_duracion = tablas_duracion or {}
+    factores = factores if factores is not None else [FACTOR_CARGA] * len(semanas)
+    fijas = fijas or {}
+    n_semanas = len(semanas)
+    max_minutos = max(s["minutos"] for s in semanas)
+
+    model = cp_model.CpModel()
+    b, ini, fin, largas = {}, {}, {}, {}
+    carga_op = [[] for _ in semanas]
+    carga_ubic = [dict() for _ in semanas]
+
+    for pedido, tareas in job_dict.items():
+        con_predecesor = {j for (_, j) in precedences.get(pedido, [])}
+        for t_idx, tarea in enumerate(tareas):
+            clave = (pedido, t_idx)
+            opciones = _duraciones_tarea(tarea, tablas_duracion.get(clave))
+            x_rapida, dur_min = min(opciones, key=lambda o: (o[1], o[0]))
+            op_min = min(x * d for x, d in opciones)
+            min_op, ubicacion = tarea[3], tarea[1]
+            sin_predecesor = t_idx not in con_predecesor
+
+            candidatas = {}
+            if dur_min <= max_minutos:
+                for w, s in enumerate(semanas):
+                    inicio = max(s["c0"], recepcion[pedido]) if sin_predecesor else s["c0"]
+                    if dur_min <= s["c1"] - inicio and min_op <= s["max_operarios"]:
+                        candidatas[w] = ([(w, dur_min, op_min)], w)
+            else:
+                largas[clave] = {"x": x_rapida, "duracion": dur_min}
+                for w, s in enumerate(semanas):
+                    if sin_predecesor and s["c0"] < recepcion[pedido]:
+                        continue
+                    tramos = _tramos_larga(dur_min, w, semanas)
+                    if tramos is None or any(x_rapida > semanas[v]["max_operarios"] for v, _ in tramos):
+                        continue
+                    ultima, parte = tramos[-1]
+                    # Si llena la última semana, los sucesores pueden empezar en la siguiente
+                    fin_efectivo = ultima + 1 if parte == semanas[ultima]["minutos"] else ultima
+                    candidatas[w] = ([(v, parte, parte * x_rapida) for v, parte in tramos], fin_efectivo)
+            if clave in fijas:
+                candidatas = {w: c for w, c in candidatas.items() if w == fijas[clave]}
+            if not candidatas:
+                return None, None
+
+            vars_t = {w: model.NewBoolVar(f"b_{pedido}_{t_idx}_{w}") for w in candidatas}
+            model.AddExactlyOne(vars_t.values())
+            b[clave] = vars_t
+            ini[clave] = sum(w * v for w, v in vars_t.items())
+            fin[clave] = sum(candidatas[w][1] * v for w, v in vars_t.items())
+            for w, v in vars_t.items():
+                for semana, minutos, operario_minutos in candidatas[w][0]:
+                    carga_op[semana].append(operario_minutos * v)
+                    carga_ubic[semana].setdefault(ubicacion, []).append(minutos * v)
+
+    for w, s in enumerate(semanas):
+        if carga_op[w]:
+            model.Add(sum(carga_op[w]) <= int(factores[w] * s["operario_minutos"]))
+        for ubicacion, cargas in carga_ubic[w].items():
+            model.Add(sum(cargas) <= int(factores[w] * machine_capacity.get(ubicacion, 1) * s["minutos"]))
+
+    for pedido, pares in precedences.items():
+        for (i, j) in pares:
+            a, c = (pedido, i), (pedido, j)
+            # Una tarea larga empieza al inicio de su semana: su predecesora, en una semana anterior
+            model.Add(fin[a] + (1 if c in largas else 0) <= ini[c])
+
+    c0 = np.array([s["c0"] for s in semanas])
+    objetivo_retraso, objetivo_fin = [], []
+    for pedido, tareas in job_dict.items():
+        con_sucesor = {i for (i, _) in precedences.get(pedido, [])}
+        finales = [t for t in range(len(tareas)) if t not in con_sucesor] or list(range(len(tareas)))
+        fin_pedido = model.NewIntVar(0, n_semanas, f"fin_semana_{pedido}")
+        model.AddMaxEquality(fin_pedido, [fin[(pedido, t)] for t in finales])
+        semana_entrega = int(np.searchsorted(c0, entrega[pedido], side="right")) - 1
+        retraso = model.NewIntVar(0, n_semanas, f"retraso_semanas_{pedido}")
+        model.Add(retraso >= fin_pedido - semana_entrega)
+        objetivo_retraso.append(pesos[pedido] * retraso)
+        objetivo_fin.append(fin_pedido)
+    model.Minimize(100 * n_semanas * sum(objetivo_retraso) + sum(objetivo_fin))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = tiempo_max
+    solver.parameters.num_search_workers = num_workers
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, None
+
+    asignacion = {clave: next(w for w, v in vars_t.items() if solver.Value(v)) for clave, vars_t in b.items()}
+    for clave, larga in largas.items():
+        larga["tramos"] = _tramos_larga(larga["duracion"], asignacion[clave], semanas)
+    return asignacion, largas
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Nivel de detalle: una semana con crear_modelo_cp
+# ──────────────────────────────────────────────────────────────────────────────
+def subproblema_semana(w, semanas, asignacion, largas, job_dict, precedences, machine_capacity, df_calend,
+                       df_entregas, tablas_duracion=None):
+    """
+    Entradas de crear_modelo_cp restringidas a la semana w (picklables).
+    Condiciones de contorno con las otras semanas:
+    - los tramos de tareas largas que pasan por la semana son reservas
+      fijas al inicio de la semana (pseudo-pedidos PREFIJO_RESERVA),
+    - las sucesoras de una tarea larga que acaba en la semana empiezan
+      después de su fin (cotas),
+    - las tareas acaban dentro de la semana (horizonte = minutos de la
+      semana), así las precedencias con semanas posteriores se cumplen solas.
+    Devuelve None si la semana no tiene tareas propias.
+    """
+    tablas_duracion = tablas_duracion or {}
+    semana = semanas[w]
+    job_w, prec_w, tablas_w, origen, cotas, reservas = {}, {}, {}, {}, {}, {}
+    for pedido, tareas in job_dict.items():
+        indices = [t for t in range(len(tareas))
+                   if asignacion[(pedido, t)] == w and (pedido, t) not in largas]
+        if not indices:
+            continue
+        nuevo = {t: k for k, t in enumerate(indices)}
+        job_w[pedido] = [tareas[t] for t in indices]
+        prec_w[pedido] = [(nuevo[i], nuevo[j]) for (i, j) in precedences.get(pedido, []) if i in nuevo and j in nuevo]
+        for t, k in nuevo.items():
+            origen[(pedido, k)] = t
+            if (pedido, t) in tablas_duracion:
+                tablas_w[(pedido, k)] = tablas_duracion[(pedido, t)]
+        for (i, j) in precedences.get(pedido, []):
+            if j in nuevo and (pedido, i) in largas:
+                tramos = largas[(pedido, i)]["tramos"]
+                if tramos[-1][0] == w:
+                    cotas[(pedido, nuevo[j])] = max(cotas.get((pedido, nuevo[j]), 0), tramos[-1][1])
+    if not job_w:
+        return None
+
+    for (pedido, t), larga in largas.items():
+        for v, minutos in larga["tramos"]:
+            if v == w:
+                _, ubicacion, _, _, _, tipo = job_dict[pedido][t]
+                x = larga["x"]
+                nombre = f"{PREFIJO_RESERVA}{pedido}_{t}"
+                job_w[nombre] = [(nombre, ubicacion, minutos * max(x, 1), x, x, tipo)]
+                prec_w[nombre] = []
+                reservas[nombre] = x
+
+    df_calend = df_calend.copy()
+    claves = pd.to_datetime(df_calend["dia"]).dt.isocalendar()
+    df_calend_w = df_calend[(claves["year"] == semana["clave"][0]).to_numpy() &
+                            (claves["week"] == semana["clave"][1]).to_numpy()]
+    df_entregas_w = df_entregas[df_entregas["referencia"].astype(str).isin(job_w)].copy()
+    if reservas:
+        dias = pd.to_datetime(df_calend_w["dia"])
+        df_entregas_w = pd.concat([df_entregas_w, pd.DataFrame({
+            "referencia": list(reservas),
+            "fecha_recepcion_materiales": dias.min(),
+            "fecha_entrega": dias.max() + pd.Timedelta(days=1),
+        })], ignore_index=True)
+
+    return {"semana": w, "job_dict": job_w, "precedences": prec_w, "machine_capacity": machine_capacity,
+            "df_calend": df_calend_w, "df_entregas": df_entregas_w, "tablas_duracion": tablas_w,
+            "horizonte": semana["minutos"], "c0": semana["c0"], "origen": origen, "cotas": cotas,
+            "reservas": reservas}
+
+# ── procesos del pool ────────────────────────────────────────────────────────
+_PARAR = None
+
+def _iniciar_proceso(parar):
+    global _PARAR
+    _PARAR = parar
+
+def _vigilar_parar(solver, terminado):
+    """Corta la búsqueda de la semana si el proceso principal activa _PARAR (sondeo, como el portfolio)."""
+    while not terminado.wait(0.2):
+        if _PARAR is not None and _PARAR.is_set():
+            solver.StopSearch()
+            return
+
+def resolver_semana(sub, tiempo_max, num_workers, limite=None):
+    """
+    Resuelve el subproblema de una semana (en un proceso del pool).
+    limite: instante (time.time()) a partir del cual no se busca más, para
+    que las semanas que esperan en la cola no desborden el tiempo total.
+    Devuelve {semana, status, objetivo, tiempo_s, ramas, conflictos, filas}
+    con filas [(pedido, t_idx original, start, end, x_op, duration)] en
+    minutos comprimidos absolutos.
+    """
+    intervals_w, cap_w = comprimir_calendario(sub["df_calend"])
+    model, all_vars = crear_modelo_cp(sub["job_dict"], sub["precedences"], sub["machine_capacity"], intervals_w,
+                                      cap_w, sub["df_entregas"], sub["df_calend"],
+                                      tablas_duracion=sub["tablas_duracion"], horizonte=sub["horizonte"])
+    for nombre, x in sub["reservas"].items():
+        model.Add(all_vars[(nombre, 0)]["start"] == 0)
+        model.Add(all_vars[(nombre, 0)]["x_op"] == x)
+    for clave, cota in sub["cotas"].items():
+        model.Add(all_vars[clave]["start"] >= cota)
+
+    solver = cp_model.CpSolver()
+    if limite is not None:
+        tiempo_max = max(0.0, min(tiempo_max, limite - time.time()))
+    solver.parameters.max_time_in_seconds = tiempo_max
+    solver.parameters.num_search_workers = num_workers
+    terminado = threading.Event()
+    threading.Thread(target=_vigilar_parar, args=(solver, terminado), daemon=True).start()
+    try:
+        status = solver.Solve(model)
+    finally:
+        terminado.set()
+    resultado = {"semana": sub["semana"], "status": status, "objetivo": None, "tiempo_s": round(solver.WallTime(), 3),
+                 "ramas": solver.NumBranches(), "conflictos": solver.NumConflicts(), "filas": None}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        c0 = sub["c0"]
+        resultado["objetivo"] = solver.ObjectiveValue()
+        resultado["filas"] = [
+            (pedido, sub["origen"][(pedido, k)], c0 + solver.Value(v["start"]), c0 + solver.Value(v["end"]),
+             solver.Value(v["x_op"]), solver.Value(v["duration"]))
+            for (pedido, k), v in all_vars.items() if not str(pedido).startswith(PREFIJO_RESERVA)
+        ]
+    return resultado
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Orquestación
+# ──────────────────────────────────────────────────────────────────────────────
+def _entregas_pedidos(df_entregas, pedidos):
+    """Filas de ENTREGAS en el orden de `pedidos` (la última si una referencia se repite)."""
+    entregas = df_entregas.drop_duplicates("referencia", keep="last")
+    return entregas.set_index(entregas["referencia"].astype(str)).loc[[str(p) for p in pedidos]]
+
+def evaluar_objetivo(valores, job_dict, precedences, intervals, df_entregas, df_calend):
+    """Objetivo del modelo completo (10 * retraso ponderado + makespan) para una solución en arrays."""
+    pedidos = list(job_dict)
+    fechas = _entregas_pedidos(df_entregas, pedidos)["fecha_entrega"]
+    due = comprimir_tiempos(fechas, intervals)
+    fecha_min = pd.Timestamp(df_calend["dia"].min())
+    fin = dict(zip(zip(valores["pedido"].tolist(), valores["t_idx"].tolist()), valores["end"].tolist()))
+    retraso, makespan = 0, 0
+    for pedido, fecha, due_min in zip(pedidos, fechas, due.tolist()):
+        con_sucesor = {i for (i, _) in precedences.get(pedido, [])}
+        finales = [t for t in range(len(job_dict[pedido])) if t not in con_sucesor] or range(len(job_dict[pedido]))
+        fin_pedido = max(fin[(pedido, t)] for t in finales)
+        makespan = max(makespan, fin_pedido)
+        retraso += peso_retraso(fecha, fecha_min) * max(0, fin_pedido - due_min)
+    return 10 * retraso + makespan
+
+def resolver_jerarquico(job_dict, precedences, machine_capacity, intervals, capacity_per_interval, df_entregas,
+                        df_calend, tiempo_max=600, num_workers=1, procesos=None, tablas_duracion=None,
+                        parar=None, debug=False):
+    """
+    Planificación en dos niveles para horizontes largos: asignar_semanas
+    reparte las tareas en semanas con capacidades agregadas y cada semana
+    se resuelve al minuto con crear_modelo_cp en un pool de `procesos`
+    (num_workers hilos cada uno). Si una semana resulta inviable, se baja
+    su factor de carga y se reasignan sólo las tareas de las semanas
+    inviables (las demás se mantienen); las que agotan su tiempo sin
+    solución se reintentan con la misma asignación. Hasta
+    RONDAS_REPARACION rondas y nunca más allá de tiempo_max.
+
+    Devuelve (valores, metadatos): valores como leer_valores_solucion para
+    extraer_solucion_desde_valores, o (None, metadatos) si no hay plan
+    (estado CANCELADO si se activó parar).
+    """
+    t0 = time.monotonic()
+    procesos = procesos or os.cpu_count() or 1
+    semanas = agrupar_semanas(intervals, capacity_per_interval)
+    pedidos = list(job_dict)
+    entregas = _entregas_pedidos(df_entregas, pedidos)
+    recepcion = dict(zip(pedidos, comprimir_tiempos(entregas["fecha_recepcion_materiales"], intervals).tolist()))
+    entrega = dict(zip(pedidos, comprimir_tiempos(entregas["fecha_entrega"], intervals).tolist()))
+    fecha_min = pd.Timestamp(df_calend["dia"].min())
+    pesos = {p: peso_retraso(f, fecha_min) for p, f in zip(pedidos, entregas["fecha_entrega"])}
+
+    factores = [FACTOR_CARGA] * len(semanas)
+    tiempo_agregado = max(1.0, FRACCION_TIEMPO_AGREGADO * tiempo_max)
+    limite = t0 + tiempo_max
+    resultados, fijas, ronda = {}, {}, 0
+    sin_resolver = set()   # semanas con tareas enviadas (o por enviar) y sin resultado: canceladas o sin tiempo
+    stats = {"semanas": len(semanas), "rondas": 0, "semanas_resueltas": 0, "semanas_reparadas": [],
+             "semanas_agotadas": [], "semanas_error": [], "tiempo_agregado_s": 0.0}
+    ramas = conflictos = 0
+    asignacion = largas = None
+    reasignar = True
+
+    def cancelado():
+        return parar is not None and parar.is_set()
+
+    ctx = mp.get_context("spawn")
+    parar_semanas = ctx.Event()
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=ctx, initializer=_iniciar_proceso,
+                             initargs=(parar_semanas,)) as pool:
+        while ronda <= RONDAS_REPARACION and not cancelado():
+            if limite - time.monotonic() < TIEMPO_RESTANTE_MIN_S:
+                break
+            if reasignar:
+                t_agregado = time.monotonic()
+                nueva, largas_nuevas = asignar_semanas(job_dict, precedences, machine_capacity, semanas, recepcion,
+                                                       entrega, pesos, tablas_duracion, factores, fijas,
+                                                       min(tiempo_agregado, limite - time.monotonic()),
+                                                       num_workers * procesos)
+                stats["tiempo_agregado_s"] += round(time.monotonic() - t_agregado, 3)
+                if nueva is None:
+                    print("⚠️ Nivel agregado sin solución: la carga no cabe en las semanas del calendario.")
+                    break
+
+                # Sólo se (re)resuelven las semanas sin plan o cuyo contenido cambia
+                def firma(w, a, l):
+                    return (sorted(k for k, v in a.items() if v == w and k not in l),
+                            sorted((k, tuple(d["tramos"])) for k, d in l.items() if any(v == w for v, _ in d["tramos"])))
+                pendientes = [w for w in range(len(semanas))
+                              if w not in resultados or resultados[w]["filas"] is None or asignacion is None or
+                              firma(w, nueva, largas_nuevas) != firma(w, asignacion, largas)]
+                asignacion, largas = nueva, largas_nuevas
+            else:
+                # Sólo semanas agotadas: misma asignación, se reintentan con el tiempo que queda
+                pendientes = [w for w, r in resultados.items() if r["filas"] is None]
+            subs = [s for s in (subproblema_semana(w, semanas, asignacion, largas, job_dict, precedences,
+                                                   machine_capacity, df_calend, df_entregas, tablas_duracion)
+                                for w in pendientes) if s is not None]
+            for w in pendientes:
+                resultados.pop(w, None)
+                sin_resolver.discard(w)
+            sin_resolver.update(sub["semana"] for sub in subs)
+            if debug:
+                print(f"🗓️ Ronda {ronda}: {len(subs)} semanas a resolver de {len(semanas)}")
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            tandas = max(1, math.ceil(len(subs) / procesos))
+            tiempo_semana = min(restante, max(TIEMPO_DETALLE_MIN_S, restante / tandas))
+            limite_epoch = time.time() + restante
+            futuros = {pool.submit(resolver_semana, sub, tiempo_semana, num_workers, limite_epoch): sub["semana"]
+                       for sub in subs}
+            while futuros:
+                if cancelado():
+                    parar_semanas.set()
+                    for futuro in futuros:
+                        futuro.cancel()
+                    break
+                hechos, _ = wait(list(futuros), timeout=0.2, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    w = futuros.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        resultado = {"semana": w, "status": cp_model.UNKNOWN, "objetivo": None, "tiempo_s": None,
+                                     "ramas": 0, "conflictos": 0, "filas": None, "error": f"{type(e).__name__}: {e}"}
+                        print(f"⚠️ Semana {semanas[w]['clave']}: {resultado['error']}")
+                    resultados[w] = resultado
+                    sin_resolver.discard(w)
+                    ramas += resultado["ramas"]
+                    conflictos += resultado["conflictos"]
+                    if debug:
+                        print(f"   semana {semanas[w]['clave']}: {resultado['status'].name} "
+                              f"objetivo={resultado['objetivo']} ({resultado['tiempo_s']} s)")
+            if cancelado():
+                break
+
+            stats["rondas"] = ronda + 1
+            fallidas = [w for w, r in resultados.items() if r["filas"] is None]
+            if not fallidas:
+                break
+            # Sólo la inviabilidad indica exceso de carga; sin tiempo o con error no se toca el factor
+            inviables = [w for w in fallidas if resultados[w]["status"] in (cp_model.INFEASIBLE, cp_model.MODEL_INVALID)]
+            errores = [w for w in fallidas if "error" in resultados[w]]
+            stats["semanas_agotadas"] = [semanas[w]["clave"] for w in fallidas if w not in inviables and w not in errores]
+            stats["semanas_error"] = [semanas[w]["clave"] for w in errores]
+            if errores:
+                break
+            stats["semanas_reparadas"] += [semanas[w]["clave"] for w in inviables]
+            for w in inviables:
+                factores[w] *= 0.8
+            fijas = {k: v for k, v in asignacion.items() if v not in inviables and k not in largas}
+            reasignar = bool(inviables)
+            ronda += 1
+
+    tiempo = round(time.monotonic() - t0, 3)
+    metadatos = {"estado": "SIN_SOLUCION", "objetivo": None, "cota": None, "tiempo_solver_s": tiempo,
+                 "ramas": ramas, "conflictos": conflictos, "configuracion": "jerarquico", "jerarquico": stats}
+    if cancelado():
+        metadatos["estado"] = "CANCELADO"
+        print("🛑 Planificación jerárquica cancelada")
+        return None, metadatos
+    completo = (asignacion is not None and not sin_resolver
+                and all(r["filas"] is not None for r in resultados.values()))
+    if not completo:
+        if sin_resolver:
+            print(f"⚠️ Semanas sin resolver (tiempo agotado): {[semanas[w]['clave'] for w in sorted(sin_resolver)]}")
+        imprimir_jerarquico(stats, semanas, resultados, tiempo)
+        return None, metadatos
+
+    filas = [f for r in resultados.values() for f in r["filas"]]
+    for (pedido, t), larga in largas.items():
+        inicio = semanas[asignacion[(pedido, t)]]["c0"]
+        filas.append((pedido, t, inicio, inicio + larga["duracion"], larga["x"], larga["duracion"]))
+    indice = {(p, t): n for n, (p, t) in enumerate((p, t) for p, tareas in job_dict.items()
+                                                     for t in range(len(tareas)))}
+    filas.sort(key=lambda f: indice[(f[0], f[1])])
+    valores = {
+        "pedido": np.array([f[0] for f in filas], dtype=object),
+        "t_idx": np.array([f[1] for f in filas], dtype=np.int64),
+        "start": np.array([f[2] for f in filas], dtype=np.int64),
+        "end": np.array([f[3] for f in filas], dtype=np.int64),
+        "x_op": np.array([f[4] for f in filas], dtype=np.int64),
+        "duration": np.array([f[5] for f in filas], dtype=np.int64),
+        "machine": np.array([job_dict[f[0]][f[1]][1] for f in filas], dtype=np.int64),
+    }
+    stats["semanas_resueltas"] = len(resultados)
+    metadatos.update(estado="FEASIBLE", status=int(cp_model.FEASIBLE),
+                     objetivo=evaluar_objetivo(valores, job_dict, precedences, intervals, df_entregas, df_calend))
+    imprimir_jerarquico(stats, semanas, resultados, tiempo)
+    return valores, metadatos
+
+def imprimir_jerarquico(stats, semanas, resultados, tiempo):
+    print(f"\n🗓️ Planificación jerárquica ({stats['semanas']} semanas, {stats['rondas']} rondas, {tiempo} s; "
+          f"nivel agregado {stats['tiempo_agregado_s']} s):")
+    for w in sorted(resultados):
+        r = resultados[w]
+        n = len(r["filas"]) if r["filas"] is not None else 0
+        print(f"   {semanas[w]['clave'][0]}-S{semanas[w]['clave'][1]:02d} {r['status'].name:<10} "
+              f"tareas={n:<5} objetivo={r['objetivo']} ({r['tiempo_s']} s)")
+    for clave, texto in (("semanas_reparadas", "reparadas (inviables)"), ("semanas_agotadas", "sin tiempo"),
+                         ("semanas_error", "con error")):
+        if stats[clave]:
+            print(f"   semanas {texto}: {stats[clave]}")
@@ -0,0 +1,194 @@
+# PATH: src/model/infeasibility_diagnosis.py
+
+import time
+import threading
+
+from ortools.sat.python import cp_model
+
+from src.model.model import crear_modelo_cp
+from src.model.time_management import comprimir_tiempo
+from src.model.model_utils import construir_diccionario_entregas
+
+TIEMPO_DIAGNOSTICO_DEFECTO = 30    # s en total (núcleo + minimización)
+HOLGURA_MAX = 1_000_000            # cota de la holgura de capacidad de las cumulativas
+
+FAMILIAS = {
+    "precedencias": "precedencias del pedido",
+    "recepcion": "inicio tras la recepción de materiales",
+    "disyuntivas": "no solapar tareas de distinto tipo en la ubicación",
+    "retraso": "cota del retraso",
+    "capacidad_maquina": "capacidad de la ubicación",
+    "capacidad_turno": "operarios del turno",
+}
+
+def _activar_con(model, indices, literal):
+    for indice in indices:
+        ct = model.Proto().constraints[indice]
+        if literal.Index() not in ct.enforcement_literal:
+            ct.enforcement_literal.append(literal.Index())
+
+def _holgura_cumulativa(model, indice, literal, nombre):
+    """
+    CP-SAT no admite enforcement en AddCumulative: la capacidad pasa a ser
+    cap + holgura, y el supuesto fuerza holgura == 0.
+    """
+    holgura = model.NewIntVar(0, HOLGURA_MAX, nombre)
+    model.Add(holgura == 0).OnlyEnforceIf(literal)
+    capacidad = model.Proto().constraints[indice].cumulative.capacity
+    capacidad.vars.append(holgura.Index())
+    capacidad.coeffs.append(1)
+
+def construir_modelo_diagnostico(job_dict, precedences, machine_capacity, intervals, capacity_per_interval,
+                                 df_entregas, df_calend):
+    """
+    El modelo de crear_modelo_cp sin objetivo y con un literal de supuesto
+    por familia de restricciones y pedido, ubicación o turno. Devuelve
+    (model, supuestos, registro) con supuestos: índice del literal ->
+    (familia, clave).
+    """
+    registro = {}
+    model, all_vars = crear_modelo_cp(job_dict, precedences, machine_capacity, intervals,
+                                      capacity_per_interval, df_entregas, df_calend, registro=registro)
+    model.ClearObjective()
+
+    supuestos = {}
+    def supuesto(familia, clave):
+        literal = model.NewBoolVar(f"supuesto_{familia}_{clave}")
+        supuestos[literal.Index()] = (familia, clave)
+        return literal
+
+    for pedido, indices in registro.get("precedencias", {}).items():
+        if indices:
+            _activar_con(model, indices, supuesto("precedencias", pedido))
+    for pedido, indices in registro.get("recepcion", {}).items():
+        if indices:
+            _activar_con(model, indices, supuesto("recepcion", pedido))
+    for pedido, indice in registro.get("retraso", {}).items():
+        _activar_con(model, [indice], supuesto("retraso", pedido))
+    for pedido, indices in registro.get("disyuntivas", {}).items():
+        _activar_con(model, indices, supuesto("disyuntivas", pedido))   # ambos pedidos del par
+    for ubicacion, indice in registro.get("capacidad_maquina", {}).items():
+        _holgura_cumulativa(model, indice, supuesto("capacidad_maquina", ubicacion), f"holgura_ubic_{ubicacion}")
+    for i, indice in registro.get("capacidad_turno", {}).items():
+        _holgura_cumulativa(model, indice, supuesto("capacidad_turno", i), f"holgura_turno_{i}")
+
+    return model, supuestos, registro
+
+def _resolver_con_supuestos(model, literales, tiempo_max, parar=None):
+    """Un solo worker: con varios, CP-SAT no garantiza el núcleo de supuestos."""
+    model.ClearAssumptions()
+    model.AddAssumptions(literales)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max(tiempo_max, 0.1)
+    solver.parameters.num_search_workers = 1
+    terminado = threading.Event()
+    if parar is not None:
+        def vigilar():
+            while not terminado.wait(0.2):
+                if parar.is_set():
+                    solver.StopSearch()
+                    return
+        threading.Thread(target=vigilar, daemon=True).start()
+    try:
+        status = solver.Solve(model)
+    finally:
+        terminado.set()
+    nucleo = list(solver.SufficientAssumptionsForInfeasibility()) if status == cp_model.INFEASIBLE else None
+    return status, nucleo
+
+def _describir(familia, clave, intervals, capacity_per_interval, machine_capacity, ent_dict, df_calend, horizonte):
+    if familia == "capacidad_maquina":
+        return {"ubicacion": clave,
+                "descripcion": f"Ubicación {clave}: capacidad {machine_capacity.get(clave, 1)}"}
+    if familia == "capacidad_turno":
+        seg = intervals[clave]
+        return {"turno": clave, "inicio": seg["dt_inicio"], "fin": seg["dt_fin"],
+                "descripcion": f"Turno {seg['dt_inicio']} → {seg['dt_fin']}: "
+                               f"{capacity_per_interval[clave]} operarios"}
+    fechas = ent_dict.get(str(clave), {})
+    if familia == "recepcion":
+        recep = fechas.get("fecha_recepcion")
+        detalle = f"recepción {recep} (minuto {comprimir_tiempo(recep, df_calend)}, horizonte {horizonte})"
+    elif familia == "retraso":
+        detalle = f"entrega {fechas.get('fecha_entrega')}"
+    else:
+        detalle = None
+    return {"referencia": clave, "descripcion": f"Pedido {clave}: {detalle}" if detalle else f"Pedido {clave}"}
+
+def diagnosticar_inviabilidad(job_dict, precedences, machine_capacity, intervals, capacity_per_interval,
+                              df_entregas, df_calend, tiempo_max=TIEMPO_DIAGNOSTICO_DEFECTO, minimizar=True,
+                              parar=None):
+    """
+    Explica por qué el modelo es inviable: resuelve con todos los supuestos
+    activos, toma el núcleo de SufficientAssumptionsForInfeasibility y, si
+    minimizar, lo reduce con un filtro de borrado (quita cada supuesto y
+    comprueba si sigue siendo inviable) mientras quede tiempo.
+
+    Devuelve {"estado", "conflicto", "minimo", "supuestos", "tiempo_s"}:
+    estado es INVIABLE, VIABLE o DESCONOCIDO (sin veredicto en el tiempo
+    dado); conflicto es la lista de restricciones del núcleo, cada una
+    {"familia", "restriccion", "descripcion"} más referencia, ubicacion o
+    turno (con inicio/fin). minimo indica que ningún elemento sobra: se
+    comprobó que al quitar cualquiera de ellos el modelo es viable.
+    parar: Event que interrumpe el diagnóstico (p.ej. cuando la resolución
+    principal ya ha encontrado solución y el diagnóstico en paralelo sobra).
+    """
+    t0 = time.perf_counter()
+    restante = lambda: tiempo_max - (time.perf_counter() - t0)
+
+    model, supuestos, registro = construir_modelo_diagnostico(
+        job_dict, precedences, machine_capacity, intervals, capacity_per_interval, df_entregas, df_calend)
+    literales = {indice: model.get_bool_var_from_proto_index(indice) for indice in supuestos}
+
+    status, nucleo = _resolver_con_supuestos(model, list(literales.values()), restante(), parar)
+    informe = {"estado": "DESCONOCIDO", "conflicto": [], "minimo": False, "supuestos": len(supuestos)}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        informe["estado"] = "VIABLE"
+    elif status == cp_model.INFEASIBLE:
+        informe["estado"] = "INVIABLE"
+        # Núcleo vacío: inviable sin ningún supuesto (dominios, horizonte...)
+        minimo = not nucleo or not minimizar
+        if nucleo and minimizar:
+            i = 0
+            sin_veredicto = set()   # supuestos cuya eliminación acabó sin respuesta (tiempo o parar)
+            while i < len(nucleo) and restante() > 0 and not (parar is not None and parar.is_set()):
+                candidato = nucleo[:i] + nucleo[i + 1:]
+                status_c, nucleo_c = _resolver_con_supuestos(
+                    model, [literales[j] for j in candidato], restante(), parar)
+                if status_c == cp_model.INFEASIBLE:
+                    # El núcleo devuelto es un subconjunto del candidato, a menudo menor
+                    nucleo = [j for j in candidato if j in set(nucleo_c or candidato)]
+                    continue
+                if status_c not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                    sin_veredicto.add(nucleo[i])
+                i += 1
+            # Mínimo sólo si quitar cada elemento se probó viable
+            minimo = i >= len(nucleo) and not sin_veredicto.intersection(nucleo)
+
+        ent_dict = construir_diccionario_entregas(df_entregas)
+        for indice in nucleo or []:
+            familia, clave = supuestos[indice]
+            informe["conflicto"].append({
+                "familia": familia,
+                "restriccion": FAMILIAS[familia],
+                **_describir(familia, clave, intervals, capacity_per_interval, machine_capacity,
+                             ent_dict, df_calend, registro["horizonte"]),
+            })
+        informe["minimo"] = minimo
+
+    informe["tiempo_s"] = round(time.perf_counter() - t0, 2)
+    return informe
+
+def imprimir_diagnostico(informe):
+    print(f"\n🩺 Diagnóstico de inviabilidad ({informe['tiempo_s']} s, {informe['supuestos']} supuestos): "
+          f"{informe['estado']}")
+    if informe["estado"] != "INVIABLE":
+        return
+    if not informe["conflicto"]:
+        print("   El modelo es inviable sin depender de ningún pedido, ubicación o turno "
+              "(revisar dominios: nº de operarios, horizonte).")
+        return
+    titulo = "Conjunto mínimo en conflicto" if informe["minimo"] else "Conjunto en conflicto (puede no ser mínimo)"
+    print(f"   {titulo}:")
+    for c in informe["conflicto"]:
+        print(f"   - [{c['restriccion']}] {c['descripcion']}")
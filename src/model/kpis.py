@@ -0,0 +1,117 @@
+# PATH: src/model/kpis.py
+
+import numpy as np
+import pandas as pd
+
+def construir_indice_laboral(df_calend):
+    """
+    Precalcula un índice de tiempo laborable a partir de df_calend: inicio y
+    fin de cada turno (turnos nocturnos => +1 día), segundos laborables
+    acumulados antes de cada turno y la media de horas laborables por día
+    (igual que calcular_promedio_horas_laborables_por_dia).
+    Se asume que los turnos no se solapan.
+    """
+    dia = pd.to_datetime(df_calend["dia"])
+    hi = pd.to_timedelta(df_calend["hora_inicio"].astype(str))
+    hf = pd.to_timedelta(df_calend["hora_fin"].astype(str))
+
+    inicio = (dia + hi).to_numpy(dtype="datetime64[ns]")
+    fin = (dia + hf).to_numpy(dtype="datetime64[ns]")
+    fin = np.where(fin <= inicio, fin + np.timedelta64(1, "D"), fin)
+
+    orden = np.argsort(inicio, kind="stable")
+    inicio, fin = inicio[orden], fin[orden]
+    dur_s = (fin - inicio) / np.timedelta64(1, "s")
+
+    horas_dia = pd.Series(dur_s / 3600).groupby(dia.dt.date.to_numpy()[orden]).sum()
+    horas_por_dia = round(horas_dia.sum() / len(horas_dia), 2) if len(horas_dia) else 0.0
+
+    return {
+        "inicio": inicio.astype(np.int64),
+        "fin": fin.astype(np.int64),
+        "acumulado_s": np.concatenate([[0.0], np.cumsum(dur_s)[:-1]]) if len(dur_s) else np.zeros(0),
+        "horas_por_dia": horas_por_dia,
+    }
+
+def _segundos_laborables_hasta(ts, indice):
+    """Segundos laborables acumulados desde el inicio del calendario hasta ts."""
+    t = pd.to_datetime(pd.Series(ts)).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    inicio, fin = indice["inicio"], indice["fin"]
+    if len(inicio) == 0:
+        return np.zeros(len(t))
+
+    k = np.searchsorted(inicio, t, side="right") - 1
+    k_c = np.maximum(k, 0)
+    dentro = np.clip(t - inicio[k_c], 0, fin[k_c] - inicio[k_c]) / 1e9
+    return np.where(k >= 0, indice["acumulado_s"][k_c] + dentro, 0.0)
+
+def dias_laborables_entre(ts_inicio, ts_fin, indice):
+    """
+    Versión vectorizada de calcular_dias_laborables: días laborables
+    decimales entre dos arrays de timestamps (0 si inicio > fin o NaT).
+    """
+    ini = pd.to_datetime(pd.Series(np.asarray(ts_inicio)))
+    fin = pd.to_datetime(pd.Series(np.asarray(ts_fin)))
+    if indice["horas_por_dia"] == 0:
+        return np.zeros(len(ini))
+
+    segundos = _segundos_laborables_hasta(fin, indice) - _segundos_laborables_hasta(ini, indice)
+    dias = np.round(segundos / (indice["horas_por_dia"] * 3600), 2)
+    validos = (ini.notna() & fin.notna() & (ini <= fin)).to_numpy()
+    return np.where(validos, dias, 0.0)
+
+def calcular_kpis_pedidos(df_tareas, df_entregas, df_calend):
+    """
+    Calcula las métricas por pedido y globales a partir de la tabla de tareas
+    de la solución (con timestamp_fin). Devuelve (resumen_metr, df_pedidos)
+    con el mismo formato que el resumen histórico de extraer_solucion.
+    """
+    indice = construir_indice_laboral(df_calend)
+
+    df_ent = df_entregas.rename(columns={
+        "referencia": "pedido",
+        "fecha_entrega": "fecha_requerida",
+        "fecha_recepcion_materiales": "fecha_materiales"
+    })[["pedido", "fecha_requerida", "fecha_materiales"]]
+    df_ent = df_ent.drop_duplicates("pedido", keep="last").set_index("pedido")
+    df_ent["fecha_requerida"]  = pd.to_datetime(df_ent["fecha_requerida"],  errors="coerce")
+    df_ent["fecha_materiales"] = pd.to_datetime(df_ent["fecha_materiales"], errors="coerce")
+
+    df_pedidos = df_tareas.groupby("pedido", sort=False)["timestamp_fin"].max().to_frame("fecha_final")
+    df_pedidos.index.name = None
+    df_pedidos = df_pedidos.join(df_ent, how="left")
+
+    fin = df_pedidos["fecha_final"]
+    req = df_pedidos["fecha_requerida"]
+    mat = df_pedidos["fecha_materiales"]
+
+    # fin < req => adelanto (negativo), fin >= req => retraso
+    adelanto = (fin < req).to_numpy()
+    delta = np.where(adelanto,
+                     -dias_laborables_entre(fin, req, indice),
+                     dias_laborables_entre(req, fin, indice))
+    df_pedidos["delta_entrega_laboral"] = np.where((fin.notna() & req.notna()).to_numpy(), delta, 0.0)
+    df_pedidos["leadtime_laboral"] = dias_laborables_entre(mat, fin, indice)
+
+    retrasos = df_pedidos["delta_entrega_laboral"]
+    retrasos = retrasos[retrasos > 0]
+    retraso_medio = retrasos.mean() if len(retrasos) else 0.0
+    leadtime_medio = df_pedidos["leadtime_laboral"].mean() if len(df_pedidos) else 0.0
+
+    fechas_fin = fin.dropna().sort_values()
+    if len(fechas_fin) <= 1:
+        dias_entre_entregas_prom = 0.0
+    else:
+        diffs = dias_laborables_entre(fechas_fin.iloc[:-1], fechas_fin.iloc[1:], indice)
+        dias_entre_entregas_prom = diffs.mean()
+
+    resumen_metr = {
+        "retraso_medio_dias": round(retraso_medio, 2),
+        "leadtime_medio_dias": round(leadtime_medio, 2),
+        "dias_entre_entregas_prom": round(dias_entre_entregas_prom, 2),
+        "horas_laborables_por_dia": indice["horas_por_dia"]
+    }
+
+    df_pedidos = df_pedidos[["fecha_final", "fecha_requerida", "fecha_materiales",
+                             "delta_entrega_laboral", "leadtime_laboral"]]
+    return resumen_metr, df_pedidos
@@ -0,0 +1,264 @@
+# PATH: src/model/lns.py
+
+import time
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from src.model.solution_vector import SolucionVector, aplicar_hint
+
+TIEMPO_VECINDARIO_S = 5         # presupuesto de cada sub-resolución
+FRACCION_INICIAL = 0.10         # fracción de tareas liberadas al empezar
+FRACCION_MIN, FRACCION_MAX = 0.01, 0.90
+
+# Vecindarios estructurados:
+#   pedidos   -> pedidos consecutivos por fecha de entrega
+#   ubicacion -> tareas de una ubicación (un tramo contiguo en el tiempo si son muchas)
+#   ventana   -> tareas que solapan una ventana del calendario
+TIPOS_VECINDARIO = ("pedidos", "ubicacion", "ventana")
+
+class EstructuraLNS:
+    """
+    Lo que el LNS necesita saber del modelo de crear_modelo_cp: por tarea,
+    los índices de start/end/x_op en el proto, su pedido y su ubicación, y
+    el orden de los pedidos por fecha de entrega.
+    """
+
+    def __init__(self, all_vars, df_entregas):
+        claves = list(all_vars)
+        self.claves = claves
+        self.idx_start = np.array([all_vars[k]["start"].Index() for k in claves], dtype=np.int64)
+        self.idx_end = np.array([all_vars[k]["end"].Index() for k in claves], dtype=np.int64)
+        self.idx_xop = np.array([all_vars[k]["x_op"].Index() for k in claves], dtype=np.int64)
+        self.ubicacion = np.array([all_vars[k]["machine"] for k in claves])
+
+        entregas = pd.Series(pd.to_datetime(df_entregas["fecha_entrega"]).values,
+                             index=df_entregas["referencia"].astype(str))
+        entregas = entregas[~entregas.index.duplicated()]
+        pedidos = list(dict.fromkeys(pedido for pedido, _ in claves))
+        fechas = entregas.reindex([str(p) for p in pedidos])
+        # Pedidos sin fecha al final; a igualdad, orden original
+        orden = np.lexsort((np.arange(len(pedidos)), fechas.values.astype("int64"), fechas.isna().values))
+        self.pedidos = [pedidos[i] for i in orden]
+        posicion = {p: i for i, p in enumerate(self.pedidos)}
+        self.pedido = np.array([posicion[pedido] for pedido, _ in claves], dtype=np.int64)
+
+    @property
+    def n_tareas(self):
+        return len(self.claves)
+
+def elegir_vecindario(tipo, fraccion, estructura, valores, rng):
+    """Máscara booleana de las tareas liberadas en un vecindario del tipo dado."""
+    n = estructura.n_tareas
+    objetivo = max(1, int(round(fraccion * n)))
+    inicios = valores[estructura.idx_start]
+
+    if tipo == "pedidos":
+        n_pedidos = len(estructura.pedidos)
+        k = max(1, int(round(fraccion * n_pedidos)))
+        primero = int(np.clip(rng.integers(n_pedidos) - k // 2, 0, max(0, n_pedidos - k)))
+        return (estructura.pedido >= primero) & (estructura.pedido < primero + k)
+
+    if tipo == "ubicacion":
+        ubicacion = rng.choice(np.unique(estructura.ubicacion))
+        candidatas = np.flatnonzero(estructura.ubicacion == ubicacion)
+        if len(candidatas) > objetivo:
+            candidatas = candidatas[np.argsort(inicios[candidatas], kind="stable")]
+            desde = int(rng.integers(len(candidatas) - objetivo + 1))
+            candidatas = candidatas[desde:desde + objetivo]
+        libre = np.zeros(n, dtype=bool)
+        libre[candidatas] = True
+        return libre
+
+    if tipo == "ventana":
+        finales = valores[estructura.idx_end]
+        orden = np.argsort(inicios, kind="stable")
+        desde = int(rng.integers(max(1, n - objetivo + 1)))
+        t0 = inicios[orden[desde]]
+        t1 = inicios[orden[min(desde + objetivo, n) - 1]] + 1
+        return (inicios < t1) & (finales > t0)
+
+    raise ValueError(f"Tipo de vecindario desconocido: {tipo}")
+
+# ── procesos del pool ────────────────────────────────────────────────────────
+_MODELO_BASE = None
+
+def _iniciar_proceso(modelo_texto):
+    global _MODELO_BASE
+    _MODELO_BASE = cp_model.CpModel()
+    _MODELO_BASE.Proto().parse_text_format(modelo_texto)
+
+def _resolver_vecindario(indices_fijos, valores, tiempo, semilla, num_workers):
+    """
+    Fija (dominio [v, v]) las variables indices_fijos a su valor en el
+    incumbente, da el incumbente completo como hint y resuelve el resto.
+    """
+    model = _MODELO_BASE.clone()
+    proto = model.Proto()
+    for indice, valor in zip(indices_fijos.tolist(), valores[indices_fijos].tolist()):
+        dominio = proto.variables[indice].domain
+        dominio.clear()
+        dominio.extend([valor, valor])
+    aplicar_hint(model, valores)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = tiempo
+    solver.parameters.num_search_workers = num_workers
+    solver.parameters.random_seed = semilla
+    status = solver.Solve(model)
+    hay_solucion = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return (status, solver.ObjectiveValue() if hay_solucion else None,
+            np.asarray(solver.ResponseProto().solution, dtype=np.int64) if hay_solucion else None,
+            solver.NumBranches(), solver.NumConflicts())
+
+# ── driver ───────────────────────────────────────────────────────────────────
+class _ParadaLNS:
+    """Lo que reciben los observadores como `callback`: StopSearch para todo el LNS."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+
+    def StopSearch(self):
+        self.evento.set()
+
+def _elegir_tipo(stats, tipos, rng):
+    """Ruleta por tasa de éxito (con suavizado de Laplace para no abandonar ningún tipo)."""
+    pesos = np.array([(stats[t]["mejoras"] + 1) / (stats[t]["intentos"] + 2) for t in tipos])
+    return tipos[int(rng.choice(len(tipos), p=pesos / pesos.sum()))]
+
+def resolver_lns(model, estructura, procesos=1, tiempo_max=60, num_workers=1,
+                 tiempo_vecindario=TIEMPO_VECINDARIO_S, tipos=TIPOS_VECINDARIO, observadores=None,
+                 parar=None, semilla=0, tiempo_inicial=None, debug=False):
+    """
+    LNS propio sobre el modelo de crear_modelo_cp. Tras una primera
+    solución (CP-SAT completo, parando en la primera o, con tiempo_inicial,
+    resolviendo esos segundos), repite: elige un
+    tipo de vecindario (ruleta por tasa de mejora), libera sus tareas, fija
+    start y x_op del resto al incumbente y resuelve con tiempo_vecindario s.
+    El tamaño de cada tipo se adapta: crece si la sub-resolución prueba el
+    óptimo del vecindario (más deprisa si no mejora: era demasiado pequeño)
+    y encoge si agota el tiempo. `procesos`
+    vecindarios disjuntos se resuelven a la vez en un pool de procesos; toda
+    mejora pasa a ser el incumbente de los siguientes.
+
+    Devuelve (solucion, status) como resolver_modelo: un SolucionVector
+    cuyos metadatos añaden "configuracion" ("lns") y "lns" (estadísticas por
+    tipo), o el solver de la solución inicial si ésta ya es óptima o no hay.
+    """
+    from src.model.solver import resolver_modelo
+
+    t0 = time.monotonic()
+    parada = _ParadaLNS()
+    rng = np.random.default_rng(semilla)
+
+    inicial, status = resolver_modelo(model, debug, min(tiempo_inicial or tiempo_max, tiempo_max),
+                                      num_workers * procesos, parar=parar,
+                                      parametros=None if tiempo_inicial else {"stop_after_first_solution": True})
+    if status != cp_model.FEASIBLE:
+        return inicial, status
+
+    valores = np.asarray(inicial.ResponseProto().solution, dtype=np.int64)
+    mejor, cota = inicial.ObjectiveValue(), inicial.BestObjectiveBound()
+    ramas, conflictos = inicial.NumBranches(), inicial.NumConflicts()
+    soluciones = 1
+    stats = {t: {"intentos": 0, "mejoras": 0, "completos": 0, "ganancia": 0.0, "fraccion": FRACCION_INICIAL}
+             for t in tipos}
+
+    def notificar(configuracion):
+        progreso = {"soluciones": soluciones, "objetivo": mejor, "cota": cota,
+                    "tiempo_s": round(time.monotonic() - t0, 3), "configuracion": configuracion}
+        for observador in observadores or ():
+            observador(progreso, parada)
+
+    notificar("inicial")
+    if debug:
+        print(f"🧩 LNS: solución inicial {mejor} en {time.monotonic() - t0:.1f} s")
+
+    ctx = mp.get_context("spawn")
+    lanzados = 0
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=ctx, initializer=_iniciar_proceso,
+                             initargs=(str(model.Proto()),)) as pool:
+        en_curso = {}   # futuro -> (tipo, máscara de tareas libres)
+
+        def lanzar():
+            nonlocal lanzados
+            ocupadas = np.zeros(estructura.n_tareas, dtype=bool)
+            for _, libre in en_curso.values():
+                ocupadas |= libre
+            # Vecindarios independientes: se reintenta hasta no pisar tareas de los que están en curso
+            for _ in range(5):
+                tipo = _elegir_tipo(stats, tipos, rng)
+                libre = elegir_vecindario(tipo, stats[tipo]["fraccion"], estructura, valores, rng)
+                if not (libre & ocupadas).any():
+                    break
+            fijas = ~libre
+            indices = np.concatenate([estructura.idx_start[fijas], estructura.idx_xop[fijas]])
+            restante = tiempo_max - (time.monotonic() - t0)
+            futuro = pool.submit(_resolver_vecindario, indices, valores, min(tiempo_vecindario, restante),
+                                 semilla * 100003 + lanzados, num_workers)
+            en_curso[futuro] = (tipo, libre)
+            lanzados += 1
+
+        errores = 0
+        while True:
+            detener = (time.monotonic() - t0 >= tiempo_max - 0.05 or parada.evento.is_set()
+                       or (parar is not None and parar.is_set()) or mejor <= cota or errores > 3 * procesos)
+            while not detener and len(en_curso) < procesos:
+                lanzar()
+            if not en_curso:
+                break
+            hechos, _ = wait(list(en_curso), timeout=0.2, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                tipo, libre = en_curso.pop(futuro)
+                try:
+                    status_v, objetivo, nuevos, ramas_v, conflictos_v = futuro.result()
+                except Exception as e:
+                    errores += 1
+                    print(f"⚠️ LNS [{tipo}]: {type(e).__name__}: {e}")
+                    continue
+                s = stats[tipo]
+                s["intentos"] += 1
+                ramas += ramas_v
+                conflictos += conflictos_v
+                mejora = objetivo is not None and objetivo < mejor
+                if status_v == cp_model.OPTIMAL:
+                    s["completos"] += 1
+                    s["fraccion"] = min(FRACCION_MAX, s["fraccion"] * (1.1 if mejora else 1.5))
+                else:
+                    s["fraccion"] = max(FRACCION_MIN, s["fraccion"] * 0.8)
+                if mejora:
+                    s["mejoras"] += 1
+                    s["ganancia"] += mejor - objetivo
+                    mejor, valores = objetivo, nuevos
+                    soluciones += 1
+                    if debug:
+                        print(f"🧩 LNS [{tipo}] mejora: {mejor} ({int(libre.sum())} tareas libres, "
+                              f"{time.monotonic() - t0:.1f} s)")
+                    notificar(tipo)
+
+    tiempo = round(time.monotonic() - t0, 3)
+    status = cp_model.OPTIMAL if mejor <= cota else cp_model.FEASIBLE
+    solucion = SolucionVector(valores, {
+        "estado": status.name,
+        "objetivo": mejor,
+        "cota": mejor if status == cp_model.OPTIMAL else cota,
+        "tiempo_solver_s": tiempo,
+        "ramas": ramas,
+        "conflictos": conflictos,
+        "status": int(status),
+        "configuracion": "lns",
+        "lns": stats,
+    })
+    imprimir_lns(stats, lanzados, tiempo)
+    return solucion, status
+
+def imprimir_lns(stats, vecindarios, tiempo):
+    print(f"\n🧩 LNS ({vecindarios} vecindarios, {tiempo} s):")
+    for tipo, s in stats.items():
+        tasa = s["mejoras"] / s["intentos"] if s["intentos"] else 0
+        print(f"   {tipo:<10} intentos={s['intentos']} mejoras={s['mejoras']} ({tasa:.0%}) "
+              f"completos={s['completos']} ganancia={s['ganancia']:g} fracción={s['fraccion']:.3f}")
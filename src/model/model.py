@@ -24,16 +24,28 @@ def crear_modelo_cp(job_dict,
                     intervals,
                     capacity_per_interval,
                     df_entregas,   
-                    df_calend):    
+                    df_calend,
+                    tablas_duracion=None,
+                    registro=None,
+                    horizonte=None):
     """
     Crea y devuelve el CP-SAT model con las variables y restricciones principales.
+    tablas_duracion: (pedido, t_idx) -> duración por nº de operarios, para
+    tareas cuya duración no es ceil(tiempo_base / x) (macro-tareas).
+    registro: dict opcional que se rellena con los índices de las
+    restricciones parametrizables (capacidades, fechas, objetivo); lo usan
+    ModeloParametrico para editarlas sin reconstruir el modelo y el
+    diagnóstico de inviabilidad para condicionarlas a supuestos.
+    horizonte: fin máximo de las tareas en minutos comprimidos; por defecto
+    la suma de duraciones base (ver estimar_horizonte).
     """
+    tablas_duracion = tablas_duracion or {}
 
     model = cp_model.CpModel()
     all_vars = {}
     
     # 1) Calcular un horizonte simple
-    horizon = estimar_horizonte(job_dict)
+    horizon = horizonte or estimar_horizonte(job_dict)
 
     # 2) Construir diccionario de entregas (fechas)
     ent_dict = construir_diccionario_entregas(df_entregas)
@@ -44,18 +56,22 @@ def crear_modelo_cp(job_dict,
         for t_idx, (tid, machine_id, tiempo_base, min_op, max_op, tipo) in enumerate(tasks):
             all_vars[(pedido, t_idx)] = crear_variables_tarea(
                 model, pedido, tid, t_idx, tiempo_base, min_op, max_op, machine_id,
-                horizon, machine_to_intervals
+                horizon, machine_to_intervals,
+                dur_x=tablas_duracion.get((pedido, t_idx))
             )
 
     # 4) Llamamos a las funciones que añaden restricciones:
-    add_precedences(model, all_vars, precedences)
-    add_machine_capacity(model, machine_to_intervals, machine_capacity)
-    add_operarios_capacity(model, all_vars, intervals, capacity_per_interval)
-    add_material_reception_limits(model, all_vars, job_dict, precedences, df_calend, ent_dict)
-    add_no_solapamiento_distinto_tipo(model, all_vars, job_dict)
+    add_precedences(model, all_vars, precedences, registro)
+    add_machine_capacity(model, machine_to_intervals, machine_capacity, registro)
+    add_operarios_capacity(model, all_vars, intervals, capacity_per_interval, registro)
+    add_material_reception_limits(model, all_vars, job_dict, precedences, df_calend, ent_dict, registro)
+    add_no_solapamiento_distinto_tipo(model, all_vars, job_dict, registro)
     
     # 5) Añadimos la función objetivo
-    add_objective_tardiness_makespan(model, all_vars, job_dict, precedences, df_calend, ent_dict, horizon)
+    add_objective_tardiness_makespan(model, all_vars, job_dict, precedences, df_calend, ent_dict, horizon, registro)
+
+    if registro is not None:
+        registro["horizonte"] = horizon
 
     return model, all_vars
 
@@ -0,0 +1,119 @@
+# PATH: src/model/model_reduction.py
+
+import collections
+import math
+
+def _tabla_duraciones(bases, min_op, max_op):
+    """
+    Duración total de la cadena para cada nº de operarios x en [min_op, max_op]:
+    cada tarea conserva su propio redondeo ceil(base / x).
+    """
+    return [sum(math.ceil(b / x) if b > 0 else 0 for b in bases)
+            for x in range(min_op, max_op + 1)]
+
+def contraer_cadenas(job_dict, precedences):
+    """
+    Fusiona en macro-tareas las cadenas lineales A -> B -> C ... de un pedido
+    cuyas tareas comparten ubicación, tipo_tarea y rango de operarios, y en las
+    que cada eslabón tiene una única sucesora / predecesora.
+
+    La macro-tarea usa un único x_op para toda la cadena y ocupa la máquina
+    de forma continua, por lo que toda solución del modelo reducido es válida
+    en el original (es una restricción del espacio de soluciones).
+
+    Devuelve (job_dict_red, precedences_red, reduccion), donde reduccion tiene:
+      - tablas_duracion: (pedido, t_idx_macro) -> duración por nº de operarios
+      - miembros: (pedido, t_idx_reducido) -> [(t_idx_original, tiempo_base), ...]
+        (las tareas no fusionadas tienen un único miembro)
+    """
+    job_red = {}
+    prec_red = {}
+    tablas = {}
+    miembros = {}
+
+    for pedido, tasks in job_dict.items():
+        n = len(tasks)
+        sucesores = [[] for _ in range(n)]
+        predecesoras = [[] for _ in range(n)]
+        for a, b in precedences.get(pedido, []):
+            sucesores[a].append(b)
+            predecesoras[b].append(a)
+
+        def fusionable(a, b):
+            _, loc_a, _, min_a, max_a, tipo_a = tasks[a]
+            _, loc_b, _, min_b, max_b, tipo_b = tasks[b]
+            return (len(sucesores[a]) == 1 and len(predecesoras[b]) == 1
+                    and loc_a == loc_b and tipo_a == tipo_b
+                    and min_a == min_b and max_a == max_b and min_a <= max_a)
+
+        cabezas = [i for i in range(n)
+                   if not (len(predecesoras[i]) == 1 and fusionable(predecesoras[i][0], i))]
+
+        nuevo_idx = {}
+        job_red[pedido] = []
+        for cabeza in cabezas:
+            cadena = [cabeza]
+            while len(sucesores[cadena[-1]]) == 1 and fusionable(cadena[-1], sucesores[cadena[-1]][0]):
+                cadena.append(sucesores[cadena[-1]][0])
+
+            m_idx = len(job_red[pedido])
+            for i in cadena:
+                nuevo_idx[i] = m_idx
+
+            tid, loc, _, min_op, max_op, tipo = tasks[cabeza]
+            bases = [tasks[i][2] for i in cadena]
+            job_red[pedido].append((tid, loc, sum(bases), min_op, max_op, tipo))
+
+            miembros[(pedido, m_idx)] = [(i, tasks[i][2]) for i in cadena]
+            if len(cadena) > 1 and not (min_op == max_op == 0):
+                tablas[(pedido, m_idx)] = _tabla_duraciones(bases, min_op, max_op)
+
+        prec_red[pedido] = list(dict.fromkeys(
+            (nuevo_idx[a], nuevo_idx[b]) for a, b in precedences.get(pedido, [])
+            if nuevo_idx[a] != nuevo_idx[b]
+        ))
+
+    reduccion = {"tablas_duracion": tablas, "miembros": miembros}
+    return job_red, prec_red, reduccion
+
+def _tamano_modelo(job_dict, precedences, n_turnos):
+    tareas = sum(len(t) for t in job_dict.values())
+
+    tipos_por_maquina = collections.defaultdict(collections.Counter)
+    for tasks in job_dict.values():
+        for (_, machine_id, _, _, _, tipo) in tasks:
+            tipos_por_maquina[machine_id][tipo] += 1
+    pares = 0
+    for contador in tipos_por_maquina.values():
+        total = sum(contador.values())
+        pares += (total * total - sum(c * c for c in contador.values())) // 2
+
+    return {
+        "tareas": tareas,
+        "precedencias": sum(len(p) for p in precedences.values()),
+        "intervalos_operarios": tareas * n_turnos,
+        "pares_no_solapamiento": pares,
+    }
+
+def informe_reduccion(job_dict, precedences, job_red, prec_red, n_turnos):
+    """
+    Compara el tamaño del modelo original y del reducido: tareas (intervalos,
+    x_op y restricciones element), precedencias, literales de solape por turno
+    y disyunciones de no solapamiento entre tipos.
+    """
+    antes = _tamano_modelo(job_dict, precedences, n_turnos)
+    despues = _tamano_modelo(job_red, prec_red, n_turnos)
+    return {
+        clave: {"antes": antes[clave], "despues": despues[clave]}
+        for clave in antes
+    }
+
+def imprimir_informe_reduccion(informe, objetivo_reducido=None, objetivo_completo=None):
+    print("🧩 Contracción de cadenas:")
+    for clave, vals in informe.items():
+        antes, despues = vals["antes"], vals["despues"]
+        porc = round(100 * (antes - despues) / antes, 1) if antes else 0.0
+        print(f"   • {clave}: {antes} → {despues} (-{porc}%)")
+    if objetivo_reducido is not None and objetivo_completo is not None:
+        print(f"   • objetivo: reducido={objetivo_reducido} completo={objetivo_completo} "
+              f"(diferencia {objetivo_reducido - objetivo_completo})")
@@ -4,15 +4,18 @@ from ortools.sat.python import cp_model
 
 from src.model.time_management import comprimir_tiempo
 
-def add_precedences(model, all_vars, precedences):
+def add_precedences(model, all_vars, precedences, registro=None):
     """
     each (idxA, idxB) => startB >= endA
     """
     for pedido, prec_list in precedences.items():
+        cts = []
         for (idxA, idxB) in prec_list:
-            model.Add(all_vars[(pedido, idxB)]["start"] >= all_vars[(pedido, idxA)]["end"])
+            cts.append(model.Add(all_vars[(pedido, idxB)]["start"] >= all_vars[(pedido, idxA)]["end"]).Index())
+        if registro is not None:
+            registro.setdefault("precedencias", {})[pedido] = cts
 
-def add_machine_capacity(model, machine_to_intervals, machine_capacity):
+def add_machine_capacity(model, machine_to_intervals, machine_capacity, registro=None):
     """
     AddCumulative para cada máquina con su capacity
     """
@@ -20,9 +23,37 @@ def add_machine_capacity(model, machine_to_intervals, machine_capacity):
         ivars = [iv for (iv, d) in interval_list]
         demands = [d for (iv, d) in interval_list]
         cap = machine_capacity.get(mach, 1)
-        model.AddCumulative(ivars, demands, cap)
+        ct = model.AddCumulative(ivars, demands, cap)
+        if registro is not None:
+            registro.setdefault("capacidad_maquina", {})[mach] = ct.Index()
 
-def add_operarios_capacity(model, all_vars, intervals, capacity_per_interval):
+def intervalo_solape_turno(model, i, cini, cfin, pedido, t_idx, varset):
+    """
+    Intervalo opcional de la tarea activo sólo si solapa el turno i
+    [cini, cfin); es lo que consume operarios en el AddCumulative del turno.
+    """
+    st = varset["start"]
+    en = varset["end"]
+
+    ov = model.NewBoolVar(f"op_overlap_{i}_{pedido}_{t_idx}")
+    model.Add(st < cfin).OnlyEnforceIf(ov)
+    model.Add(en > cini).OnlyEnforceIf(ov)
+
+    b1 = model.NewBoolVar("")
+    b2 = model.NewBoolVar("")
+    model.Add(st >= cfin).OnlyEnforceIf(b1)
+    model.Add(en <= cini).OnlyEnforceIf(b2)
+    model.AddBoolOr([b1, b2]).OnlyEnforceIf(ov.Not())
+
+    return model.NewOptionalIntervalVar(
+        varset["start"],
+        varset["duration"],
+        varset["end"],
+        ov,
+        f"op_interval_{i}_{pedido}_{t_idx}"
+    )
+
+def add_operarios_capacity(model, all_vars, intervals, capacity_per_interval, registro=None):
     """
     Suma la capacity por intervalo segun df_calend (comp_start, comp_end)
     y se hace un OptionalIntervalVar para cada overlapping con x_op.
@@ -36,33 +67,14 @@ def add_operarios_capacity(model, all_vars, intervals, capacity_per_interval):
         demands = []
 
         for (pedido, t_idx), varset in all_vars.items():
-            xop = varset["x_op"]
-            st = varset["start"]
-            en = varset["end"]
-
-            ov = model.NewBoolVar(f"op_overlap_{i}_{pedido}_{t_idx}")
-            model.Add(st < cfin).OnlyEnforceIf(ov)
-            model.Add(en > cini).OnlyEnforceIf(ov)
-
-            b1 = model.NewBoolVar("")
-            b2 = model.NewBoolVar("")
-            model.Add(st >= cfin).OnlyEnforceIf(b1)
-            model.Add(en <= cini).OnlyEnforceIf(b2)
-            model.AddBoolOr([b1, b2]).OnlyEnforceIf(ov.Not())
-
-            interval_active = model.NewOptionalIntervalVar(
-                varset["start"],
-                varset["duration"],
-                varset["end"],
-                ov,
-                f"op_interval_{i}_{pedido}_{t_idx}"
-            )
-            interval_list.append(interval_active)
-            demands.append(xop)
-
-        model.AddCumulative(interval_list, demands, cap_i)
-
-def add_material_reception_limits(model, all_vars, job_dict, precedences, df_calend, ent_dict):
+            interval_list.append(intervalo_solape_turno(model, i, cini, cfin, pedido, t_idx, varset))
+            demands.append(varset["x_op"])
+
+        ct = model.AddCumulative(interval_list, demands, cap_i)
+        if registro is not None:
+            registro.setdefault("capacidad_turno", {})[i] = ct.Index()
+
+def add_material_reception_limits(model, all_vars, job_dict, precedences, df_calend, ent_dict, registro=None):
     """
     No iniciar las tareas sin predecesoras antes de la fecha_recepcion_materiales
     """
@@ -73,12 +85,23 @@ def add_material_reception_limits(model, all_vars, job_dict, precedences, df_cal
         precs_pedido = precedences.get(pedido, [])
         indices_con_predecesor = set(idxB for (idxA, idxB) in precs_pedido)
 
+        cts = []
         for t_idx in range(len(tasks)):
             if t_idx not in indices_con_predecesor:
                 st_var = all_vars[(pedido, t_idx)]["start"]
-                model.Add(st_var >= recep_min)
-
-def add_no_solapamiento_distinto_tipo(model, all_vars, job_dict):
+                cts.append(model.Add(st_var >= recep_min).Index())
+        if registro is not None:
+            registro.setdefault("recepcion", {})[pedido] = cts
+
+def disyuntiva(model, s_i, e_i, s_j, e_j):
+    """start_i >= end_j OR start_j >= end_i. Devuelve el índice del BoolOr."""
+    b1 = model.NewBoolVar("")
+    b2 = model.NewBoolVar("")
+    model.Add(s_i >= e_j).OnlyEnforceIf(b1)
+    model.Add(s_j >= e_i).OnlyEnforceIf(b2)
+    return model.AddBoolOr([b1, b2]).Index()
+
+def add_no_solapamiento_distinto_tipo(model, all_vars, job_dict, registro=None):
     """
     Restringir que en la misma machine_id no haya tareas de distinto tipo superpuestas.
     disyuntiva: start_i >= end_j OR start_j >= end_i
@@ -102,13 +125,47 @@ def add_no_solapamiento_distinto_tipo(model, all_vars, job_dict):
                     s_j = all_vars[(ped_j, idx_j)]["start"]
                     e_j = all_vars[(ped_j, idx_j)]["end"]
 
-                    b1 = model.NewBoolVar("")
-                    b2 = model.NewBoolVar("")
-                    model.Add(s_i >= e_j).OnlyEnforceIf(b1)
-                    model.Add(s_j >= e_i).OnlyEnforceIf(b2)
-                    model.AddBoolOr([b1, b2])
+                    ct = disyuntiva(model, s_i, e_i, s_j, e_j)
+                    if registro is not None:
+                        disy = registro.setdefault("disyuntivas", {})
+                        disy.setdefault(ped_i, []).append(ct)
+                        disy.setdefault(ped_j, []).append(ct)
+
+def peso_retraso(fecha_entrega, fecha_min):
+    """Peso del retraso de un pedido: más urgente cuanto antes se entrega."""
+    dias_restantes = (fecha_entrega - fecha_min).days
+    return max(1, 1000 - dias_restantes)
 
-def add_objective_tardiness_makespan(model, all_vars, job_dict, precedences, df_calend, ent_dict, horizon):
+def retraso_pedido(model, all_vars, pedido, n_tareas, precs_pedido, due_min, peso, horizon, registro=None):
+    """
+    Variables de fin y retraso ponderado de un pedido. Devuelve
+    (weighted, ends_pedido): el retraso ponderado y los fines de sus tareas finales.
+    """
+    indices_con_sucesor = set(idxA for (idxA, idxB) in precs_pedido)
+    indices_finales = [i for i in range(n_tareas) if i not in indices_con_sucesor]
+    if not indices_finales:
+        indices_finales = list(range(n_tareas))
+
+    ends_pedido = [all_vars[(pedido, i)]["end"] for i in indices_finales]
+    pedido_end_var = model.NewIntVar(0, horizon, f"end_pedido_{pedido}")
+    model.AddMaxEquality(pedido_end_var, ends_pedido)
+
+    tardiness = model.NewIntVar(0, 10_000_000, f"tardiness_{pedido}")
+    ct_retraso = model.Add(tardiness >= pedido_end_var - due_min)
+
+    weighted = model.NewIntVar(0, 100_000_000, f"weighted_tardiness_{pedido}")
+    ct_peso = model.AddMultiplicationEquality(weighted, [tardiness, peso])
+
+    if registro is not None:
+        registro.setdefault("retraso", {})[pedido] = ct_retraso.Index()
+        registro.setdefault("peso", {})[pedido] = ct_peso.Index()
+        registro.setdefault("fin_pedido", {})[pedido] = pedido_end_var
+        registro.setdefault("retraso_ponderado", {})[pedido] = weighted
+        registro.setdefault("fines_finales", {})[pedido] = ends_pedido
+    return weighted, ends_pedido
+
+def add_objective_tardiness_makespan(model, all_vars, job_dict, precedences, df_calend, ent_dict, horizon,
+                                     registro=None):
     """
     Minimizar 10 * sum_tardiness + makespan
     """
@@ -120,36 +177,28 @@ def add_objective_tardiness_makespan(model, all_vars, job_dict, precedences, df_
 
     pesos = {}
     for ref, val in ent_dict.items():
-        dias_restantes = (val["fecha_entrega"] - fecha_min).days
-        pesos[ref] = max(1, 1000 - dias_restantes)
+        pesos[ref] = peso_retraso(val["fecha_entrega"], fecha_min)
 
     for pedido, tasks in job_dict.items():
-        precs_pedido = precedences.get(pedido, [])
-        indices_con_sucesor = set(idxA for (idxA, idxB) in precs_pedido)
-        indices_finales = [i for i in range(len(tasks)) if i not in indices_con_sucesor]
-        if not indices_finales:
-            indices_finales = list(range(len(tasks)))
-
-        ends_pedido = [all_vars[(pedido, i)]["end"] for i in indices_finales]
-        pedido_end_var = model.NewIntVar(0, horizon, f"end_pedido_{pedido}")
-        model.AddMaxEquality(pedido_end_var, ends_pedido)
-
-        all_ends += ends_pedido
-
         due_date = ent_dict[pedido]["fecha_entrega"]
         due_min = comprimir_tiempo(due_date, df_calend)
 
-        tardiness = model.NewIntVar(0, 10_000_000, f"tardiness_{pedido}")
-        model.Add(tardiness >= pedido_end_var - due_min)
-
-        weighted = model.NewIntVar(0, 100_000_000, f"weighted_tardiness_{pedido}")
-        model.AddMultiplicationEquality(weighted, [tardiness, pesos[pedido]])
+        weighted, ends_pedido = retraso_pedido(model, all_vars, pedido, len(tasks), precedences.get(pedido, []),
+                                               due_min, pesos[pedido], horizon, registro)
+        all_ends += ends_pedido
         tardiness_vars.append(weighted)
 
     sum_tardiness = model.NewIntVar(0, 1_000_000_000, "sum_tardiness")
-    model.Add(sum_tardiness == cp_model.LinearExpr.Sum(tardiness_vars))
+    ct_suma = model.Add(sum_tardiness == cp_model.LinearExpr.Sum(tardiness_vars))
 
     makespan = model.NewIntVar(0, horizon, "makespan")
-    model.AddMaxEquality(makespan, all_ends)
+    ct_makespan = model.AddMaxEquality(makespan, all_ends)
 
     model.Minimize(10 * sum_tardiness + makespan)
+
+    if registro is not None:
+        registro["fecha_min"] = fecha_min
+        registro["suma_retrasos"] = ct_suma.Index()
+        registro["var_suma_retrasos"] = sum_tardiness
+        registro["makespan"] = ct_makespan.Index()
+        registro["var_makespan"] = makespan
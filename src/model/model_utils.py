@@ -35,9 +35,12 @@ def crear_variables_tarea(model,
                           max_op,
                           machine_id,
                           horizon,
-                          machine_to_intervals):
+                          machine_to_intervals,
+                          dur_x=None):
     """
     Crea las variables de una tarea: x_op, duration, start, end, interval.
+    Si se pasa dur_x (duración para cada x en [min_op, max_op]) se usa en
+    lugar de ceil(tiempo_base / x), p.ej. para macro-tareas.
     """
     if min_op == max_op == 0:
         x_op = model.NewIntVar(0, 0, f"xop_{pedido}_{tid}")
@@ -45,10 +48,11 @@ def crear_variables_tarea(model,
     else:
         x_op = model.NewIntVar(min_op, max_op, f"xop_{pedido}_{tid}")
         # Mapeamos la duración en función del nº de operarios
-        dur_x = []
-        for x in range(min_op, max_op + 1):
-            val = math.ceil(tiempo_base / x) if tiempo_base > 0 else 0
-            dur_x.append(val)
+        if dur_x is None:
+            dur_x = []
+            for x in range(min_op, max_op + 1):
+                val = math.ceil(tiempo_base / x) if tiempo_base > 0 else 0
+                dur_x.append(val)
         dur_min = min(dur_x)
         dur_max = max(dur_x)
         duration_var = model.NewIntVar(dur_min, dur_max, f"dur_{pedido}_{tid}")
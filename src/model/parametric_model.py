@@ -0,0 +1,303 @@
+# PATH: src/model/parametric_model.py
+
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from src.model.model import crear_modelo_cp
+from src.model.model_utils import estimar_horizonte, crear_variables_tarea
+from src.model.model_restrictions import (
+    add_precedences,
+    add_material_reception_limits,
+    intervalo_solape_turno,
+    disyuntiva,
+    peso_retraso,
+    retraso_pedido,
+)
+from src.model.time_management import comprimir_tiempo
+from src.model.solution_vector import SolucionVector, aplicar_hint
+from src.model.results_postprocessing import extraer_solucion
+
+INT_MAX = 2 ** 63 - 1
+
+class ModeloParametrico:
+    """
+    Modelo CP-SAT que se construye una vez y se edita en el proto para
+    análisis what-if: capacidades de ubicación y de turno, fechas de
+    entrega/recepción y alta/baja de pedidos. Cada re-resolución parte de
+    la última solución como hint.
+
+    Las restricciones editables se localizan con el `registro` que rellena
+    crear_modelo_cp (índices de restricción). Los sub-mensajes del proto se
+    piden de nuevo en cada acceso: añadir restricciones puede reubicarlos.
+    """
+
+    def __init__(self, job_dict, precedences, machine_capacity, intervals, capacity_per_interval,
+                 df_entregas, df_calend, df_tareas=None):
+        self.job_dict = dict(job_dict)
+        self.precedences = dict(precedences)
+        self.machine_capacity = dict(machine_capacity)
+        self.intervals = intervals
+        self.capacity_per_interval = list(capacity_per_interval)
+        self.df_entregas = df_entregas.copy()
+        self.df_calend = df_calend
+        self.df_tareas = df_tareas
+
+        self.registro = {}
+        self.model, self.all_vars = crear_modelo_cp(self.job_dict, self.precedences, self.machine_capacity,
+                                                    self.intervals, self.capacity_per_interval,
+                                                    self.df_entregas, self.df_calend, registro=self.registro)
+        # Literal siempre falso: como enforcement desactiva una restricción sin borrarla
+        self._falso = self.model.NewBoolVar("desactivada")
+        self.model.Add(self._falso == 0)
+        self.ultima_solucion = None
+
+    @classmethod
+    def desde_excel(cls, ruta_excel, debug=False):
+        from src.model.solver import preparar_entradas
+
+        e = preparar_entradas(ruta_excel, debug)
+        return cls(e["job_dict"], e["precedences"], e["machine_capacity"], e["intervals"],
+                   e["capacity_per_interval"], e["df_entregas"], e["df_calend"], e["df_tareas"])
+
+    def _ct(self, indice):
+        return self.model.Proto().constraints[indice]
+
+    # ── Capacidades ──────────────────────────────────────────────────────────
+    def set_capacidad_maquina(self, ubicacion, capacidad):
+        indice = self.registro.get("capacidad_maquina", {}).get(ubicacion)
+        self.machine_capacity[ubicacion] = int(capacidad)
+        if indice is not None:   # sin tareas en la ubicación no hay restricción que editar
+            self._ct(indice).cumulative.capacity.offset = int(capacidad)
+
+    def set_capacidad_turno(self, i, capacidad):
+        """Operarios disponibles (cant_operarios) en el turno i de intervals."""
+        self._ct(self.registro["capacidad_turno"][i]).cumulative.capacity.offset = int(capacidad)
+        self.capacity_per_interval[i] = int(capacidad)
+
+    # ── Fechas ───────────────────────────────────────────────────────────────
+    def set_fechas_pedido(self, pedido, fecha_entrega=None, fecha_recepcion=None):
+        if pedido not in self.job_dict:
+            raise KeyError(f"Pedido desconocido: {pedido}")
+        fila = self.df_entregas["referencia"].astype(str) == str(pedido)
+
+        if fecha_recepcion is not None:
+            fecha_recepcion = pd.Timestamp(fecha_recepcion)
+            recep_min = comprimir_tiempo(fecha_recepcion, self.df_calend)
+            for indice in self.registro["recepcion"].get(pedido, []):
+                self._ct(indice).linear.domain[0] = recep_min       # start >= recep_min
+            self.df_entregas.loc[fila, "fecha_recepcion_materiales"] = fecha_recepcion
+
+        if fecha_entrega is not None:
+            fecha_entrega = pd.Timestamp(fecha_entrega)
+            due_min = comprimir_tiempo(fecha_entrega, self.df_calend)
+
+            prod = self._ct(self.registro["peso"][pedido]).int_prod
+            idx_tardiness = prod.exprs[0].vars[0]
+            for expr in prod.exprs:
+                if len(expr.vars) == 0:
+                    expr.offset = peso_retraso(fecha_entrega, self.registro["fecha_min"])
+
+            # tardiness - end_pedido >= -due_min (o su forma negada)
+            lineal = self._ct(self.registro["retraso"][pedido]).linear
+            coef_t = dict(zip(lineal.vars, lineal.coeffs))[idx_tardiness]
+            if coef_t > 0:
+                lineal.domain[0] = -due_min
+            else:
+                lineal.domain[1] = due_min
+            self.df_entregas.loc[fila, "fecha_entrega"] = fecha_entrega
+
+    # ── Alta / baja de pedidos ───────────────────────────────────────────────
+    def _filtrar_cumulativa(self, indice, quitar_starts):
+        """Quita de un AddCumulative los intervalos que empiezan en una var de quitar_starts."""
+        proto = self.model.Proto()
+        cum = proto.constraints[indice].cumulative
+        conservar = []
+        for iv, dem in zip(cum.intervals, cum.demands):
+            inicio = proto.constraints[iv].interval.start
+            if not (len(inicio.vars) == 1 and inicio.vars[0] in quitar_starts):
+                conservar.append((iv, list(dem.vars), list(dem.coeffs), dem.offset))
+        if len(conservar) == len(cum.intervals):
+            return
+        cum.intervals.clear()
+        cum.demands.clear()
+        for iv, vars_, coeffs, offset in conservar:
+            cum.intervals.append(iv)
+            dem = cum.demands.add()
+            dem.vars.extend(vars_)
+            dem.coeffs.extend(coeffs)
+            dem.offset = offset
+
+    def quitar_pedido(self, pedido):
+        """
+        Saca el pedido del plan: sus intervalos dejan de consumir capacidad,
+        sus disyuntivas se desactivan y sale del makespan y del retraso total.
+        Sus variables quedan en el modelo, libres y sin efecto.
+        """
+        if pedido not in self.job_dict:
+            raise KeyError(f"Pedido desconocido: {pedido}")
+        claves = [(pedido, t) for t in range(len(self.job_dict[pedido]))]
+        starts = {self.all_vars[k]["start"].Index() for k in claves}
+
+        for indice in list(self.registro.get("capacidad_maquina", {}).values()) + \
+                      list(self.registro.get("capacidad_turno", {}).values()):
+            self._filtrar_cumulativa(indice, starts)
+
+        for indice in self.registro.get("disyuntivas", {}).pop(pedido, []):
+            ct = self._ct(indice)
+            if self._falso.Index() not in ct.enforcement_literal:
+                ct.enforcement_literal.append(self._falso.Index())
+
+        fines = {v.Index() for v in self.registro["fines_finales"].pop(pedido)}
+        lin_max = self._ct(self.registro["makespan"]).lin_max
+        exprs = [(list(e.vars), list(e.coeffs), e.offset) for e in lin_max.exprs]
+        lin_max.exprs.clear()
+        for vars_, coeffs, offset in exprs:
+            if not (len(vars_) == 1 and vars_[0] in fines):
+                e = lin_max.exprs.add()
+                e.vars.extend(vars_)
+                e.coeffs.extend(coeffs)
+                e.offset = offset
+
+        ponderado = self.registro["retraso_ponderado"].pop(pedido).Index()
+        suma = self._ct(self.registro["suma_retrasos"]).linear
+        terminos = [(v, c) for v, c in zip(suma.vars, suma.coeffs) if v != ponderado]
+        suma.vars.clear()
+        suma.coeffs.clear()
+        suma.vars.extend([v for v, _ in terminos])
+        suma.coeffs.extend([c for _, c in terminos])
+
+        for k in claves:
+            del self.all_vars[k]
+        del self.job_dict[pedido]
+        self.precedences.pop(pedido, None)
+
+    def _ampliar_horizonte(self, extra):
+        nuevo = self.registro["horizonte"] + extra
+        proto = self.model.Proto()
+        indices = [v[c].Index() for v in self.all_vars.values() for c in ("start", "end")]
+        indices += [v.Index() for v in self.registro.get("fin_pedido", {}).values()]
+        indices.append(self.registro["var_makespan"].Index())
+        for idx in indices:
+            dominio = proto.variables[idx].domain
+            dominio.clear()
+            dominio.extend([0, nuevo])
+        self.registro["horizonte"] = nuevo
+        return nuevo
+
+    def anadir_pedido(self, pedido, tareas, precedencias, fecha_entrega, fecha_recepcion):
+        """
+        Añade un pedido nuevo. tareas en formato job_dict
+        [(tid, ubicación, tiempo_base, min_op, max_op, tipo), ...] y
+        precedencias [(idx_a, idx_b), ...] con índices locales.
+        """
+        if pedido in self.job_dict:
+            raise ValueError(f"El pedido {pedido} ya está en el modelo")
+        model = self.model
+        fecha_entrega, fecha_recepcion = pd.Timestamp(fecha_entrega), pd.Timestamp(fecha_recepcion)
+        horizonte = self._ampliar_horizonte(estimar_horizonte({pedido: tareas}))
+
+        # 1) Variables y restricciones nuevas (aún sin tocar las existentes)
+        nuevos = {}
+        por_maquina = {}
+        for t_idx, (tid, machine_id, tiempo_base, min_op, max_op, tipo) in enumerate(tareas):
+            mti = {machine_id: []}
+            nuevos[(pedido, t_idx)] = crear_variables_tarea(model, pedido, tid, t_idx, tiempo_base, min_op,
+                                                           max_op, machine_id, horizonte, mti)
+            por_maquina.setdefault(machine_id, []).extend(iv for iv, _ in mti[machine_id])
+
+        add_precedences(model, nuevos, {pedido: precedencias})
+        ent = {pedido: {"fecha_recepcion": fecha_recepcion, "fecha_entrega": fecha_entrega}}
+        add_material_reception_limits(model, nuevos, {pedido: tareas}, {pedido: precedencias},
+                                      self.df_calend, ent, self.registro)
+
+        turnos = []
+        for i, seg in enumerate(self.intervals):
+            turnos.append([(intervalo_solape_turno(model, i, seg["comp_start"], seg["comp_end"], pedido, t_idx, vs),
+                            vs["x_op"]) for (_, t_idx), vs in nuevos.items()])
+
+        disy = self.registro.setdefault("disyuntivas", {})
+        existentes = [(p, t, tarea[1], tarea[5]) for p, ts in self.job_dict.items() for t, tarea in enumerate(ts)]
+        candidatas = existentes + [(pedido, t, tarea[1], tarea[5]) for t, tarea in enumerate(tareas)]
+        for t_idx, tarea in enumerate(tareas):
+            vs = nuevos[(pedido, t_idx)]
+            for (p, t, maquina, tipo) in candidatas:
+                if maquina != tarea[1] or tipo == tarea[5] or (p == pedido and t <= t_idx):
+                    continue
+                otro = nuevos.get((p, t)) or self.all_vars[(p, t)]
+                ct = disyuntiva(model, vs["start"], vs["end"], otro["start"], otro["end"])
+                disy.setdefault(pedido, []).append(ct)
+                if p != pedido:
+                    disy.setdefault(p, []).append(ct)
+
+        due_min = comprimir_tiempo(fecha_entrega, self.df_calend)
+        peso = peso_retraso(fecha_entrega, self.registro["fecha_min"])
+        weighted, ends = retraso_pedido(model, nuevos, pedido, len(tareas), precedencias, due_min, peso,
+                                        horizonte, self.registro)
+
+        cap_maquina = self.registro.setdefault("capacidad_maquina", {})
+        for maquina, ivs in por_maquina.items():
+            if maquina not in cap_maquina:
+                ct = model.AddCumulative(ivs, [1] * len(ivs), self.machine_capacity.get(maquina, 1))
+                cap_maquina[maquina] = ct.Index()
+                por_maquina[maquina] = []
+
+        # 2) Ediciones del proto sobre restricciones compartidas
+        for maquina, ivs in por_maquina.items():
+            cum = self._ct(cap_maquina[maquina]).cumulative
+            for iv in ivs:
+                cum.intervals.append(iv.Index())
+                cum.demands.add().offset = 1
+
+        for i, nuevos_turno in enumerate(turnos):
+            cum = self._ct(self.registro["capacidad_turno"][i]).cumulative
+            for iv, x_op in nuevos_turno:
+                cum.intervals.append(iv.Index())
+                dem = cum.demands.add()
+                dem.vars.append(x_op.Index())
+                dem.coeffs.append(1)
+
+        lin_max = self._ct(self.registro["makespan"]).lin_max
+        for fin in ends:
+            e = lin_max.exprs.add()
+            e.vars.append(fin.Index())
+            e.coeffs.append(1)
+
+        suma = self._ct(self.registro["suma_retrasos"]).linear
+        coef_suma = dict(zip(suma.vars, suma.coeffs))[self.registro["var_suma_retrasos"].Index()]
+        suma.vars.append(weighted.Index())
+        suma.coeffs.append(-coef_suma)
+
+        self.all_vars.update(nuevos)
+        self.job_dict[pedido] = list(tareas)
+        self.precedences[pedido] = list(precedencias)
+        self.df_entregas = pd.concat([self.df_entregas, pd.DataFrame([{
+            "referencia": pedido, "fecha_entrega": fecha_entrega, "fecha_recepcion_materiales": fecha_recepcion,
+        }])], ignore_index=True)
+
+    # ── Resolución ───────────────────────────────────────────────────────────
+    def resolver(self, tiempo_max=None, num_workers=None, usar_hint=True, debug=False,
+                 observadores=None, parar=None):
+        """
+        Resuelve el modelo en su estado actual (con la última solución como
+        hint si usar_hint) y devuelve (tareas, timeline, resumen_pedidos)
+        como planificar_linea_produccion.
+        """
+        from src.model.solver import resolver_modelo, TIEMPO_MAX_DEFECTO, WORKERS_DEFECTO
+
+        if usar_hint and self.ultima_solucion is not None:
+            aplicar_hint(self.model, self.ultima_solucion.valores)
+        else:
+            self.model.Proto().clear_solution_hint()
+
+        solver, status = resolver_modelo(self.model, debug,
+                                         tiempo_max or TIEMPO_MAX_DEFECTO, num_workers or WORKERS_DEFECTO,
+                                         observadores=observadores, parar=parar)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.ultima_solucion = SolucionVector.desde_solver(solver, status)
+
+        sol_tareas, timeline, resumen_pedidos = extraer_solucion(
+            solver, status, self.all_vars, self.intervals, self.capacity_per_interval,
+            self.df_calend, self.df_entregas)
+        if sol_tareas and self.df_tareas is not None:
+            sol_tareas.contexto["df_tareas"] = self.df_tareas
+        return sol_tareas, timeline, resumen_pedidos
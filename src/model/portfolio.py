@@ -0,0 +1,253 @@
+# PATH: src/model/portfolio.py
+
+import time
+import queue
+import threading
+import multiprocessing as mp
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.model.solution_vector import SolucionVector, aplicar_hint
+
+PERIODO_MIN_RONDA_S = 10   # s mínimos de búsqueda antes de reiniciar con una solución ajena mejor
+
+# (nombre, parámetros de CP-SAT). Con 1 hilo por proceso la configuración
+# manda; con varios, CP-SAT la usa como base de sus subsolvers.
+CONFIGURACIONES_PORTFOLIO = (
+    ("defecto", {}),
+    ("lns", {"use_lns_only": True}),
+    ("fixed_search", {"search_branching": cp_model.FIXED_SEARCH}),
+    ("lp_nivel2", {"linearization_level": 2}),
+    ("pseudo_coste", {"search_branching": cp_model.PSEUDO_COST_SEARCH}),
+    ("lp_nivel0", {"linearization_level": 0}),
+    ("quick_restart", {"search_branching": cp_model.PORTFOLIO_WITH_QUICK_RESTART_SEARCH}),
+    ("core", {"optimize_with_core": True}),
+)
+
+class _SolucionesProceso(cp_model.CpSolverSolutionCallback):
+    """Envía al coordinador cada solución que mejora la mejor del proceso, con su vector completo."""
+
+    def __init__(self, n, salida, t0, mejor):
+        super().__init__()
+        self.n, self.salida, self.t0 = n, salida, t0
+        self.mejor = mejor
+
+    def on_solution_callback(self):
+        objetivo = self.ObjectiveValue()
+        if self.mejor is not None and objetivo >= self.mejor:
+            return
+        self.mejor = objetivo
+        valores = np.asarray(self.response_proto.solution, dtype=np.int64)
+        self.salida.put(("solucion", self.n, objetivo, self.BestObjectiveBound(),
+                         time.monotonic() - self.t0, valores))
+
+def _vigilar_ronda(parar, entrada, solver, callback, terminado, inicio, periodo, recibida):
+    """
+    Corta la ronda si se pide parar o si llega una solución ajena mejor que
+    la propia y la ronda ya lleva `periodo` s. Sondea parar.is_set() en lugar
+    de parar.wait(): un proceso que muere con un hilo dentro de wait() deja
+    bloqueado el set() del coordinador.
+    """
+    while not terminado.is_set():
+        if parar.is_set():
+            solver.StopSearch()
+            return
+        try:
+            objetivo, valores = entrada.get(timeout=0.2)
+        except queue.Empty:
+            objetivo = None
+        if objetivo is not None and (callback.mejor is None or objetivo < callback.mejor):
+            recibida[:] = [(objetivo, valores)]
+        if recibida and time.monotonic() - inicio >= periodo:
+            solver.StopSearch()
+            return
+
+def _proceso_portfolio(n, parametros, modelo_texto, num_workers, tiempo_max, periodo, parar, entrada, salida):
+    """
+    Un proceso del portfolio. Resuelve con su configuración y, cuando otro
+    proceso encuentra una solución mejor, reinicia partiendo de ella como
+    hint (nueva ronda, nueva semilla). Envía ("solucion", ...) en cada
+    mejora, ("ronda", ...) al final de cada ronda y ("fin", n) al terminar.
+    """
+    t0 = time.monotonic()
+    try:
+        model = cp_model.CpModel()
+        model.Proto().parse_text_format(modelo_texto)
+        mejor = None
+        ronda = 0
+        while not parar.is_set():
+            restante = tiempo_max - (time.monotonic() - t0)
+            if restante <= 0.05:
+                break
+
+            solver = cp_model.CpSolver()
+            for clave, valor in parametros.items():
+                setattr(solver.parameters, clave, valor)
+            solver.parameters.random_seed = 1000 * n + ronda
+            solver.parameters.num_search_workers = num_workers
+            solver.parameters.max_time_in_seconds = restante
+
+            callback = _SolucionesProceso(n, salida, t0, mejor)
+            recibida = []
+            terminado = threading.Event()
+            vigia = threading.Thread(target=_vigilar_ronda,
+                                     args=(parar, entrada, solver, callback, terminado, time.monotonic(),
+                                           periodo, recibida),
+                                     daemon=True)
+            vigia.start()
+            try:
+                status = solver.Solve(model, callback)
+            finally:
+                terminado.set()
+                vigia.join()
+
+            mejor = callback.mejor
+            salida.put(("ronda", n, status, solver.BestObjectiveBound(), solver.NumBranches(),
+                        solver.NumConflicts()))
+            if status in (cp_model.OPTIMAL, cp_model.INFEASIBLE, cp_model.MODEL_INVALID) or not recibida:
+                break
+            objetivo, valores = recibida[0]
+            aplicar_hint(model, valores)
+            mejor = objetivo if mejor is None else min(mejor, objetivo)
+            ronda += 1
+    except Exception as e:
+        salida.put(("error", n, f"{type(e).__name__}: {e}"))
+    finally:
+        salida.put(("fin", n))
+
+class _ParadaPortfolio:
+    """Lo que reciben los observadores como `callback`: StopSearch para todo el portfolio."""
+
+    def __init__(self, evento):
+        self.evento = evento
+
+    def StopSearch(self):
+        self.evento.set()
+
+def resolver_portfolio(model, procesos, tiempo_max, num_workers, configuraciones=CONFIGURACIONES_PORTFOLIO,
+                       periodo=PERIODO_MIN_RONDA_S, observadores=None, parar=None, debug=False):
+    """
+    Lanza `procesos` resoluciones independientes del mismo modelo (cada una
+    con num_workers hilos, su semilla y su configuración, ciclando por
+    `configuraciones`). Cada mejora se reparte a los demás procesos, que
+    reinician con ella como hint (tras `periodo` s de ronda como mínimo).
+    Todo se detiene cuando un proceso prueba optimalidad (o inviabilidad),
+    cuando la mejor cota global alcanza a la mejor solución, al agotar
+    tiempo_max o al activarse parar.
+
+    Devuelve (solucion, status) como resolver_modelo, con solucion un
+    SolucionVector cuyos metadatos añaden "configuracion" (la ganadora) y
+    "portfolio" (resumen por proceso).
+    """
+    ctx = mp.get_context("spawn")
+    parar_todos = ctx.Event()
+    salida = ctx.Queue()
+    entradas = [ctx.Queue() for _ in range(procesos)]
+    configs = [configuraciones[n % len(configuraciones)] for n in range(procesos)]
+    modelo_texto = str(model.Proto())
+
+    t0 = time.monotonic()
+    lanzados = []
+    for n, (_, parametros) in enumerate(configs):
+        p = ctx.Process(target=_proceso_portfolio,
+                        args=(n, parametros, modelo_texto, num_workers, tiempo_max, periodo,
+                              parar_todos, entradas[n], salida),
+                        daemon=True)
+        p.start()
+        lanzados.append(p)
+
+    stats = [{"configuracion": nombre, "soluciones": 0, "mejoras_globales": 0, "objetivo": None,
+              "estado": None, "rondas": 0, "error": None} for nombre, _ in configs]
+    parada = _ParadaPortfolio(parar_todos)
+    mejor_obj, mejor_valores, ganador, probado = None, None, None, None
+    cota = -np.inf
+    ramas = conflictos = 0
+    vivos = set(range(procesos))
+
+    while vivos:
+        if (parar is not None and parar.is_set()) or time.monotonic() - t0 > tiempo_max + 5:
+            parar_todos.set()
+        try:
+            mensaje = salida.get(timeout=0.2)
+        except queue.Empty:
+            vivos = {n for n in vivos if lanzados[n].is_alive()}
+            continue
+
+        tipo, n = mensaje[0], mensaje[1]
+        if tipo == "solucion":
+            _, _, objetivo, cota_n, t, valores = mensaje
+            stats[n]["soluciones"] += 1
+            stats[n]["objetivo"] = objetivo
+            cota = max(cota, cota_n)
+            if mejor_obj is None or objetivo < mejor_obj:
+                mejor_obj, mejor_valores, ganador = objetivo, valores, n
+                stats[n]["mejoras_globales"] += 1
+                if debug:
+                    print(f"🏁 [{configs[n][0]}] mejora: {objetivo} ({t:.1f} s)")
+                for m, cola in enumerate(entradas):
+                    if m != n:
+                        cola.put((objetivo, valores))
+                progreso = {"soluciones": sum(s["soluciones"] for s in stats), "objetivo": objetivo,
+                            "cota": cota, "tiempo_s": round(t, 3), "configuracion": configs[n][0]}
+                for observador in observadores or ():
+                    observador(progreso, parada)
+        elif tipo == "ronda":
+            _, _, status, cota_n, ramas_n, conflictos_n = mensaje
+            stats[n]["estado"] = status.name
+            stats[n]["rondas"] += 1
+            ramas += ramas_n
+            conflictos += conflictos_n
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                cota = max(cota, cota_n)
+            if status in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+                probado = status
+                parar_todos.set()
+        elif tipo == "error":
+            stats[n]["error"] = mensaje[2]
+            print(f"⚠️ Portfolio [{configs[n][0]}]: {mensaje[2]}")
+        elif tipo == "fin":
+            vivos.discard(n)
+
+        if mejor_obj is not None and mejor_obj <= cota and not parar_todos.is_set():
+            probado = cp_model.OPTIMAL
+            parar_todos.set()
+
+    for p in lanzados:
+        p.join(timeout=5)
+    for cola in entradas:
+        # Las soluciones aún no leídas por un proceso ya terminado bloquearían la salida del intérprete
+        cola.cancel_join_thread()
+        cola.close()
+    tiempo = round(time.monotonic() - t0, 3)
+
+    if mejor_obj is None:
+        status = probado if probado is not None else cp_model.UNKNOWN
+        valores, objetivo, cota_final = [], None, None
+    else:
+        status = cp_model.OPTIMAL if probado == cp_model.OPTIMAL else cp_model.FEASIBLE
+        valores, objetivo = mejor_valores, mejor_obj
+        cota_final = mejor_obj if status == cp_model.OPTIMAL else float(cota)
+    solucion = SolucionVector(valores, {
+        "estado": status.name,
+        "objetivo": objetivo,
+        "cota": cota_final,
+        "tiempo_solver_s": tiempo,
+        "ramas": ramas,
+        "conflictos": conflictos,
+        "status": int(status),
+        "configuracion": configs[ganador][0] if ganador is not None else None,
+        "portfolio": stats,
+    })
+
+    imprimir_portfolio(stats, ganador, tiempo)
+    return solucion, status
+
+def imprimir_portfolio(stats, ganador, tiempo):
+    print(f"\n🏎️ Portfolio ({len(stats)} procesos, {tiempo} s):")
+    for n, s in enumerate(stats):
+        marca = "🏆" if n == ganador else "  "
+        objetivo = "-" if s["objetivo"] is None else s["objetivo"]
+        print(f"   {marca} #{n} {s['configuracion']:<14} estado={s['estado'] or s['error'] or '-':<10} "
+              f"objetivo={objetivo} soluciones={s['soluciones']} mejoras_globales={s['mejoras_globales']} "
+              f"rondas={s['rondas']}")
@@ -0,0 +1,195 @@
+# PATH: src/model/precedence_graph.py
+
+import numpy as np
+
+def _aristas_por_pedido(estructura):
+    """
+    Devuelve, para cada pedido k, el rango [ini, fin) de sus aristas dentro de
+    los arrays (origen, destino) con índices globales.
+    """
+    pred_indptr = estructura["pred_indptr"]
+    origen = estructura["pred_indices"]
+    destino = np.repeat(np.arange(len(pred_indptr) - 1), np.diff(pred_indptr))
+    ped_arista = estructura["tarea_pedido"][destino]
+    rangos = np.searchsorted(ped_arista, np.arange(len(estructura["pedidos"]) + 1))
+    return origen, destino, rangos
+
+def _analizar_dag(n, aristas):
+    """
+    Analiza el DAG local de un pedido (nodos 0..n-1, aristas (a, b)).
+    Devuelve (orden_topologico, ciclo, mascara_aristas_necesarias):
+      - ciclo es None o la lista de nodos de un ciclo encontrado
+      - la máscara marca las aristas que sobreviven a la reducción
+        transitiva (las duplicadas y las implicadas por otro camino caen)
+    """
+    sucesores = [[] for _ in range(n)]
+    grado_ent = [0] * n
+    for a, b in aristas:
+        sucesores[a].append(b)
+        grado_ent[b] += 1
+
+    # Kahn; si quedan nodos sin ordenar hay al menos un ciclo
+    pila = [i for i in range(n) if grado_ent[i] == 0]
+    orden = []
+    restantes = list(grado_ent)
+    while pila:
+        u = pila.pop()
+        orden.append(u)
+        for v in sucesores[u]:
+            restantes[v] -= 1
+            if restantes[v] == 0:
+                pila.append(v)
+
+    if len(orden) < n:
+        return orden, _extraer_ciclo(sucesores, restantes), None
+
+    # Descendientes de cada nodo como bitset, en orden topológico inverso
+    descendientes = [0] * n
+    for u in reversed(orden):
+        d = 0
+        for v in sucesores[u]:
+            d |= (1 << v) | descendientes[v]
+        descendientes[u] = d
+
+    mascara = []
+    vistas = set()
+    for a, b in aristas:
+        if (a, b) in vistas:
+            mascara.append(False)
+            continue
+        vistas.add((a, b))
+        redundante = any(w != b and (descendientes[w] >> b) & 1 for w in sucesores[a])
+        mascara.append(not redundante)
+
+    return orden, None, mascara
+
+def _extraer_ciclo(sucesores, restantes):
+    """
+    Todo nodo que Kahn no pudo ordenar tiene alguna predecesora también sin
+    ordenar: remontándolas hasta repetir nodo se obtiene un ciclo concreto.
+    """
+    en_ciclo = {i for i, g in enumerate(restantes) if g > 0}
+    predecesoras = {i: [] for i in en_ciclo}
+    for a, lista in enumerate(sucesores):
+        if a in en_ciclo:
+            for b in lista:
+                if b in en_ciclo:
+                    predecesoras[b].append(a)
+
+    u = min(en_ciclo)
+    visitados = {}
+    camino = []
+    while u not in visitados:
+        visitados[u] = len(camino)
+        camino.append(u)
+        u = predecesoras[u][0]
+    ciclo = camino[visitados[u]:]
+    ciclo.reverse()
+    return ciclo + [ciclo[0]]
+
+def detectar_problemas_grafo(estructura):
+    """
+    Devuelve un dict con las referencias colgantes y los ciclos de precedencia
+    (pedido, [id_interno, ...]) sin lanzar excepciones.
+    """
+    problemas = {
+        "colgantes": list(estructura.get("referencias_colgantes", [])),
+        "ciclos": [],
+    }
+    _, ciclos, _, _ = _recorrer_pedidos(estructura, reducir=False)
+    problemas["ciclos"] = ciclos
+    return problemas
+
+def validar_grafo_precedencias(estructura):
+    """
+    Lanza ValueError con un mensaje legible si hay predecesoras inexistentes
+    o ciclos de precedencia.
+    """
+    _lanzar_si_invalido(detectar_problemas_grafo(estructura))
+
+def _lanzar_si_invalido(problemas):
+    mensajes = []
+    if problemas["colgantes"]:
+        detalle = ", ".join(f"{ped} tarea {tid} -> predecesora {p}"
+                            for ped, tid, p in problemas["colgantes"][:20])
+        mensajes.append(f"{len(problemas['colgantes'])} predecesoras inexistentes ({detalle})")
+    if problemas["ciclos"]:
+        detalle = ", ".join(f"{ped}: {' -> '.join(str(t) for t in ciclo)}"
+                            for ped, ciclo in problemas["ciclos"][:20])
+        mensajes.append(f"{len(problemas['ciclos'])} pedidos con ciclos de precedencia ({detalle})")
+    if mensajes:
+        raise ValueError("❌ Grafo de precedencias inválido: " + "; ".join(mensajes))
+
+def _recorrer_pedidos(estructura, reducir=True):
+    """
+    Analiza el DAG de cada pedido. Los pedidos que comparten plantilla
+    (mismo nº de tareas y mismas aristas locales, p.ej. mismo vértice) se
+    analizan una sola vez.
+    """
+    origen, destino, rangos = _aristas_por_pedido(estructura)
+    indptr = estructura["pedido_indptr"]
+    ids = estructura["id_interno"]
+    pedidos = estructura["pedidos"]
+
+    mascara = np.ones(len(origen), dtype=bool)
+    orden_topologico = np.empty(len(ids), dtype=np.int64)
+    ciclos = []
+    cache = {}
+
+    for k in range(len(pedidos)):
+        base = indptr[k]
+        n = int(indptr[k + 1] - base)
+        ini, fin = rangos[k], rangos[k + 1]
+        aristas = tuple(zip((origen[ini:fin] - base).tolist(), (destino[ini:fin] - base).tolist()))
+
+        clave = (n, aristas)
+        if clave not in cache:
+            cache[clave] = _analizar_dag(n, aristas)
+        orden, ciclo, mascara_local = cache[clave]
+
+        if ciclo is not None:
+            ciclos.append((pedidos[k], [ids[base + i] for i in ciclo]))
+            continue
+        orden_topologico[base:base + n] = np.asarray(orden, dtype=np.int64) + base
+        if reducir:
+            mascara[ini:fin] = mascara_local
+
+    return mascara, ciclos, orden_topologico, len(cache)
+
+def preparar_grafo_precedencias(estructura, reducir=True, debug=False):
+    """
+    Valida y simplifica el grafo de precedencias antes de construir el modelo:
+      1) detecta predecesoras inexistentes y ciclos (ValueError)
+      2) calcula el orden topológico de cada pedido
+      3) aplica la reducción transitiva para que sólo lleguen a CP-SAT
+         las precedencias necesarias
+    Una sola pasada por los pedidos sirve para validar y reducir. Devuelve
+    (estructura_reducida, informe); el nº de aristas eliminadas se imprime
+    siempre.
+    """
+    mascara, ciclos, orden_topologico, n_plantillas = _recorrer_pedidos(estructura, reducir)
+    _lanzar_si_invalido({"colgantes": list(estructura.get("referencias_colgantes", [])), "ciclos": ciclos})
+
+    _, destino, _ = _aristas_por_pedido(estructura)
+
+    n = len(estructura["id_interno"])
+    pred_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(destino[mascara], minlength=n), out=pred_indptr[1:])
+
+    reducida = dict(estructura)
+    reducida["pred_indptr"] = pred_indptr
+    reducida["pred_indices"] = estructura["pred_indices"][mascara]
+    reducida["orden_topologico"] = orden_topologico
+
+    informe = {
+        "aristas_originales": int(len(mascara)),
+        "aristas_eliminadas": int((~mascara).sum()),
+        "plantillas_distintas": n_plantillas,
+    }
+
+    print(f"🔗 Precedencias: {informe['aristas_originales']} aristas, "
+          f"{informe['aristas_eliminadas']} eliminadas por reducción transitiva")
+    if debug:
+        print(f"   ({informe['plantillas_distintas']} plantillas de grafo distintas)")
+
+    return reducida, informe
@@ -1,12 +1,11 @@
 # PATH: src/model/results_postprocessing.py
 
+import numpy as np
 import pandas as pd
 from ortools.sat.python import cp_model
-import datetime
-from src.model.time_management import ( descomprimir_tiempo, 
-                                        construir_timeline_detallado, 
-                                        calcular_dias_laborables,
-                                        calcular_promedio_horas_laborables_por_dia)
+from src.model.time_management import descomprimir_tiempos, construir_timeline_columnar
+from src.model.kpis import calcular_kpis_pedidos
+from src.model.solution_table import TablaSolucion
 
 def extraer_solucion( solver, 
                       status, 
@@ -14,154 +13,131 @@ def extraer_solucion( solver,
                       intervals, 
                       capacity_per_interval, 
                       df_calend,
-                      df_entregas):
+                      df_entregas,
+                      reduccion=None):
+    """
+    reduccion: resultado de contraer_cadenas; si se indica, las macro-tareas
+    se expanden de nuevo en sus filas (pedido, t_idx) originales.
+    Devuelve (tareas, timeline, (resumen_metr, df_pedidos)), con tareas y
+    timeline como TablaSolucion.
+    """
     if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
         print("⚠️ No se encontró solución factible u óptima")
         return [], [], None
 
-    sol_tareas = []
-    for (pedido, t_idx), varset in all_vars.items():
-        st  = solver.Value(varset["start"])
-        en  = solver.Value(varset["end"])
-        xop = solver.Value(varset["x_op"])
-        dur = solver.Value(varset["duration"])
-        ts_ini = descomprimir_tiempo(st, df_calend, modo="ini")
-        ts_fin = descomprimir_tiempo(en, df_calend, modo="fin")
-
-        sol_tareas.append({
-            "pedido": pedido,
-            "t_idx": t_idx,
-            "start": st,
-            "end": en,
-            "x_op": xop,
-            "duration": dur,
-            "machine": varset["machine"],
-            "timestamp_ini": ts_ini,
-            "timestamp_fin": ts_fin
-        })
-
-    sol_tareas.sort(key=lambda x: x["start"])
-
-    timeline = construir_timeline_detallado(sol_tareas, intervals, capacity_per_interval)
-    for tramo in timeline:
-        tramo["timestamp_ini"] = descomprimir_tiempo(tramo["t_ini"], df_calend, modo="ini")
-        tramo["timestamp_fin"] = descomprimir_tiempo(tramo["t_fin"], df_calend, modo="fin")
-
-    df_ent = df_entregas.copy()
-    df_ent = df_ent.rename(columns={
-        "referencia": "pedido",
-        "fecha_entrega": "fecha_entrega_req",
-        "fecha_recepcion_materiales": "fecha_mat"
-    })
+    valores = leer_valores_solucion(solver, all_vars)
+    return extraer_solucion_desde_valores(valores, intervals, capacity_per_interval,
+                                          df_calend, df_entregas, reduccion,
+                                          metadatos=metadatos_solver(solver, status))
+
+def metadatos_solver(solver, status):
+    return {
+        "estado": solver.StatusName(status),
+        "objetivo": solver.ObjectiveValue(),
+        "cota": solver.BestObjectiveBound(),
+        "tiempo_solver_s": round(solver.WallTime(), 3),
+        "ramas": solver.NumBranches(),
+        "conflictos": solver.NumConflicts(),
+    }
 
-    ############################################
-    # 1) Convertir las columnas del df_ent a Timestamp
-    df_ent["fecha_entrega_req"] = pd.to_datetime(df_ent["fecha_entrega_req"], errors="coerce")
-    df_ent["fecha_mat"]         = pd.to_datetime(df_ent["fecha_mat"],         errors="coerce")
-
-    info_pedidos = {}
-    pedidos_en_sol = set([t["pedido"] for t in sol_tareas])
-    for ped in pedidos_en_sol:
-        info_pedidos[ped] = {
-            "fecha_final":      None,
-            "fecha_requerida":  None,
-            "fecha_materiales": None,
-            "delta_entrega_laboral": 0.0,
-            "leadtime_laboral": 0.0
-        }
-
-    for _, row in df_ent.iterrows():
-        ped = row["pedido"]
-        if ped in info_pedidos:
-            info_pedidos[ped]["fecha_requerida"]  = row["fecha_entrega_req"]  # Timestamp (o NaT)
-            info_pedidos[ped]["fecha_materiales"] = row["fecha_mat"]          # Timestamp (o NaT)
-
-    ############################################
-    # 2) Armar max_fin_by_pedido
-    from collections import defaultdict
-    max_fin_by_pedido = defaultdict(lambda: None)
-    for t in sol_tareas:
-        p = t["pedido"]
-        tsf = t["timestamp_fin"]
-        # Si tsf es un datetime.datetime en vez de pd.Timestamp => convertir
-        if isinstance(tsf, datetime.datetime) and not isinstance(tsf, pd.Timestamp):
-            tsf = pd.Timestamp(tsf)
-            t["timestamp_fin"] = tsf
-
-        if tsf is not None:
-            if max_fin_by_pedido[p] is None or tsf > max_fin_by_pedido[p]:
-                max_fin_by_pedido[p] = tsf
-
-    ############################################
-    # 3) Calcular retraso/adelanto y lead time
-    for ped in info_pedidos:
-        fin = max_fin_by_pedido.get(ped)
-        info_pedidos[ped]["fecha_final"] = fin
-
-        fecha_req = info_pedidos[ped].get("fecha_requerida")   # pd.Timestamp o NaT
-        fecha_mat = info_pedidos[ped].get("fecha_materiales")  # pd.Timestamp o NaT
-
-        if pd.notnull(fecha_req) and pd.notnull(fin):
-            # fin < req => adelanto, fin > req => retraso
-            if fin < fecha_req:
-                dias_laborales = calcular_dias_laborables(fin, fecha_req, df_calend)
-                dias_diff = dias_laborales[0] if isinstance(dias_laborales, tuple) else dias_laborales
-                info_pedidos[ped]["delta_entrega_laboral"] = -round(dias_diff, 2)
-            else:
-                dias_laborales = calcular_dias_laborables(fecha_req, fin, df_calend)
-                dias_diff = dias_laborales[0] if isinstance(dias_laborales, tuple) else dias_laborales
-                info_pedidos[ped]["delta_entrega_laboral"] = round(dias_diff, 2)
-
-        if pd.notnull(fecha_mat) and pd.notnull(fin):
-            lt_val = calcular_dias_laborables(fecha_mat, fin, df_calend)
-            if isinstance(lt_val, tuple):
-                lt_val = lt_val[0]
-            info_pedidos[ped]["leadtime_laboral"] = round(lt_val, 2)
-
-    ############################################
-    # 4) Inyectar estos datos en sol_tareas
-    for t in sol_tareas:
-        ped = t["pedido"]
-        info = info_pedidos[ped]
-        t["fecha_entrega_requerida"]       = info["fecha_requerida"]
-        t["fecha_entrega_estimada"]        = info["fecha_final"]
-        t["delta_entrega_dias_laborales"]  = info["delta_entrega_laboral"]
-        t["leadtime_dias_laborales"]       = info["leadtime_laboral"]
-    retrasos = []
-    leadtimes = []
-    fechas_fin = []
-    for ped, vals in info_pedidos.items():
-        delta = vals["delta_entrega_laboral"]
-        if delta > 0:
-            retrasos.append(delta)
-        leadtimes.append(vals["leadtime_laboral"])
-        if vals["fecha_final"] is not None:
-            fechas_fin.append(vals["fecha_final"])
-
-    retraso_medio = sum(retrasos)/len(retrasos) if len(retrasos) > 0 else 0.0
-    leadtime_medio = sum(leadtimes)/len(leadtimes) if len(leadtimes) > 0 else 0.0
-
-    fechas_fin.sort()
-    if len(fechas_fin) <= 1:
-        dias_entre_entregas_prom = 0.0
-    else:
-        diffs = []
-        for i in range(len(fechas_fin)-1):
-            dd = calcular_dias_laborables(fechas_fin[i], fechas_fin[i+1], df_calend)
-            if isinstance(dd, tuple):
-                dd = dd[0]
-            diffs.append(dd)
-        dias_entre_entregas_prom = sum(diffs)/len(diffs)
-
-    horas_x_dia = calcular_promedio_horas_laborables_por_dia(df_calend)
-
-    resumen_metr = {
-        "retraso_medio_dias": round(retraso_medio, 2),
-        "leadtime_medio_dias": round(leadtime_medio, 2),
-        "dias_entre_entregas_prom": round(dias_entre_entregas_prom, 2),
-        "horas_laborables_por_dia": horas_x_dia
+def leer_valores_solucion(solver, all_vars):
+    """
+    Lee de una vez (solver.Values sobre listas apiladas) los valores de
+    start/end/x_op/duration de todas las tareas. Devuelve un dict de arrays.
+    """
+    claves = list(all_vars.keys())
+    varsets = list(all_vars.values())
+
+    def valores(campo):
+        variables = [v[campo] for v in varsets]
+        # Las constantes (NewConstant) pueden compartir variable: se consulta
+        # cada índice una sola vez y se reparte el resultado
+        _, primeras, inversa = np.unique([var.Index() for var in variables],
+                                         return_index=True, return_inverse=True)
+        unicas = [variables[i] for i in primeras]
+        return np.asarray(solver.Values(unicas), dtype=np.int64)[inversa]
+
+    return {
+        "pedido": np.array([c[0] for c in claves], dtype=object),
+        "t_idx": np.array([c[1] for c in claves], dtype=np.int64),
+        "start": valores("start"),
+        "end": valores("end"),
+        "x_op": valores("x_op"),
+        "duration": valores("duration"),
+        "machine": np.array([v["machine"] for v in varsets], dtype=np.int64),
     }
 
-    df_pedidos = pd.DataFrame.from_dict(info_pedidos, orient="index")
+def _expandir_macro_tareas(valores, reduccion):
+    """
+    Expande vectorialmente las macro-tareas: cada miembro hereda x_op y
+    empieza donde acaba el anterior de su cadena.
+    """
+    claves = zip(valores["pedido"].tolist(), valores["t_idx"].tolist())
+    miembros = [reduccion["miembros"].get(c) or [(c[1], None)] for c in claves]
+    n_miembros = np.array([len(m) for m in miembros], dtype=np.int64)
+
+    rep = {k: np.repeat(v, n_miembros) for k, v in valores.items()}
+    t_orig = np.array([i for m in miembros for (i, _) in m], dtype=np.int64)
+    bases = np.array([b if b is not None else 0 for m in miembros for (_, b) in m], dtype=np.int64)
+
+    x = rep["x_op"]
+    dur = np.where(x > 0, -(-bases // np.maximum(x, 1)), bases)
+    # Las tareas no fusionadas conservan la duración que dio el solver
+    simples = np.repeat(n_miembros == 1, n_miembros)
+    dur = np.where(simples, rep["duration"], dur)
+
+    grupo_ini = np.repeat(np.cumsum(n_miembros) - n_miembros, n_miembros)
+    acumulado = np.cumsum(dur)
+    previo = acumulado - dur - (acumulado - dur)[grupo_ini]
+
+    rep["t_idx"] = t_orig
+    rep["start"] = rep["start"] + previo
+    rep["end"] = np.where(simples, rep["end"], rep["start"] + dur)
+    rep["duration"] = dur
+    return rep
+
+def extraer_solucion_desde_valores(valores,
+                                   intervals,
+                                   capacity_per_interval,
+                                   df_calend,
+                                   df_entregas,
+                                   reduccion=None,
+                                   metadatos=None):
+    """
+    Construye las tablas de la solución a partir de los arrays de valores
+    (ver leer_valores_solucion), sin depender del objeto solver.
+    """
+    if reduccion:
+        valores = _expandir_macro_tareas(valores, reduccion)
+
+    df_tareas = pd.DataFrame({k: valores[k] for k in
+                              ["pedido", "t_idx", "start", "end", "x_op", "duration", "machine"]})
+    df_tareas = df_tareas.sort_values("start", kind="stable").reset_index(drop=True)
+    df_tareas["timestamp_ini"] = descomprimir_tiempos(df_tareas["start"].to_numpy(), intervals, modo="ini")
+    df_tareas["timestamp_fin"] = descomprimir_tiempos(df_tareas["end"].to_numpy(), intervals, modo="fin")
+
+    df_timeline = construir_timeline_columnar(df_tareas["start"], df_tareas["end"], df_tareas["x_op"],
+                                              intervals, capacity_per_interval)
+    df_timeline["timestamp_ini"] = descomprimir_tiempos(df_timeline["t_ini"].to_numpy(), intervals, modo="ini")
+    df_timeline["timestamp_fin"] = descomprimir_tiempos(df_timeline["t_fin"].to_numpy(), intervals, modo="fin")
+
+    sol_tareas = TablaSolucion(df_tareas, metadatos, contexto={
+        "intervals": intervals,
+        "capacity_per_interval": capacity_per_interval,
+    })
+    timeline = TablaSolucion(df_timeline)
+
+    resumen_metr, df_pedidos = calcular_kpis_pedidos(df_tareas, df_entregas, df_calend)
+
+    # Inyectar los datos del pedido en cada tarea
+    por_pedido = df_pedidos.rename(columns={
+        "fecha_requerida": "fecha_entrega_requerida",
+        "fecha_final": "fecha_entrega_estimada",
+        "delta_entrega_laboral": "delta_entrega_dias_laborales",
+        "leadtime_laboral": "leadtime_dias_laborales",
+    })
+    for col in ["fecha_entrega_requerida", "fecha_entrega_estimada",
+                "delta_entrega_dias_laborales", "leadtime_dias_laborales"]:
+        df_tareas[col] = df_tareas["pedido"].map(por_pedido[col])
 
-    return sol_tareas, timeline, (resumen_metr, df_pedidos)
\ No newline at end of file
+    return sol_tareas, timeline, (resumen_metr, df_pedidos)
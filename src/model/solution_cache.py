@@ -0,0 +1,119 @@
+# PATH: src/model/solution_cache.py
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from src.model.solution_vector import SolucionVector
+
+VERSION_CACHE = 1                      # subir si cambia la formulación del modelo
+TAMANO_MAX_DEFECTO = 2 * 1024 ** 3     # 2 GB
+
+def _normalizar(obj):
+    """Convierte a tipos JSON con orden estable (dicts por clave, tuplas como listas)."""
+    if isinstance(obj, dict):
+        return [[_normalizar(k), _normalizar(v)] for k, v in sorted(obj.items(), key=lambda kv: repr(kv[0]))]
+    if isinstance(obj, (list, tuple)):
+        return [_normalizar(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if isinstance(obj, float) and obj != obj:
+        return None
+    return obj
+
+def clave_modelo(job_dict, precedences, machine_capacity, intervals, capacity_per_interval,
+                 df_entregas, perfil):
+    """
+    Hash canónico (sha256) de las entradas normalizadas del modelo y del
+    perfil del solver. El perfil no debe incluir el límite de tiempo: dos
+    runs que sólo difieren en él comparten entrada (ver CacheSoluciones.buscar).
+    """
+    entregas = df_entregas.sort_values("referencia")
+    datos = {
+        "version": VERSION_CACHE,
+        "job_dict": job_dict,
+        "precedences": precedences,
+        "machine_capacity": machine_capacity,
+        "calendario": [(s["comp_start"], s["comp_end"], s["dt_inicio"], s["dt_fin"]) for s in intervals],
+        "capacidad_turnos": list(capacity_per_interval),
+        "entregas": list(zip(entregas["referencia"].astype(str),
+                             entregas["fecha_entrega"].astype(str),
+                             entregas["fecha_recepcion_materiales"].astype(str))),
+        "perfil": perfil,
+    }
+    canonico = json.dumps(_normalizar(datos), separators=(",", ":"), default=str)
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+class CacheSoluciones:
+    """
+    Caché en disco de soluciones CP-SAT: por clave, un .npz comprimido con
+    el vector completo de valores y un .json con los metadatos del solver,
+    el límite de tiempo usado y el motivo de parada. Expulsión LRU por tamaño total (el mtime de
+    los archivos marca el último uso).
+    """
+
+    def __init__(self, directorio, tamano_max=TAMANO_MAX_DEFECTO):
+        self.directorio = directorio
+        self.tamano_max = tamano_max
+        os.makedirs(directorio, exist_ok=True)
+
+    def _rutas(self, clave):
+        base = os.path.join(self.directorio, clave)
+        return base + ".npz", base + ".json"
+
+    def buscar(self, clave, tiempo_max):
+        """
+        Devuelve (modo, SolucionVector) o (None, None):
+          - "hit": la solución guardada es óptima o se obtuvo con un límite de
+            tiempo >= tiempo_max; se puede usar tal cual.
+          - "hint": se obtuvo con menos tiempo; sirve para arrancar el solver.
+        """
+        ruta_npz, ruta_json = self._rutas(clave)
+        if not (os.path.exists(ruta_npz) and os.path.exists(ruta_json)):
+            return None, None
+        try:
+            with open(ruta_json, encoding="utf-8") as f:
+                metadatos = json.load(f)
+            with np.load(ruta_npz) as npz:
+                valores = npz["valores"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Entrada de caché corrupta ({clave[:12]}): {e}")
+            return None, None
+
+        for ruta in (ruta_npz, ruta_json):
+            os.utime(ruta)
+        solucion = SolucionVector(valores, metadatos)
+        completa = metadatos["estado"] == "OPTIMAL" or metadatos["tiempo_max"] >= tiempo_max
+        return ("hit" if completa else "hint"), solucion
+
+    def guardar(self, clave, solucion, tiempo_max, motivo_parada=None):
+        ruta_npz, ruta_json = self._rutas(clave)
+        tmp_npz = ruta_npz + ".tmp.npz"
+        np.savez_compressed(tmp_npz, valores=solucion.valores)
+        os.replace(tmp_npz, ruta_npz)
+        with open(ruta_json, "w", encoding="utf-8") as f:
+            json.dump({**solucion.metadatos, "tiempo_max": tiempo_max, "motivo_parada": motivo_parada}, f)
+        self._expulsar()
+
+    def _expulsar(self):
+        entradas = {}
+        for nombre in os.listdir(self.directorio):
+            clave, ext = os.path.splitext(nombre)
+            if ext not in (".npz", ".json"):
+                continue
+            st = os.stat(os.path.join(self.directorio, nombre))
+            tam, uso = entradas.get(clave, (0, 0))
+            entradas[clave] = (tam + st.st_size, max(uso, st.st_mtime))
+
+        total = sum(tam for tam, _ in entradas.values())
+        for clave, (tam, _) in sorted(entradas.items(), key=lambda kv: kv[1][1]):
+            if total <= self.tamano_max:
+                break
+            for ruta in self._rutas(clave):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            total -= tam
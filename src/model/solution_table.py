@@ -0,0 +1,44 @@
+# PATH: src/model/solution_table.py
+
+class TablaSolucion:
+    """
+    Tabla columnar (DataFrame) con una fila por tarea o tramo de la solución.
+    Mantiene la interfaz de lista de diccionarios que usaban los exportadores
+    (len, iteración, to_records) y guarda los metadatos del solver.
+    """
+
+    def __init__(self, df, metadatos=None, contexto=None):
+        self.df = df
+        self.metadatos = metadatos or {}
+        # Datos de entrada en memoria (calendario, TAREAS) que necesitan
+        # algunas salidas; no se persisten
+        self.contexto = contexto or {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def __iter__(self):
+        return iter(self.to_records())
+
+    def to_records(self):
+        """
+        Vista de compatibilidad: lista de dicts con tipos nativos y None en
+        lugar de NaT/NaN, igual que la antigua salida de extraer_solucion.
+        """
+        df = self.df
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def como_dataframe(datos):
+    """DataFrame de una TablaSolucion o de una lista de dicts (formato antiguo)."""
+    import pandas as pd
+
+    if isinstance(datos, TablaSolucion):
+        return datos.df
+    return pd.DataFrame(datos)
+
+def como_registros(datos):
+    """Lista de dicts de una TablaSolucion o de una lista ya en ese formato."""
+    if isinstance(datos, TablaSolucion):
+        return datos.to_records()
+    return list(datos)
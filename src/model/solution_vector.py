@@ -0,0 +1,74 @@
+# PATH: src/model/solution_vector.py
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+class SolucionVector:
+    """
+    Solución guardada como vector completo de valores (uno por variable del
+    modelo, en orden de índice) con la interfaz de CpSolver que usa el
+    post-proceso: Value, Values, ObjectiveValue, BestObjectiveBound,
+    WallTime, StatusName, NumBranches y NumConflicts. Permite pasar una
+    solución de caché (o de otro proceso) a extraer_solucion sin cambios,
+    siempre que el modelo se haya construido igual (mismos índices).
+    """
+
+    def __init__(self, valores, metadatos):
+        self.valores = np.asarray(valores, dtype=np.int64)
+        self.metadatos = dict(metadatos)
+
+    @classmethod
+    def desde_solver(cls, solver, status):
+        from src.model.results_postprocessing import metadatos_solver
+
+        valores = np.asarray(solver.ResponseProto().solution, dtype=np.int64)
+        return cls(valores, {**metadatos_solver(solver, status), "status": int(status)})
+
+    @property
+    def status(self):
+        return self.metadatos["status"]
+
+    def _valor(self, expr):
+        if isinstance(expr, (int, np.integer)):
+            return int(expr)
+        if isinstance(expr, cp_model.IntVar):
+            return int(self.valores[expr.Index()])
+        raise TypeError(f"SolucionVector sólo evalúa variables o constantes, no {type(expr).__name__}")
+
+    def Value(self, expr):
+        return self._valor(expr)
+
+    def Values(self, variables):
+        indices = np.fromiter((v.Index() for v in variables), dtype=np.int64, count=len(variables))
+        return self.valores[indices]
+
+    def ObjectiveValue(self):
+        return self.metadatos["objetivo"]
+
+    def BestObjectiveBound(self):
+        return self.metadatos["cota"]
+
+    def WallTime(self):
+        return self.metadatos["tiempo_solver_s"]
+
+    def StatusName(self, status=None):
+        return self.metadatos["estado"]
+
+    def NumBranches(self):
+        return self.metadatos["ramas"]
+
+    def NumConflicts(self):
+        return self.metadatos["conflictos"]
+
+def aplicar_hint(model, valores):
+    """
+    Sustituye el hint del modelo por `valores` (uno por variable, desde la
+    0). Puede ser más corto que el modelo si se han añadido variables
+    después (ModeloParametrico); las nuevas quedan sin hint.
+    """
+    proto = model.Proto()
+    if len(valores) > len(proto.variables):
+        raise ValueError(f"La solución tiene {len(valores)} valores y el modelo {len(proto.variables)} variables")
+    proto.clear_solution_hint()
+    proto.solution_hint.vars.extend(range(len(valores)))
+    proto.solution_hint.values.extend(np.asarray(valores, dtype=np.int64).tolist())
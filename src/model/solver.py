@@ -1,13 +1,36 @@
 # PATH: src/model/solver.py
 
+import threading
+
 from ortools.sat.python import cp_model
 
 from src.model.model import crear_modelo_cp
 from src.model.time_management import comprimir_calendario
-from src.model.data_processing import leer_datos, construir_estructura_tareas
-from src.model.results_postprocessing import extraer_solucion
+from src.model.data_processing import leer_datos, construir_arrays_tareas, estructura_a_diccionarios
+from src.model.precedence_graph import preparar_grafo_precedencias
+from src.model.results_postprocessing import extraer_solucion, extraer_solucion_desde_valores
+from src.model.model_reduction import contraer_cadenas, informe_reduccion, imprimir_informe_reduccion
+from src.model.solution_cache import CacheSoluciones, clave_modelo
+from src.model.solution_vector import SolucionVector, aplicar_hint
+from src.model.termination import CriterioParada
+from src.model.lns import EstructuraLNS, resolver_lns
+from src.model.feasibility_checks import comprobar_viabilidad, validar_viabilidad
+from src.model.infeasibility_diagnosis import (
+    TIEMPO_DIAGNOSTICO_DEFECTO, diagnosticar_inviabilidad, imprimir_diagnostico
+)
+
+TIEMPO_MAX_DEFECTO = 1200  # s
+WORKERS_DEFECTO = 8
 
-def planificar_linea_produccion(ruta_excel, debug=False):
+def preparar_entradas(ruta_excel, debug=False):
+    """
+    Lee el libro y deja las entradas del modelo listas: DataFrames
+    originales, calendario comprimido y job_dict / precedences /
+    machine_capacity filtrados a las referencias de ENTREGAS. También
+    devuelve la estructura de arrays (ver construir_arrays_tareas) para
+    las comprobaciones previas y el informe de preparar_grafo_precedencias
+    (aristas originales / eliminadas).
+    """
     datos = leer_datos(ruta_excel)
     df_tareas   = datos["df_tareas"]
     df_capac    = datos["df_capac"]
@@ -15,37 +38,319 @@ def planificar_linea_produccion(ruta_excel, debug=False):
     df_entregas = datos["df_entregas"]
 
     intervals, cap_int = comprimir_calendario(df_calend)
-    job_dict, precedences, machine_cap = construir_estructura_tareas(df_tareas, df_capac)
+    estructura = construir_arrays_tareas(df_tareas, df_capac)
+    estructura, informe_grafo = preparar_grafo_precedencias(estructura, debug=debug)
+    job_dict, precedences, machine_cap = estructura_a_diccionarios(estructura)
 
     referencias_validas = set(df_entregas["referencia"])
     job_dict = {k: v for k, v in job_dict.items() if k in referencias_validas}
     precedences = {k: v for k, v in precedences.items() if k in referencias_validas}
 
-    model, all_vars = crear_modelo_cp(job_dict,
-                                      precedences,
+    return {
+        "df_tareas": df_tareas,
+        "df_capac": df_capac,
+        "df_calend": df_calend,
+        "df_entregas": df_entregas,
+        "intervals": intervals,
+        "capacity_per_interval": cap_int,
+        "job_dict": job_dict,
+        "precedences": precedences,
+        "machine_capacity": machine_cap,
+        "estructura": estructura,
+        "informe_grafo": informe_grafo,
+    }
+
+def planificar_linea_produccion(ruta_excel, debug=False, contraer=False, comparar_reduccion=False,
+                                tiempo_max=TIEMPO_MAX_DEFECTO, num_workers=WORKERS_DEFECTO,
+                                observadores=None, parar=None, dir_cache=None, prechecks="abortar",
+                                diagnostico=None, tiempo_diagnostico=TIEMPO_DIAGNOSTICO_DEFECTO, portfolio=None,
+                                perfiles_solver=None, telemetria=False, criterio_parada=None, lns=None,
+                                jerarquico=None):
+    """
+    tiempo_max / num_workers: límite de tiempo (s) e hilos de CP-SAT.
+    observadores / parar: ver resolver_modelo.
+    dir_cache: carpeta de la caché de soluciones (ver solution_cache). Con las
+    mismas entradas y perfil se devuelve la solución guardada sin resolver;
+    si sólo cambia (aumenta) el límite de tiempo se resuelve partiendo de ella.
+    contraer: fusiona cadenas lineales de tareas (misma ubicación y tipo) en
+    macro-tareas para reducir el modelo; la solución se expande de nuevo.
+    comparar_reduccion: resuelve también el modelo completo e informa de la
+    diferencia de objetivo (sólo tiene efecto con contraer=True).
+    prechecks: "abortar" (ValueError si los datos son inviables), "avisar"
+    (sólo informa) o None (sin comprobaciones previas); ver feasibility_checks.
+    diagnostico: si la resolución acaba sin solución, explica el conflicto
+    con supuestos (ver infeasibility_diagnosis) en tiempo_diagnostico s.
+    "inviable" lo lanza después; "paralelo", a la vez que la resolución.
+    portfolio: nº de procesos de CP-SAT en carrera (ver resolver_modelo).
+    perfiles_solver: recomendaciones del ajuste de parámetros (clase de
+    tamaño -> perfil, ver src.tuning.ajuste); se aplica el de la clase
+    del modelo.
+    telemetria: registra la curva objetivo/cota y las estadísticas de la
+    búsqueda (True o un TelemetriaSolver); queda en
+    sol_tareas.contexto["telemetria"] para que mostrar_resultados la guarde.
+    criterio_parada: CriterioParada (ver termination) para terminar antes
+    del límite de tiempo por gap, estancamiento u objetivo aceptable. El
+    motivo de parada queda siempre en sol_tareas.metadatos["motivo_parada"].
+    lns: nº de procesos del LNS propio (ver resolver_modelo); pensado para
+    instancias grandes, donde una sola resolución monolítica avanza despacio.
+    jerarquico: nº de procesos de la planificación en dos niveles (semanas
+    y detalle por semana en paralelo, ver hierarchical) para horizontes de
+    meses; no construye el modelo completo, así que no aplican caché,
+    portfolio, LNS, diagnóstico ni observadores (sí parar).
+    """
+    entradas = preparar_entradas(ruta_excel, debug)
+    df_tareas   = entradas["df_tareas"]
+    df_capac    = entradas["df_capac"]
+    df_calend   = entradas["df_calend"]
+    df_entregas = entradas["df_entregas"]
+    intervals, cap_int = entradas["intervals"], entradas["capacity_per_interval"]
+    job_dict, precedences = entradas["job_dict"], entradas["precedences"]
+    machine_cap = entradas["machine_capacity"]
+
+    if prechecks:
+        informe_viabilidad = comprobar_viabilidad(entradas["estructura"], df_entregas, intervals, cap_int)
+        validar_viabilidad(informe_viabilidad, prechecks)
+
+    reduccion = None
+    job_modelo, prec_modelo = job_dict, precedences
+    if contraer:
+        job_modelo, prec_modelo, reduccion = contraer_cadenas(job_dict, precedences)
+        informe = informe_reduccion(job_dict, precedences, job_modelo, prec_modelo, len(intervals))
+
+    if jerarquico:
+        from src.model.hierarchical import resolver_jerarquico
+
+        valores, metadatos = resolver_jerarquico(job_modelo, prec_modelo, machine_cap, intervals, cap_int,
+                                                 df_entregas, df_calend, tiempo_max, num_workers, procesos=jerarquico,
+                                                 tablas_duracion=reduccion["tablas_duracion"] if reduccion else None,
+                                                 parar=parar, debug=debug)
+        if valores is None:
+            print("⚠️ No se encontró solución factible u óptima")
+            return [], [], df_capac, None
+        sol_tareas, timeline, resumen_pedidos = extraer_solucion_desde_valores(
+            valores, intervals, cap_int, df_calend, df_entregas, reduccion, metadatos)
+        sol_tareas.contexto["df_tareas"] = df_tareas
+        return sol_tareas, timeline, df_capac, resumen_pedidos
+
+    model, all_vars = crear_modelo_cp(job_modelo,
+                                      prec_modelo,
                                       machine_cap,
                                       intervals,
                                       cap_int,
                                       df_entregas,
-                                      df_calend)
+                                      df_calend,
+                                      tablas_duracion=reduccion["tablas_duracion"] if reduccion else None)
+
+    parametros = None
+    if perfiles_solver:
+        from src.tuning.ajuste import perfil_para_instancia
+
+        parametros = perfil_para_instancia(perfiles_solver, sum(len(t) for t in job_modelo.values()))
+        print(f"🎛️ Perfil de CP-SAT: {parametros or 'por defecto'}")
+
+    modo_cache = None
+    if dir_cache:
+        cache = CacheSoluciones(dir_cache)
+        perfil = {"num_workers": num_workers, "contraer": contraer, "parametros": parametros, "lns": lns,
+                  "portfolio": portfolio}
+        if criterio_parada is not None and criterio_parada.activo():
+            # Una solución cortada por gap/estancamiento no vale como resultado de una resolución completa
+            perfil["parada"] = criterio_parada.perfil()
+        clave = clave_modelo(job_modelo, prec_modelo, machine_cap, intervals, cap_int, df_entregas, perfil=perfil)
+        modo_cache, guardada = cache.buscar(clave, tiempo_max)
+        if modo_cache == "hint":
+            aplicar_hint(model, guardada.valores)
+        print(f"🗄️ Caché de soluciones: {modo_cache or 'miss'} ({clave[:12]})")
+
+    args_diagnostico = (job_dict, precedences, machine_cap, intervals, cap_int, df_entregas, df_calend,
+                        tiempo_diagnostico)
+    informe_diagnostico = {}
+    hilo_diagnostico = None
+    parar_diagnostico = threading.Event()
+    if diagnostico == "paralelo" and modo_cache != "hit":
+        hilo_diagnostico = threading.Thread(
+            target=lambda: informe_diagnostico.update(
+                diagnosticar_inviabilidad(*args_diagnostico, parar=parar_diagnostico)), daemon=True)
+        hilo_diagnostico.start()
+
+    if telemetria is True:
+        from src.model.telemetry import TelemetriaSolver
 
-    solver, status = resolver_modelo(model, debug)
+        telemetria = TelemetriaSolver()
+
+    if modo_cache == "hit":
+        solver, status = guardada, guardada.status
+        motivo_parada = guardada.metadatos.get("motivo_parada")
+    else:
+        solver, status = resolver_modelo(model, debug, tiempo_max, num_workers,
+                                         observadores=observadores, parar=parar, portfolio=portfolio,
+                                         parametros=parametros, telemetria=telemetria or None,
+                                         criterio_parada=criterio_parada, lns=lns,
+                                         estructura_lns=EstructuraLNS(all_vars, df_entregas) if lns else None)
+        cancelado = parar is not None and parar.is_set()
+        hay_solucion = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        motivo_parada = (criterio_parada or CriterioParada()).motivo_final(
+            status, solver.ObjectiveValue() if hay_solucion else None,
+            solver.BestObjectiveBound() if hay_solucion else None, cancelado)
+        print(f"🛑 Motivo de parada: {motivo_parada}")
+        if hay_solucion or cancelado:
+            # El diagnóstico en paralelo ya no aporta nada
+            parar_diagnostico.set()
+        if status == cp_model.OPTIMAL and motivo_parada != "optimo":
+            # CP-SAT informa OPTIMAL al cortar por relative/absolute_gap_limit: la solución no está probada
+            status = cp_model.FEASIBLE
+            if isinstance(solver, SolucionVector):
+                solver.metadatos.update(estado=status.name, status=int(status))
+        if telemetria:
+            telemetria.resumen.update(motivo_parada=motivo_parada, estado=solver.StatusName(status))
+        if diagnostico and not cancelado and status in (cp_model.INFEASIBLE, cp_model.UNKNOWN):
+            if hilo_diagnostico is not None:
+                hilo_diagnostico.join()
+            else:
+                informe_diagnostico.update(diagnosticar_inviabilidad(*args_diagnostico))
+            imprimir_diagnostico(informe_diagnostico)
+        if dir_cache and hay_solucion and not cancelado:
+            vector = solver if isinstance(solver, SolucionVector) else SolucionVector.desde_solver(solver, status)
+            cache.guardar(clave, vector, tiempo_max, motivo_parada)
+
+    if contraer:
+        objetivo_red = objetivo_completo = None
+        if comparar_reduccion:
+            modelo_completo, _ = crear_modelo_cp(job_dict, precedences, machine_cap, intervals,
+                                                 cap_int, df_entregas, df_calend)
+            solver_completo, status_completo = resolver_modelo(modelo_completo, debug,
+                                                                tiempo_max, num_workers)
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) and \
+               status_completo in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                objetivo_red = solver.ObjectiveValue()
+                objetivo_completo = solver_completo.ObjectiveValue()
+        imprimir_informe_reduccion(informe, objetivo_red, objetivo_completo)
 
     sol_tareas, timeline, resumen_pedidos = extraer_solucion(
-        solver, status, all_vars, intervals, cap_int, df_calend, df_entregas
+        solver, status, all_vars, intervals, cap_int, df_calend, df_entregas, reduccion
     )
 
+    if sol_tareas:
+        sol_tareas.contexto["df_tareas"] = df_tareas
+        sol_tareas.metadatos["motivo_parada"] = motivo_parada
+        if telemetria and modo_cache != "hit":
+            sol_tareas.contexto["telemetria"] = telemetria
+        if dir_cache:
+            sol_tareas.metadatos["cache"] = modo_cache or "miss"
+        if isinstance(solver, SolucionVector) and "configuracion" in solver.metadatos:
+            sol_tareas.metadatos["configuracion"] = solver.metadatos["configuracion"]
+
     return sol_tareas, timeline, df_capac, resumen_pedidos
 
-def resolver_modelo(model, debug=False):
+class CallbackSolucion(cp_model.CpSolverSolutionCallback):
+    """
+    Notifica cada solución encontrada a una lista de observadores,
+    llamados como obs(progreso, callback) con
+    progreso = {"soluciones", "objetivo", "cota", "tiempo_s"}.
+    El observador puede cortar la búsqueda con callback.StopSearch().
+    """
+
+    def __init__(self, observadores=()):
+        super().__init__()
+        self.observadores = list(observadores)
+        self.soluciones = 0
+
+    def on_solution_callback(self):
+        self.soluciones += 1
+        progreso = {
+            "soluciones": self.soluciones,
+            "objetivo": self.ObjectiveValue(),
+            "cota": self.BestObjectiveBound(),
+            "tiempo_s": round(self.WallTime(), 3),
+        }
+        for observador in self.observadores:
+            observador(progreso, self)
+
+def _vigilar_parada(parar, solver, terminado):
+    """Corta la búsqueda en cuanto se activa el evento parar (hilo o proceso)."""
+    while not terminado.is_set():
+        if parar.wait(0.2):
+            solver.StopSearch()
+            return
+
+def resolver_modelo(model, debug=False, tiempo_max=TIEMPO_MAX_DEFECTO, num_workers=WORKERS_DEFECTO,
+                    observadores=None, parar=None, portfolio=None, parametros=None, telemetria=None,
+                    criterio_parada=None, lns=None, estructura_lns=None):
+    """
+    observadores: funciones obs(progreso, callback) llamadas en cada
+    solución (ver CallbackSolucion).
+    parar: threading/multiprocessing Event; al activarse se detiene la
+    búsqueda y se devuelve la mejor solución encontrada hasta entonces.
+    portfolio: si es > 1, lanza ese nº de procesos con semillas y
+    configuraciones distintas (num_workers hilos cada uno) y devuelve la
+    mejor como SolucionVector; ver portfolio.resolver_portfolio.
+    parametros: perfil de parámetros de CP-SAT (ver tuning.ajuste); no se
+    usa con portfolio, que lleva sus propias configuraciones.
+    telemetria: TelemetriaSolver (ver telemetry) que recibe cada solución y,
+    sin portfolio, el log de CP-SAT (cotas y resumen del presolve).
+    criterio_parada: CriterioParada (ver termination) con límites de gap,
+    estancamiento u objetivo aceptable; el motivo queda en
+    criterio_parada.motivo_final(...).
+    lns: nº de procesos del LNS propio por pedidos/ubicaciones/ventanas
+    (ver lns.resolver_lns); necesita estructura_lns (EstructuraLNS del
+    modelo). Como con portfolio, devuelve un SolucionVector.
+    """
+    if telemetria is not None:
+        observadores = list(observadores or ()) + [telemetria]
+    if criterio_parada is not None and criterio_parada.activo():
+        observadores = list(observadores or ()) + [criterio_parada]
+    else:
+        criterio_parada = None
+
+    if lns or (portfolio and portfolio > 1):
+        if criterio_parada is not None:
+            criterio_parada.iniciar()
+        try:
+            if lns:
+                solucion, status = resolver_lns(model, estructura_lns, lns, tiempo_max, num_workers,
+                                                observadores=observadores, parar=parar, debug=debug)
+            else:
+                from src.model.portfolio import resolver_portfolio
+
+                solucion, status = resolver_portfolio(model, portfolio, tiempo_max, num_workers,
+                                                      observadores=observadores, parar=parar, debug=debug)
+        finally:
+            if criterio_parada is not None:
+                criterio_parada.terminar()
+        if telemetria is not None:
+            telemetria.finalizar(solucion, status)
+        return solucion, status
+
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 1200
-    solver.parameters.num_search_workers = 8
+    solver.parameters.max_time_in_seconds = tiempo_max
+    solver.parameters.num_search_workers = num_workers
+    if parametros:
+        from src.tuning.ajuste import aplicar_perfil
+
+        aplicar_perfil(solver.parameters, parametros)
+    if telemetria is not None:
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = telemetria.linea_log
+    if criterio_parada is not None:
+        criterio_parada.aplicar_parametros(solver.parameters)
+        criterio_parada.iniciar(solver.StopSearch)
 
     if debug:
         print("🛠️ [DEBUG] Resolviendo modelo...")
-    
-    status = solver.Solve(model)
+
+    callback = CallbackSolucion(observadores) if observadores else None
+    terminado = threading.Event()
+    if parar is not None:
+        threading.Thread(target=_vigilar_parada, args=(parar, solver, terminado), daemon=True).start()
+    try:
+        status = solver.Solve(model, callback)
+    finally:
+        terminado.set()
+        if criterio_parada is not None:
+            criterio_parada.terminar()
+    if telemetria is not None:
+        telemetria.finalizar(solver, status)
 
     if debug:
         print("✅ Status:", solver.StatusName(status))
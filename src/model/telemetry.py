@@ -0,0 +1,226 @@
+# PATH: src/model/telemetry.py
+
+import os
+import re
+import csv
+import json
+import threading
+from datetime import datetime
+
+from ortools.sat.python import cp_model
+
+# Líneas de progreso del log de CP-SAT, p.ej.
+#   "#3       3.73s best:4305  next:[4260,4304] default_lp"
+#   "#Bound   2.72s best:inf   next:[4260,135841350] default_lp"
+RE_EVENTO_LOG = re.compile(r"^#(\d+|Bound|Done|Model)\s+([\d.]+)s\s+(?:best:(\S+)\s+next:\[([^,\]]*),?([^\]]*)\]\s*(.*))?")
+RE_INICIO_BUSQUEDA = re.compile(r"^Starting search at ([\d.]+)s")
+
+def _numero(texto):
+    try:
+        valor = float(texto)
+    except (TypeError, ValueError):
+        return None
+    return valor if valor not in (float("inf"), float("-inf")) else None
+
+def gap_relativo(objetivo, cota):
+    if objetivo is None or cota is None:
+        return None
+    return abs(objetivo - cota) / max(abs(objetivo), 1.0)
+
+class TelemetriaSolver:
+    """
+    Telemetría continua de una resolución. Se engancha a resolver_modelo
+    como observador (una fila por solución: objetivo, cota, gap) y como
+    log_callback de CP-SAT (mejoras de cota sin solución nueva, resumen del
+    presolve y tiempo hasta empezar la búsqueda). Es segura entre hilos:
+    CP-SAT llama al callback y al log desde sus workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.serie = []          # {t_s, origen (solucion/cota/final), objetivo, cota, gap, soluciones, subsolver}
+        self.log = []
+        self.resumen = {}
+        self._seccion = None
+        self.presolve = {"modelo_inicial": [], "reglas": [], "modelo_presolve": []}
+
+    # ── entradas ─────────────────────────────────────────────────────────────
+    def __call__(self, progreso, _callback=None):
+        """Observador de CallbackSolucion (o del portfolio)."""
+        with self._lock:
+            self.serie.append({
+                "t_s": progreso["tiempo_s"],
+                "origen": "solucion",
+                "objetivo": progreso["objetivo"],
+                "cota": progreso["cota"],
+                "gap": gap_relativo(progreso["objetivo"], progreso["cota"]),
+                "soluciones": progreso["soluciones"],
+                "subsolver": progreso.get("configuracion"),
+            })
+
+    def linea_log(self, mensaje):
+        """log_callback de CP-SAT (un mensaje puede traer un bloque de varias líneas)."""
+        with self._lock:
+            for linea in mensaje.splitlines():
+                self.log.append(linea)
+                self._clasificar(linea)
+
+    def _clasificar(self, linea):
+        texto = linea.strip()
+        if texto.startswith("Initial optimization model"):
+            self._seccion = "modelo_inicial"
+        elif texto.startswith("Presolve summary"):
+            self._seccion = "reglas"
+        elif texto.startswith("Presolved optimization model"):
+            self._seccion = "modelo_presolve"
+        elif texto.startswith(("Starting presolve", "Preloading model")) or (not texto and self._seccion == "reglas"):
+            self._seccion = None
+        elif self._seccion and texto and (texto.startswith("#") or self._seccion == "reglas"):
+            self.presolve[self._seccion].append(texto.lstrip("- "))
+            return
+
+        inicio = RE_INICIO_BUSQUEDA.match(texto)
+        if inicio:
+            self.resumen["t_inicio_busqueda_s"] = float(inicio.group(1))
+            return
+        evento = RE_EVENTO_LOG.match(texto)
+        if not evento or evento.group(1) in ("Done", "Model") or evento.group(3) is None:
+            return
+        # Las soluciones ya llegan por el observador; del log sólo interesan las mejoras de cota
+        if evento.group(1) == "Bound":
+            objetivo = _numero(evento.group(3))
+            cota = _numero(evento.group(4))
+            self.serie.append({
+                "t_s": float(evento.group(2)),
+                "origen": "cota",
+                "objetivo": objetivo,
+                "cota": cota,
+                "gap": gap_relativo(objetivo, cota),
+                "soluciones": None,
+                "subsolver": evento.group(6) or None,
+            })
+
+    def finalizar(self, solver, status):
+        """
+        Estadísticas finales (llamar tras Solve). Admite un CpSolver o el
+        SolucionVector del portfolio, que no tiene SolutionInfo ni ResponseStats.
+        """
+        with self._lock:
+            self.resumen.update({
+                "estado": solver.StatusName(status),
+                "tiempo_s": round(solver.WallTime(), 3),
+                "ramas": solver.NumBranches(),
+                "conflictos": solver.NumConflicts(),
+            })
+            # Fila final con el objetivo y la cota definitivos: el log no da la
+            # última cota (p.ej. la que cierra el gap al probar el óptimo)
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                objetivo, cota = solver.ObjectiveValue(), solver.BestObjectiveBound()
+                self.serie.append({
+                    "t_s": round(solver.WallTime(), 3),
+                    "origen": "final",
+                    "objetivo": objetivo,
+                    "cota": cota,
+                    "gap": gap_relativo(objetivo, cota),
+                    "soluciones": None,
+                    "subsolver": None,
+                })
+            if hasattr(solver, "SolutionInfo"):
+                self.resumen["solution_info"] = solver.SolutionInfo()
+                self.resumen["estadisticas"] = solver.ResponseStats()
+
+    # ── análisis ─────────────────────────────────────────────────────────────
+    def serie_ordenada(self):
+        with self._lock:
+            filas = sorted(self.serie, key=lambda f: f["t_s"])
+        # Objetivo y cota "vigentes" en cada instante (mejor hasta entonces)
+        mejor_obj = mejor_cota = None
+        for fila in filas:
+            if fila["objetivo"] is not None:
+                mejor_obj = fila["objetivo"] if mejor_obj is None else min(mejor_obj, fila["objetivo"])
+            if fila["cota"] is not None:
+                mejor_cota = fila["cota"] if mejor_cota is None else max(mejor_cota, fila["cota"])
+            fila["objetivo_vigente"] = mejor_obj
+            fila["cota_vigente"] = mejor_cota
+            fila["gap_vigente"] = gap_relativo(mejor_obj, mejor_cota)
+        return filas
+
+    def calibracion(self, umbrales_gap=(0.10, 0.05, 0.01)):
+        """
+        Resumen para calibrar el límite de tiempo: cuándo llegó la primera
+        solución, la última mejora del objetivo y cada umbral de gap.
+        """
+        filas = self.serie_ordenada()
+        soluciones = [f for f in filas if f["origen"] == "solucion"]
+        resultado = {
+            "t_primera_solucion_s": soluciones[0]["t_s"] if soluciones else None,
+            "t_ultima_mejora_s": None,
+            "objetivo_final": filas[-1]["objetivo_vigente"] if filas else None,
+            "cota_final": filas[-1]["cota_vigente"] if filas else None,
+        }
+        anterior = None
+        for f in soluciones:
+            if anterior is None or f["objetivo"] < anterior:
+                resultado["t_ultima_mejora_s"] = f["t_s"]
+                anterior = f["objetivo"]
+        for umbral in umbrales_gap:
+            clave = f"t_gap_{umbral:g}_s"
+            resultado[clave] = next((f["t_s"] for f in filas
+                                     if f["gap_vigente"] is not None and f["gap_vigente"] <= umbral), None)
+        tiempo = self.resumen.get("tiempo_s")
+        if tiempo and resultado["t_ultima_mejora_s"] is not None:
+            resultado["fraccion_tiempo_sin_mejora"] = round(1 - resultado["t_ultima_mejora_s"] / tiempo, 3)
+        return resultado
+
+    # ── salida ───────────────────────────────────────────────────────────────
+    def guardar(self, output_dir, sufijo=None, grafico=True):
+        """
+        Escribe telemetria_<sufijo>.csv (serie), telemetria_<sufijo>.json
+        (serie, presolve, calibración y estadísticas) y, si grafico,
+        convergencia_<sufijo>.html. Devuelve {"csv", "json", "html"}.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        sufijo = sufijo or datetime.now().strftime("%Y%m%d_%H%M%S")
+        filas = self.serie_ordenada()
+        columnas = ["t_s", "origen", "objetivo", "cota", "gap", "soluciones", "subsolver",
+                    "objetivo_vigente", "cota_vigente", "gap_vigente"]
+
+        ruta_csv = os.path.join(output_dir, f"telemetria_{sufijo}.csv")
+        with open(ruta_csv, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=columnas)
+            escritor.writeheader()
+            escritor.writerows(filas)
+
+        ruta_json = os.path.join(output_dir, f"telemetria_{sufijo}.json")
+        with open(ruta_json, "w", encoding="utf-8") as f:
+            json.dump({"resumen": self.resumen, "calibracion": self.calibracion(),
+                       "presolve": self.presolve, "serie": filas}, f, ensure_ascii=False, indent=2)
+
+        ruta_html = None
+        if grafico and filas:
+            ruta_html = os.path.join(output_dir, f"convergencia_{sufijo}.html")
+            exportar_grafico_convergencia(filas, ruta_html, self.calibracion())
+        return {"csv": ruta_csv, "json": ruta_json, "html": ruta_html}
+
+def exportar_grafico_convergencia(filas, ruta_html, calibracion=None):
+    """Objetivo y cota vigentes frente al tiempo (escalonado), con el gap en un eje secundario."""
+    import plotly.graph_objects as go
+
+    t = [f["t_s"] for f in filas]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=t, y=[f["objetivo_vigente"] for f in filas], name="Objetivo (incumbente)",
+                             mode="lines+markers", line_shape="hv"))
+    fig.add_trace(go.Scatter(x=t, y=[f["cota_vigente"] for f in filas], name="Mejor cota",
+                             mode="lines", line_shape="hv", line={"dash": "dash"}))
+    fig.add_trace(go.Scatter(x=t, y=[f["gap_vigente"] for f in filas], name="Gap relativo",
+                             mode="lines", line_shape="hv", yaxis="y2", opacity=0.5))
+    if calibracion and calibracion.get("t_ultima_mejora_s") is not None:
+        fig.add_vline(x=calibracion["t_ultima_mejora_s"], line_dash="dot",
+                      annotation_text=f"última mejora {calibracion['t_ultima_mejora_s']} s")
+    fig.update_layout(title="Convergencia de CP-SAT", xaxis_title="Tiempo (s)", yaxis_title="Objetivo",
+                      yaxis2={"title": "Gap", "overlaying": "y", "side": "right", "tickformat": ".0%",
+                              "rangemode": "tozero"},
+                      legend={"orientation": "h", "y": -0.2})
+    fig.write_html(ruta_html, include_plotlyjs=True, full_html=True, auto_open=False,
+                   config={"displaylogo": False})
+    return ruta_html
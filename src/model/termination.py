@@ -0,0 +1,119 @@
+# PATH: src/model/termination.py
+
+import time
+import threading
+
+from ortools.sat.python import cp_model
+
+from src.model.telemetry import gap_relativo
+
+# Motivos de parada que quedan en metadatos["motivo_parada"]
+MOTIVOS_PARADA = ("optimo", "inviable", "gap", "objetivo", "estancamiento", "cancelado", "tiempo")
+
+class CriterioParada:
+    """
+    Políticas de terminación anticipada combinables, como observador de
+    resolver_modelo (obs(progreso, callback)):
+
+    gap_relativo / gap_absoluto: para cuando |objetivo - cota| queda por
+    debajo (relativo a max(|objetivo|, 1) en el primer caso).
+    estancamiento_s: para si pasan tantos segundos sin mejorar el
+    incumbente (cuenta desde la primera solución; un hilo vigila el reloj
+    porque sin soluciones nuevas no hay callbacks).
+    objetivo: para en cuanto se alcanza un objetivo "suficientemente bueno".
+
+    La primera regla que se cumple detiene la búsqueda con StopSearch y
+    queda en self.motivo; ver motivo_final para el caso general.
+    """
+
+    def __init__(self, gap_relativo=None, gap_absoluto=None, estancamiento_s=None, objetivo=None):
+        self.gap_relativo = gap_relativo
+        self.gap_absoluto = gap_absoluto
+        self.estancamiento_s = estancamiento_s
+        self.objetivo = objetivo
+        self.motivo = None
+        self._lock = threading.Lock()
+        self._mejor = None
+        self._t_mejora = None
+        self._detener = None
+        self._terminado = threading.Event()
+
+    def activo(self):
+        return any(v is not None for v in (self.gap_relativo, self.gap_absoluto, self.estancamiento_s, self.objetivo))
+
+    def perfil(self):
+        """Parámetros de la política (para la clave de la caché de soluciones)."""
+        return {"gap_relativo": self.gap_relativo, "gap_absoluto": self.gap_absoluto,
+                "estancamiento_s": self.estancamiento_s, "objetivo": self.objetivo}
+
+    def aplicar_parametros(self, parametros):
+        """
+        Traslada los límites de gap a CP-SAT: así también cortan cuando sólo
+        mejora la cota, que no genera callback de solución.
+        """
+        if self.gap_relativo is not None:
+            parametros.relative_gap_limit = self.gap_relativo
+        if self.gap_absoluto is not None:
+            parametros.absolute_gap_limit = self.gap_absoluto
+
+    # ── observador ───────────────────────────────────────────────────────────
+    def __call__(self, progreso, callback):
+        objetivo, cota = progreso["objetivo"], progreso["cota"]
+        with self._lock:
+            if self._detener is None:
+                self._detener = callback.StopSearch
+            if self._mejor is None or objetivo < self._mejor:
+                self._mejor, self._t_mejora = objetivo, time.monotonic()
+            if self.motivo is not None:
+                return
+            if self.objetivo is not None and objetivo <= self.objetivo:
+                self.motivo = "objetivo"
+            elif self.gap_absoluto is not None and abs(objetivo - cota) <= self.gap_absoluto:
+                self.motivo = "gap"
+            elif self.gap_relativo is not None and gap_relativo(objetivo, cota) <= self.gap_relativo:
+                self.motivo = "gap"
+            else:
+                return
+        callback.StopSearch()
+
+    # ── vigilancia del estancamiento ─────────────────────────────────────────
+    def iniciar(self, detener=None):
+        """
+        Arranca el hilo del estancamiento (si procede). detener: función que
+        corta la búsqueda (p.ej. solver.StopSearch); sin ella se usa el
+        StopSearch del último callback recibido.
+        """
+        self.motivo = self._mejor = self._t_mejora = None
+        self._detener = detener
+        self._terminado.clear()
+        if self.estancamiento_s is not None:
+            threading.Thread(target=self._vigilar, daemon=True).start()
+
+    def terminar(self):
+        self._terminado.set()
+
+    def _vigilar(self):
+        while not self._terminado.wait(0.2):
+            with self._lock:
+                if self.motivo is not None:
+                    return
+                if self._t_mejora is None or time.monotonic() - self._t_mejora < self.estancamiento_s:
+                    continue
+                self.motivo = "estancamiento"
+                detener = self._detener
+            if detener is not None:
+                detener()
+            return
+
+    def motivo_final(self, status, objetivo=None, cota=None, cancelado=False):
+        """Motivo de parada de una resolución ya terminada (uno de MOTIVOS_PARADA)."""
+        if cancelado:
+            return "cancelado"
+        if status == cp_model.INFEASIBLE:
+            return "inviable"
+        # CP-SAT también informa OPTIMAL al cortar por relative/absolute_gap_limit
+        if status == cp_model.OPTIMAL and (objetivo is None or cota is None or objetivo <= cota):
+            return "optimo"
+        if self.motivo is not None:
+            return self.motivo
+        return "gap" if status == cp_model.OPTIMAL else "tiempo"
@@ -1,5 +1,6 @@
 # PATH: src/model/time_management.py
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
@@ -97,6 +98,39 @@ def descomprimir_tiempo(t, df_calend, modo="ini"):
     print(f"⚠️ [WARNING] Tiempo {t} fuera del calendario definido. No se puede descomprimir.")
     return None
 
+def descomprimir_tiempos(t, intervals, modo="ini"):
+    """
+    Versión vectorizada de descomprimir_tiempo sobre los 'intervals' de
+    comprimir_calendario: convierte un array de minutos acumulados en un
+    array datetime64. Los tiempos fuera del calendario quedan como NaT.
+    """
+    t = np.asarray(t, dtype=np.int64)
+    if not intervals:
+        return np.full(t.shape, np.datetime64("NaT"), dtype="datetime64[ns]")
+
+    comp_start = np.array([seg["comp_start"] for seg in intervals], dtype=np.int64)
+    comp_end   = np.array([seg["comp_end"] for seg in intervals], dtype=np.int64)
+    dt_inicio  = np.array([seg["dt_inicio"] for seg in intervals], dtype="datetime64[ns]")
+
+    if modo == "ini":
+        # comp_start <= t < comp_end
+        idx = np.searchsorted(comp_end, t, side="right")
+        idx_c = np.minimum(idx, len(intervals) - 1)
+        valido = (idx < len(intervals)) & (comp_start[idx_c] <= t)
+    else:
+        # comp_start < t <= comp_end
+        idx = np.searchsorted(comp_end, t, side="left")
+        idx_c = np.minimum(idx, len(intervals) - 1)
+        valido = (idx < len(intervals)) & (comp_start[idx_c] < t)
+
+    res = dt_inicio[idx_c] + (t - comp_start[idx_c]).astype("timedelta64[m]")
+    res[~valido] = np.datetime64("NaT")
+
+    n_fuera = int((~valido).sum())
+    if n_fuera:
+        print(f"⚠️ [WARNING] {n_fuera} tiempos fuera del calendario definido. No se pueden descomprimir.")
+    return res
+
 def comprimir_tiempo(dt, df_calend):
     """
     Convierte una fecha/hora dt a un número de minutos acumulados en df_calend.
@@ -154,70 +188,92 @@ def comprimir_tiempo(dt, df_calend):
     # Si dt es posterior al último turno
     return turnos[-1][3]
 
+def comprimir_tiempos(fechas, intervals):
+    """
+    Versión vectorizada de comprimir_tiempo sobre los 'intervals' de
+    comprimir_calendario: antes del primer turno => 0, dentro de un turno
+    => minutos acumulados, entre turnos => inicio del siguiente, después
+    del último => total. Las fechas NaT devuelven -1.
+    """
+    ts = pd.to_datetime(pd.Series(fechas)).to_numpy(dtype="datetime64[ns]")
+    if not intervals:
+        return np.zeros(len(ts), dtype=np.int64)
+
+    dt_inicio  = np.array([seg["dt_inicio"] for seg in intervals], dtype="datetime64[ns]")
+    dt_fin     = np.array([seg["dt_fin"] for seg in intervals], dtype="datetime64[ns]")
+    comp_start = np.array([seg["comp_start"] for seg in intervals], dtype=np.int64)
+    total = intervals[-1]["comp_end"]
+
+    idx = np.searchsorted(dt_fin, ts, side="right")         # primer turno que acaba después de ts
+    idx_c = np.minimum(idx, len(intervals) - 1)
+    minutos = (ts - dt_inicio[idx_c]) / np.timedelta64(1, "m")
+    dentro = (idx < len(intervals)) & (ts >= dt_inicio[idx_c])
+
+    res = np.where(idx >= len(intervals), total, comp_start[idx_c])
+    res = np.where(dentro, np.round(comp_start[idx_c] + minutos), res).astype(np.int64)
+    res[np.isnat(ts)] = -1
+    return res
+
 def construir_timeline_detallado(tareas, intervals, capacity_per_interval):
     """
     Devuelve una lista de diccionarios, cada uno con:
       t_ini, t_fin, ocupacion, operarios_turno, %ocup
     contemplando cambios simultáneos en ocupación y límites de turnos.
     """
+    start = [t["start"] for t in tareas]
+    end   = [t["end"] for t in tareas]
+    x_op  = [t["x_op"] for t in tareas]
+    df = construir_timeline_columnar(start, end, x_op, intervals, capacity_per_interval)
+    return df.to_dict("records")
 
-    def turno_idx_de_tiempo(t):
-        for i, seg in enumerate(intervals):
-            if seg["comp_start"] <= t < seg["comp_end"]:
-                return i
-        return -1
-
-    # 1) Generar eventos: +x_op en start, -x_op en end
-    eventos = []
-    for tarea in tareas:
-        xop = tarea["x_op"]
-        if xop > 0:
-            eventos.append((tarea["start"], +xop))
-            eventos.append((tarea["end"],   -xop))
-
-    # Añadimos los límites de turnos con delta_op=0
-    for i, seg in enumerate(intervals):
-        eventos.append((seg["comp_start"], 0))
-        eventos.append((seg["comp_end"],   0))
-
-    # 2) Ordenar eventos: por tiempo, si empatan, primero entradas (+), luego salidas (-)
-    eventos.sort(key=lambda e: (e[0], -e[1]))
-
-    # 3) Recorremos para crear tramos [ti, ti+1) con su ocupación
-    timeline = []
-    ocupacion_actual = 0
-
-    for i in range(len(eventos) - 1):
-        t0, delta_op = eventos[i]
-        ocupacion_actual += delta_op
-        t1 = eventos[i + 1][0]
-
-        if t1 > t0:
-            t_ini_segmento = t0
-            while t_ini_segmento < t1:
-                idx_turno = turno_idx_de_tiempo(t_ini_segmento)
-                if idx_turno == -1:
-                    break  # fuera de todos los turnos
-
-                fin_turno = intervals[idx_turno]["comp_end"]
-                t_fin_segmento = min(fin_turno, t1)
-                cap_turno = capacity_per_interval[idx_turno]
-
-                porc_ocup = 0
-                if cap_turno > 0:
-                    porc_ocup = round(100 * ocupacion_actual / cap_turno, 2)
-
-                timeline.append({
-                    "t_ini": t_ini_segmento,
-                    "t_fin": t_fin_segmento,
-                    "ocupacion": ocupacion_actual,
-                    "operarios_turno": cap_turno,
-                    "%ocup": porc_ocup
-                })
-
-                t_ini_segmento = t_fin_segmento
-
-    return timeline
+def construir_timeline_columnar(start, end, x_op, intervals, capacity_per_interval):
+    """
+    Versión columnar de construir_timeline_detallado. Los tramos van de un
+    instante de cambio al siguiente (inicios/fines de tareas y límites de
+    turno); la ocupación de cada tramo es la suma acumulada de los deltas
+    (+x_op al inicio, -x_op al fin) hasta su inicio. Los tramos fuera de
+    todos los turnos se descartan. Devuelve un DataFrame.
+    """
+    start = np.asarray(start, dtype=np.int64)
+    end   = np.asarray(end, dtype=np.int64)
+    x_op  = np.asarray(x_op, dtype=np.int64)
+    columnas = ["t_ini", "t_fin", "ocupacion", "operarios_turno", "%ocup"]
+
+    con_op = x_op > 0
+    comp_start = np.array([seg["comp_start"] for seg in intervals], dtype=np.int64)
+    comp_end   = np.array([seg["comp_end"] for seg in intervals], dtype=np.int64)
+    cap        = np.asarray(capacity_per_interval, dtype=np.int64)
+
+    tiempos = np.concatenate([start[con_op], end[con_op], comp_start, comp_end])
+    deltas  = np.concatenate([x_op[con_op], -x_op[con_op],
+                              np.zeros(2 * len(comp_start), dtype=np.int64)])
+    if len(tiempos) < 2:
+        return pd.DataFrame(columns=columnas)
+
+    puntos, inversa = np.unique(tiempos, return_inverse=True)
+    ocupacion = np.cumsum(np.bincount(inversa, weights=deltas, minlength=len(puntos))).astype(np.int64)
+
+    t_ini = puntos[:-1]
+    t_fin = puntos[1:]
+    ocupacion = ocupacion[:-1]
+
+    # Turno que contiene cada t_ini (comp_start <= t < comp_end)
+    idx = np.searchsorted(comp_end, t_ini, side="right")
+    idx_c = np.minimum(idx, max(len(comp_end) - 1, 0))
+    dentro = (idx < len(comp_end)) & (comp_start[idx_c] <= t_ini) if len(comp_end) else np.zeros(len(t_ini), bool)
+
+    t_ini, t_fin, ocupacion, idx_c = t_ini[dentro], t_fin[dentro], ocupacion[dentro], idx_c[dentro]
+    cap_turno = cap[idx_c]
+    porc = [round(100 * o / c, 2) if c > 0 else 0
+            for o, c in zip(ocupacion.tolist(), cap_turno.tolist())]
+
+    return pd.DataFrame({
+        "t_ini": t_ini,
+        "t_fin": t_fin,
+        "ocupacion": ocupacion,
+        "operarios_turno": cap_turno,
+        "%ocup": porc,
+    }, columns=columnas)
 
 def calcular_dias_laborables(ts_inicio, ts_fin, df_calend):
     """
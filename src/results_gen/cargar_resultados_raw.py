@@ -0,0 +1,84 @@
+# PATH: src/results_gen/cargar_resultados_raw.py
+
+import os
+import json
+
+from src.results_gen.guardar_resultados_raw import FORMATO_RAW, VERSION_RAW, MANIFIESTO, guardar_columnar
+
+class ResultadosRaw:
+    """
+    Acceso perezoso a una carpeta de resultados columnar: al abrirla sólo se
+    lee el manifiesto; cada tabla se lee bajo demanda y sólo con las
+    columnas pedidas (Parquet con memory-map).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(os.path.join(ruta, MANIFIESTO), encoding="utf-8") as f:
+            self.manifiesto = json.load(f)
+
+        if self.manifiesto.get("formato") != FORMATO_RAW:
+            raise ValueError(f"❌ {ruta} no es una carpeta de resultados '{FORMATO_RAW}'")
+        if self.manifiesto.get("version", 0) > VERSION_RAW:
+            raise ValueError(f"❌ Versión de formato {self.manifiesto['version']} no soportada "
+                             f"(máxima: {VERSION_RAW}). Actualiza el planificador.")
+
+    @property
+    def metricas(self):
+        return self.manifiesto.get("metricas", {})
+
+    @property
+    def solver(self):
+        return self.manifiesto.get("solver", {})
+
+    def tablas(self):
+        return list(self.manifiesto.get("tablas", {}))
+
+    def num_filas(self, nombre):
+        return self.manifiesto["tablas"][nombre]["filas"]
+
+    def tabla_arrow(self, nombre, columnas=None):
+        import pyarrow.parquet as pq
+
+        info = self.manifiesto["tablas"].get(nombre)
+        if info is None:
+            raise KeyError(f"La tabla '{nombre}' no existe en {self.ruta}")
+        if columnas is not None:
+            columnas = [c for c in columnas if c in info["columnas"]]
+        return pq.read_table(os.path.join(self.ruta, info["archivo"]),
+                             columns=columnas, memory_map=True)
+
+    def tabla(self, nombre, columnas=None):
+        """DataFrame de la tabla (sólo con las columnas indicadas)."""
+        return self.tabla_arrow(nombre, columnas).to_pandas()
+
+    def registros(self, nombre, columnas=None):
+        """Lista de dicts, el formato que esperan Gantt y consola."""
+        df = self.tabla(nombre, columnas)
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def cargar_resultados_raw(ruta):
+    """Abre una carpeta de resultados columnar (o su manifest.json)."""
+    if os.path.basename(ruta) == MANIFIESTO:
+        ruta = os.path.dirname(ruta)
+    return ResultadosRaw(ruta)
+
+def convertir_pickle_a_columnar(ruta_pkl, destino=None):
+    """
+    Convierte un .pkl de guardar_resultados_raw (formato antiguo) en una
+    carpeta columnar junto a él. Devuelve la ruta de la carpeta.
+    """
+    import pickle
+
+    with open(ruta_pkl, "rb") as f:
+        datos = pickle.load(f)
+
+    destino = destino or os.path.splitext(ruta_pkl)[0]
+    guardar_columnar(destino,
+                     datos.get("capacidades"),
+                     datos.get("tareas", []),
+                     datos.get("timeline", []),
+                     datos.get("resumen_pedidos"),
+                     origen=ruta_pkl)
+    print(f"✅ {ruta_pkl} convertido a {destino}")
+    return destino
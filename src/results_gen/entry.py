@@ -1,10 +1,53 @@
 # PATH: src/results_gen/entry.py
 
-from src.results_gen.exportar_resultados_excel import exportar_resultados_excel
-from src.results_gen.generar_diagrama_gantt import generar_diagrama_gantt
-from src.results_gen.imprimir_resultados_consola import imprimir_resultados_consola
-from src.results_gen.guardar_resultados_raw import guardar_resultados_raw 
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
+# Los sinks (pandas, xlsxwriter, plotly, pyarrow...) se importan dentro de
+# mostrar_resultados: importar este módulo no carga ninguna dependencia pesada.
+
+
+def _ejecutar_sink(nombre, funcion, tiempos, *args, **kwargs):
+    """
+    Ejecuta un sink de salida aislando sus errores: un fallo se informa y se
+    registra en tiempos, pero no interrumpe al resto. Devuelve el resultado o None.
+    """
+    t0 = time.perf_counter()
+    try:
+        resultado = funcion(*args, **kwargs)
+        tiempos[nombre] = (time.perf_counter() - t0, None)
+        return resultado
+    except Exception as e:
+        tiempos[nombre] = (time.perf_counter() - t0, e)
+        print(f"\n❌ Error en la salida '{nombre}': {e}")
+        traceback.print_exc()
+        return None
+
+def _imprimir_tiempos_sinks(tiempos, total):
+    print("\n⏱️ Etapa de salida:")
+    for nombre, (segundos, error) in tiempos.items():
+        estado = "ERROR" if error is not None else "ok"
+        print(f"   {nombre:<12} {segundos:8.2f} s  {estado}")
+    print(f"   {'total':<12} {total:8.2f} s")
+
+def _construir_acciones(tareas, df_capac):
+    from src.results_gen.generar_acciones import construir_acciones
+
+    contexto = getattr(tareas, "contexto", {})
+    if "df_tareas" not in contexto or "intervals" not in contexto:
+        print("⚠️ Sin datos de TAREAS/calendario en la solución: no se genera la hoja Acciones.")
+        return None
+    return construir_acciones(tareas, df_capac, contexto["df_tareas"],
+                              contexto["intervals"], contexto["capacity_per_interval"])
+
+def _guardar_telemetria(tareas, output_dir):
+    telemetria = getattr(tareas, "contexto", {}).get("telemetria")
+    rutas = telemetria.guardar(output_dir)
+    calibracion = telemetria.calibracion()
+    print(f"\n📈 Telemetría: {rutas['csv']} | última mejora a los {calibracion['t_ultima_mejora_s']} s "
+          f"de {telemetria.resumen.get('tiempo_s')} s")
+    return rutas
 
 def mostrar_resultados( ruta_archivo_base,
                         df_capac,
@@ -15,16 +58,91 @@ def mostrar_resultados( ruta_archivo_base,
                         exportar=False,
                         output_dir=None,
                         generar_gantt=False,
-                        guardar_raw=False):
-    if imprimir:
-        imprimir_resultados_consola(tareas, timeline)
+                        guardar_raw=False,
+                        guardar_historial=False,
+                        ruta_historial=None,
+                        gantt_html=False,
+                        generar_acciones=False,
+                        formatos_exportacion=("xlsx",)):
+    """
+    Las salidas habilitadas (Excel, raw, Gantt HTML y Acciones) solo leen la
+    solución, así que se ejecutan en paralelo en un pool de hilos; el Excel
+    espera únicamente a las Acciones. Cada salida está aislada: si una falla
+    las demás continúan. Al final se imprime el tiempo de cada una.
+    Devuelve un dict con las rutas generadas (excel, raw, gantt_html,
+    historial, telemetria).
+
+    formatos_exportacion: "xlsx", "parquet" y/o "csv" (ver exportar_resultados_excel).
+    generar_acciones: añade la hoja Acciones (log de inicios/finales con
+    ocupación por ubicación y operarios libres del turno) al Excel exportado.
+    gantt_html: exporta el Gantt como HTML autocontenido en output_dir, sin
+    abrir navegador.
+    guardar_historial: registra el run (métricas, tareas y KPIs por pedido)
+    en la base SQLite de historial (por defecto output_dir/historial_runs.sqlite).
+    Si la solución trae telemetría (planificar_linea_produccion con
+    telemetria=True) se guardan su CSV/JSON y la curva de convergencia en
+    output_dir.
+    """
+    from src.results_gen.exportar_resultados_excel import exportar_resultados_excel
+    from src.results_gen.generar_diagrama_gantt import generar_diagrama_gantt, exportar_gantt_html
+    from src.results_gen.imprimir_resultados_consola import imprimir_resultados_consola
+    from src.results_gen.guardar_resultados_raw import guardar_resultados_raw
+    from src.results_gen.historial_runs import registrar_run, ruta_historial_defecto
+
+    t0 = time.perf_counter()
+    tiempos = {}
+    exportar = exportar and output_dir
+    guardar_raw = guardar_raw and output_dir
+    gantt_html = gantt_html and output_dir and tareas
+    generar_acciones = generar_acciones and tareas
+    telemetria = output_dir and "telemetria" in getattr(tareas, "contexto", {})
+
+    n_sinks = sum(map(bool, (gantt_html, guardar_raw, generar_acciones, exportar, telemetria)))
+    with ThreadPoolExecutor(max_workers=max(1, n_sinks), thread_name_prefix="salida") as pool:
+        fut_gantt = fut_raw = fut_acciones = fut_excel = fut_telemetria = None
+
+        if gantt_html:
+            fut_gantt = pool.submit(_ejecutar_sink, "gantt_html", exportar_gantt_html, tiempos,
+                                    tareas, timeline, df_capac, resumen_pedidos, output_dir)
+        if guardar_raw:
+            fut_raw = pool.submit(_ejecutar_sink, "raw", guardar_resultados_raw, tiempos,
+                                  df_capac, tareas, timeline, resumen_pedidos, output_dir, ruta_archivo_base)
+        if generar_acciones:
+            fut_acciones = pool.submit(_ejecutar_sink, "acciones", _construir_acciones, tiempos,
+                                       tareas, df_capac)
+        if telemetria:
+            fut_telemetria = pool.submit(_ejecutar_sink, "telemetria", _guardar_telemetria, tiempos,
+                                         tareas, output_dir)
+        if exportar:
+            # Un hilo por sink: esperar a las Acciones dentro del pool no puede bloquearlo.
+            def _excel():
+                acciones = fut_acciones.result() if fut_acciones is not None else None
+                return exportar_resultados_excel(df_capac, tareas, timeline, resumen_pedidos, output_dir,
+                                                 open_file_location=False, acciones=acciones,
+                                                 formatos=formatos_exportacion)
+            fut_excel = pool.submit(_ejecutar_sink, "excel", _excel, tiempos)
+
+        # Consola y Gantt interactivo se quedan en el hilo principal.
+        if imprimir:
+            _ejecutar_sink("consola", imprimir_resultados_consola, tiempos, tareas, timeline)
+        if generar_gantt:
+            _ejecutar_sink("gantt", generar_diagrama_gantt, tiempos, tareas, timeline, df_capac)
 
-    if exportar and output_dir:
-        exportar_resultados_excel(df_capac, tareas, timeline, resumen_pedidos, output_dir, open_file_location=False)
+        ruta_excel = fut_excel.result() if fut_excel is not None else None
+        ruta_raw = fut_raw.result() if fut_raw is not None else None
+        ruta_gantt = fut_gantt.result() if fut_gantt is not None else None
+        rutas_telemetria = fut_telemetria.result() if fut_telemetria is not None else None
 
-    if generar_gantt:
-        generar_diagrama_gantt(tareas, timeline, df_capac)
+    if guardar_historial and tareas and (ruta_historial or output_dir):
+        ruta_historial = ruta_historial or ruta_historial_defecto(output_dir)
+        run_id = _ejecutar_sink("historial", registrar_run, tiempos,
+                                ruta_historial, ruta_archivo_base, tareas, resumen_pedidos,
+                                ruta_excel=ruta_excel, ruta_raw=ruta_raw)
+        if run_id is not None:
+            print(f"\n🗃️ Run {run_id} registrado en el historial: {ruta_historial}")
 
-    if guardar_raw and output_dir:
-        guardar_resultados_raw(df_capac, tareas, timeline, resumen_pedidos, output_dir, ruta_archivo_base)
+    if tiempos:
+        _imprimir_tiempos_sinks(tiempos, time.perf_counter() - t0)
 
+    return {"excel": ruta_excel, "raw": ruta_raw, "gantt_html": ruta_gantt,
+            "historial": ruta_historial if guardar_historial else None, "telemetria": rutas_telemetria}
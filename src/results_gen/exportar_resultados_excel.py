@@ -6,38 +6,127 @@ from datetime import datetime
 import platform
 import subprocess
 
-def exportar_resultados_excel(capacidades, tareas, timeline, resumen_pedidos, output_dir, open_file_location=True):
-    os.makedirs(output_dir, exist_ok=True)
+from src.model.solution_table import como_dataframe
 
-    df_tareas = pd.DataFrame(tareas)
-    df_timeline = pd.DataFrame(timeline)
-    df_capacidades = pd.DataFrame(capacidades)
+MAX_FILAS_HOJA = 1_048_575   # límite de Excel (1.048.576) menos la cabecera
+FILAS_POR_BLOQUE = 50_000    # filas convertidas a objetos Python de cada vez
+FORMATOS_SOPORTADOS = ("xlsx", "parquet", "csv")
 
-    df_metrics = None
+def _hojas_exportacion(capacidades, tareas, timeline, resumen_pedidos, acciones=None):
+    """Lista ordenada (nombre_hoja, DataFrame) con las tablas a exportar."""
+    hojas = [
+        ("Tareas", como_dataframe(tareas)),
+        ("Timeline", como_dataframe(timeline)),
+        ("Capacidades", como_dataframe(capacidades)),
+    ]
     if resumen_pedidos and isinstance(resumen_pedidos, tuple):
         resumen_metr, df_pedidos = resumen_pedidos
-        df_metrics = pd.DataFrame([resumen_metr])
+        hojas.append(("Métricas_globales", pd.DataFrame([resumen_metr])))
+        if df_pedidos is not None:
+            hojas.append(("Pedidos", df_pedidos.rename_axis("").reset_index()))
     elif isinstance(resumen_pedidos, dict):  # fallback
-        df_metrics = pd.DataFrame([resumen_pedidos])
+        hojas.append(("Métricas_globales", pd.DataFrame([resumen_pedidos])))
+    if acciones is not None:
+        hojas.append(("Acciones", acciones))
+    return hojas
+
+def _columna_a_lista(serie):
+    """Valores Python de una columna; NaN/NaT -> None (celda vacía)."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        valores = serie.dt.tz_localize(None) if getattr(serie.dt, "tz", None) else serie
+        return [None if pd.isna(v) else v.to_pydatetime() for v in valores]
+    lista = serie.astype(object).where(serie.notna(), None).tolist()
+    return lista
+
+def _escribir_hoja_streaming(workbook, nombre, df):
+    """
+    Escribe df fila a fila (constant_memory exige ir en orden). Si supera el
+    límite de filas de Excel continúa en hojas 'nombre (2)', 'nombre (3)'...
+    """
+    cabecera = [str(c) for c in df.columns]
+    n = len(df)
+    n_hojas = max(1, -(-n // MAX_FILAS_HOJA))
+
+    for h in range(n_hojas):
+        titulo = nombre if h == 0 else f"{nombre} ({h + 1})"
+        ws = workbook.add_worksheet(titulo[:31])
+        ws.write_row(0, 0, cabecera)
+
+        ini_hoja = h * MAX_FILAS_HOJA
+        fin_hoja = min(n, ini_hoja + MAX_FILAS_HOJA)
+        fila_excel = 1
+        for ini in range(ini_hoja, fin_hoja, FILAS_POR_BLOQUE):
+            bloque = df.iloc[ini:min(fin_hoja, ini + FILAS_POR_BLOQUE)]
+            columnas = [_columna_a_lista(bloque[c]) for c in bloque.columns]
+            for fila in zip(*columnas):
+                ws.write_row(fila_excel, 0, fila)
+                fila_excel += 1
+
+def _escribir_xlsx(ruta_salida, hojas):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(ruta_salida, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        "remove_timezone": True,
+        "nan_inf_to_errors": True,
+    })
+    try:
+        for nombre, df in hojas:
+            _escribir_hoja_streaming(workbook, nombre, df)
+    finally:
+        workbook.close()
+
+def _escribir_tablas(carpeta, hojas, formato):
+    """Una tabla Parquet o CSV por hoja, para sistemas que no necesitan Excel."""
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, df in hojas:
+        ruta = os.path.join(carpeta, f"{nombre}.{formato}")
+        if formato == "parquet":
+            df.to_parquet(ruta, index=False)
+        else:
+            df.to_csv(ruta, index=False)
+    return carpeta
+
+def exportar_resultados_excel(capacidades, tareas, timeline, resumen_pedidos, output_dir, open_file_location=True,
+                              acciones=None, formatos=("xlsx",)):
+    """
+    Exporta la solución. El Excel se escribe en modo constant_memory de
+    xlsxwriter, por bloques de filas tomados directamente de las tablas
+    columnares; las hojas que superan el límite de Excel se parten.
+    formatos: cualquier combinación de "xlsx", "parquet" y "csv"; parquet/csv
+    generan una carpeta con una tabla por hoja.
+    Devuelve la ruta del Excel (o de la primera carpeta si no hay Excel).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    desconocidos = set(formatos) - set(FORMATOS_SOPORTADOS)
+    if desconocidos:
+        raise ValueError(f"Formatos de exportación no soportados: {sorted(desconocidos)}")
+
+    hojas = _hojas_exportacion(capacidades, tareas, timeline, resumen_pedidos, acciones)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"solucion_planificada_{timestamp}.xlsx"
-    ruta_salida = os.path.join(output_dir, filename)
+    nombre_base = f"solucion_planificada_{timestamp}"
+    rutas = []
+
+    if "xlsx" in formatos:
+        ruta_salida = os.path.join(output_dir, f"{nombre_base}.xlsx")
+        _escribir_xlsx(ruta_salida, hojas)
+        rutas.append(ruta_salida)
 
-    with pd.ExcelWriter(ruta_salida, engine="xlsxwriter") as writer:
-        df_tareas.to_excel(writer, sheet_name="Tareas", index=False)
-        df_timeline.to_excel(writer, sheet_name="Timeline", index=False)
-        df_capacidades.to_excel(writer, sheet_name="Capacidades", index=False)
-        if resumen_pedidos and isinstance(resumen_pedidos, tuple):
-            resumen_metr, df_pedidos = resumen_pedidos
-            df_metrics.to_excel(writer, sheet_name="Métricas_globales", index=False)
-            df_pedidos.to_excel(writer, sheet_name="Pedidos", index=True)
+    for formato in ("parquet", "csv"):
+        if formato in formatos:
+            rutas.append(_escribir_tablas(os.path.join(output_dir, f"{nombre_base}_{formato}"), hojas, formato))
 
-    print(f"\n📁 Solución exportada a: {ruta_salida}")
+    for ruta in rutas:
+        print(f"\n📁 Solución exportada a: {ruta}")
 
     if open_file_location:
         abrir_explorador(output_dir)
 
+    return rutas[0] if rutas else None
+
 
 
 def abrir_explorador(path):
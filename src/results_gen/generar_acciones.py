@@ -0,0 +1,174 @@
+# PATH: src/results_gen/generar_acciones.py
+
+import numpy as np
+import pandas as pd
+
+from src.model.solution_table import como_dataframe
+
+ACCIONES_SHEET = "Acciones"
+
+def _capacidad_en(timestamps, es_inicio, intervals, capacity_per_interval):
+    """
+    Operarios del turno en cada instante: un INICIO pertenece al turno que
+    empieza en él (ini <= ts < fin) y un FINAL al que termina en él
+    (ini < ts <= fin). Fuera de turno => 0.
+    """
+    ts = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype="datetime64[ns]")
+    ini = np.array([seg["dt_inicio"] for seg in intervals], dtype="datetime64[ns]")
+    fin = np.array([seg["dt_fin"] for seg in intervals], dtype="datetime64[ns]")
+    cap = np.asarray(capacity_per_interval, dtype=np.int64)
+    if len(ini) == 0:
+        return np.zeros(len(ts), dtype=np.int64)
+
+    idx = np.where(es_inicio, np.searchsorted(fin, ts, side="right"), np.searchsorted(fin, ts, side="left"))
+    idx_c = np.minimum(idx, len(ini) - 1)
+    dentro = (idx < len(ini)) & np.where(es_inicio, ini[idx_c] <= ts, ini[idx_c] < ts)
+    return np.where(dentro, cap[idx_c], 0)
+
+def construir_acciones_desde_plan(plan, df_capac, intervals=None, capacity_per_interval=None,
+                                  operarios_max=None):
+    """
+    Tabla Acciones a partir de un plan con una fila por tarea y columnas
+    timestamp_ini, timestamp_fin, pedido, x_op, machine, tipo_tarea y
+    descripcion. Cada tarea genera un evento INICIO y uno FINAL; la ocupación
+    por ubicación y total sale de sumas acumuladas sobre los eventos
+    ordenados (FINAL antes que INICIO en el mismo instante).
+
+    Los operarios disponibles se calculan con la capacidad real del turno
+    (intervals / capacity_per_interval) o, si no se indican, con la
+    constante operarios_max.
+    """
+    n = len(plan)
+    ubicaciones = df_capac["ubicación"].to_numpy()
+    nombres_ubic = df_capac["nom_ubicacion"].astype(str).to_numpy()
+
+    eventos = pd.DataFrame({
+        "Timestamp": pd.concat([plan["timestamp_fin"], plan["timestamp_ini"]], ignore_index=True),
+        "es_inicio": np.repeat([False, True], n),
+        "pedido": np.tile(plan["pedido"].to_numpy(), 2),
+        "x_op": np.tile(plan["x_op"].to_numpy(dtype=np.int64), 2),
+        "machine": np.tile(plan["machine"].to_numpy(), 2),
+        "tipo_tarea": np.tile(plan["tipo_tarea"].astype(str).to_numpy(), 2),
+        "descripcion": np.tile(plan["descripcion"].astype(str).to_numpy(), 2),
+    })
+    eventos["Timestamp"] = pd.to_datetime(eventos["Timestamp"])
+    eventos = eventos.sort_values(["Timestamp", "es_inicio"], kind="stable").reset_index(drop=True)
+
+    es_inicio = eventos["es_inicio"].to_numpy()
+    delta = np.where(es_inicio, eventos["x_op"].to_numpy(), -eventos["x_op"].to_numpy())
+
+    # Matriz eventos x ubicaciones con el delta en la columna de su ubicación
+    col_ubic = pd.Index(ubicaciones).get_indexer(eventos["machine"].to_numpy())
+    matriz = np.zeros((len(eventos), len(ubicaciones)), dtype=np.int64)
+    conocidas = col_ubic >= 0
+    matriz[np.flatnonzero(conocidas), col_ubic[conocidas]] = delta[conocidas]
+    ocupacion_loc = np.cumsum(matriz, axis=0)
+    ocupados = np.cumsum(delta)
+
+    if intervals is not None and capacity_per_interval is not None:
+        capacidad = _capacidad_en(eventos["Timestamp"], es_inicio, intervals, capacity_per_interval)
+    else:
+        capacidad = np.full(len(eventos), operarios_max or 0, dtype=np.int64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        porcentaje = np.where(capacidad > 0, np.round(100 * ocupados / np.maximum(capacidad, 1), 2), 0.0)
+
+    nom_por_ubic = dict(zip(ubicaciones.tolist(), nombres_ubic.tolist()))
+    nom_evento = eventos["machine"].map(nom_por_ubic).fillna(eventos["machine"].astype(str))
+    frase = (np.where(es_inicio, "iniciar", "terminar") + " tarea "
+             + eventos["tipo_tarea"].str.lower() + ' "' + eventos["descripcion"] + '" de '
+             + eventos["pedido"].astype(str) + " en " + nom_evento)
+
+    acciones = pd.DataFrame({
+        "Timestamp": eventos["Timestamp"],
+        "Tipo_accion": np.where(es_inicio, "INICIO", "FINAL"),
+        "Acción": frase,
+        "Pedido_involucrado": eventos["pedido"],
+        "Operarios disponibles": np.maximum(capacidad - ocupados, 0),
+        "Operarios ocupados": ocupados,
+        "Ocupación_%": porcentaje,
+    })
+    for j, nombre in enumerate(nombres_ubic):
+        acciones[nombre] = ocupacion_loc[:, j]
+    return acciones
+
+def construir_acciones(tareas, df_capac, df_tareas, intervals, capacity_per_interval):
+    """
+    Hoja Acciones directamente desde la solución en memoria. La descripción
+    y el tipo de cada tarea salen de df_tareas (TAREAS), emparejando
+    (pedido, t_idx) con el mismo orden por id_interno que usa el modelo.
+    """
+    plan = como_dataframe(tareas)
+
+    info = df_tareas[df_tareas["material_padre"].notna()]
+    info = info.sort_values(by=["material_padre", "id_interno"]).reset_index(drop=True)
+    info = pd.DataFrame({
+        "pedido": info["material_padre"],
+        "t_idx": info.groupby("material_padre", sort=False).cumcount(),
+        "tipo_tarea": info["tipo_tarea"],
+        "descripcion": info["descripcion"],
+    })
+    plan = plan.merge(info, on=["pedido", "t_idx"], how="left")
+
+    return construir_acciones_desde_plan(plan, df_capac, intervals, capacity_per_interval)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Acciones sobre libros ya exportados (sin la solución en memoria)
+# ──────────────────────────────────────────────────────────────────────────────
+HOJAS_LIBRO_ACCIONES = ("Capacidades", "Planificación tareas", "TAREAS")
+OPERARIOS_MAX = 5
+
+def ajustar_t_idx(plan):
+    """
+    Corrige el decalaje: en versiones actuales `t_idx` empieza en 0
+    mientras que `id_interno` empieza en 1.  Se suma +1 a todos los índices
+    sólo si se detecta necesario.
+    """
+    plan = plan.copy()
+    plan["t_idx"] = plan["t_idx"].astype(int)
+
+    if plan["t_idx"].min() == 0 and (plan["t_idx"] + 1).isin(plan["t_idx"].unique()).sum() == 0:
+        plan["t_idx"] += 1
+
+    return plan
+
+def construir_acciones_desde_libro(plan, tareas, capacidades, operarios_max=OPERARIOS_MAX):
+    """
+    Completa el plan con ubicación, tipo y descripción de cada tarea
+    (buscando `t_idx` en `id_interno`) y calcula las Acciones con la
+    constante operarios_max como capacidad.
+    """
+    info = (tareas.drop_duplicates("id_interno")
+                  .set_index("id_interno")[["ubicación", "tipo_tarea", "descripcion"]])
+    plan = plan.join(info, on="t_idx")
+    plan["machine"] = plan["ubicación"]
+
+    return construir_acciones_desde_plan(plan, capacidades, operarios_max=operarios_max)
+
+def anadir_acciones_a_libro(ruta_excel, operarios_max=OPERARIOS_MAX):
+    """
+    Lee un libro exportado, calcula la hoja Acciones y escribe una copia
+    `<original>_actions_<timestamp>.xlsx` con todas las hojas originales.
+    Devuelve la ruta de la copia.
+    """
+    from datetime import datetime
+    from pathlib import Path
+
+    ruta_excel = Path(ruta_excel)
+    xls = pd.ExcelFile(ruta_excel)
+    faltan = [h for h in HOJAS_LIBRO_ACCIONES if h not in xls.sheet_names]
+    if faltan:
+        raise ValueError(f"❌ Faltan las hojas {faltan} en {ruta_excel}")
+    hojas = {h: pd.read_excel(xls, sheet_name=h) for h in HOJAS_LIBRO_ACCIONES}
+
+    acciones = construir_acciones_desde_libro(ajustar_t_idx(hojas["Planificación tareas"]),
+                                              hojas["TAREAS"], hojas["Capacidades"], operarios_max)
+
+    ruta_salida = ruta_excel.with_name(
+        f"{ruta_excel.stem}_actions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+    with pd.ExcelWriter(ruta_salida, engine="openpyxl") as writer:
+        for nombre, df in hojas.items():
+            df.to_excel(writer, sheet_name=nombre, index=False)
+        acciones.to_excel(writer, sheet_name=ACCIONES_SHEET, index=False)
+
+    return ruta_salida
@@ -1,52 +1,97 @@
 # PATH: src/results_gen/generar_diagrama_gantt.py
 
-def generar_diagrama_gantt(tareas, timeline, df_capac, resumen_pedidos=None):
-    import pandas as pd
+UMBRAL_NIVEL_DETALLE = 2000  # nº de tareas a partir del cual "auto" muestra la vista agregada
+
+def _asignar_slots(df, map_maq):
+    """
+    Reparte las tareas de cada máquina entre sus 'capacidad' carriles: cada
+    tarea va al primer carril libre en su inicio. Devuelve un array de slots.
+    """
+    import numpy as np
+
+    slots = np.zeros(len(df), dtype=np.int64)
+    for m, grupo in df.groupby("machine", sort=False):
+        _, cap = map_maq.get(m, (f"Maq{m}", 1))
+        fin_slot = [-1] * max(cap, 1)
+        orden = grupo.sort_values("start", kind="stable")
+        for pos, st, en in zip(orden.index.to_numpy(), orden["start"].to_numpy(), orden["end"].to_numpy()):
+            libre = next((i for i, f in enumerate(fin_slot) if st >= f), 0)
+            slots[pos] = libre
+            fin_slot[libre] = en
+    return slots
+
+def _textos_hover(df):
+    """Texto de hover de todas las barras, construido por columnas."""
+    import numpy as np
+
+    delta = df.get("delta_entrega_dias_laborales", 0)
+    delta = np.asarray(delta if not np.isscalar(delta) else np.zeros(len(df)), dtype=float)
+    delta = np.nan_to_num(delta)
+    abs_txt = np.char.mod("%.2f", np.abs(delta))
+    diff_text = np.where(delta < 0, np.char.add(np.char.add("✅ Adelanto: ", abs_txt), " días"),
+                np.where(delta > 0, np.char.add(np.char.add("⚠️ Retraso: ", abs_txt), " días"),
+                         "= Sin retraso"))
+
+    def col(nombre):
+        if nombre in df.columns:
+            return df[nombre].astype(str)
+        return ""
+
+    leadtime = np.nan_to_num(np.asarray(df.get("leadtime_dias_laborales", np.zeros(len(df))), dtype=float))
+
+    return ("🧾 Pedido: " + col("pedido") + "<br>"
+            + "🏭 Máquina: " + col("machine") + "<br>"
+            + "🕒 " + col("timestamp_ini") + " → " + col("timestamp_fin") + "<br>"
+            + "👷 Operarios: " + col("x_op") + "<br>"
+            + "⏱️ Duración: " + col("duration") + " min<br>"
+            + "📅 Entrega requerida: " + col("fecha_entrega_requerida") + "<br>"
+            + "📅 Entrega estimada: " + col("fecha_entrega_estimada") + "<br>"
+            + diff_text + "<br>"
+            + "🚀 Lead time (días lab.): " + np.char.mod("%.2f", leadtime)).to_numpy()
+
+def _bloques_agregados(df):
+    """
+    Vista de bajo detalle: por carril (y_label) fusiona las barras que se
+    solapan o se tocan en bloques de ocupación continua.
+    """
+    import numpy as np
+
+    d = df[["y_label", "start", "end"]].sort_values(["y_label", "start"], kind="stable")
+    fin_previo = d.groupby("y_label", sort=False)["end"].transform(lambda s: s.cummax().shift())
+    nuevo = fin_previo.isna() | (d["start"] > fin_previo)
+    bloque = nuevo.cumsum()
+    agg = d.groupby(bloque).agg(y_label=("y_label", "first"), start=("start", "min"),
+                                end=("end", "max"), n=("start", "size"))
+    agg["texto"] = (agg["y_label"] + "<br>" + agg["n"].astype(str) + " tareas<br>"
+                    + agg["start"].astype(str) + " → " + agg["end"].astype(str) + " min")
+    return agg.reset_index(drop=True)
+
+def generar_diagrama_gantt(tareas, timeline, df_capac, resumen_pedidos=None,
+                           nivel_detalle="auto", mostrar=True):
+    """
+    Gantt de tareas por ubicación + ocupación de operarios.
+
+    Las barras van en una única traza (color por pedido como array) y la
+    ocupación en trazas WebGL de tipo escalón, así que el nº de trazas no
+    crece con el tamaño del plan.
+    nivel_detalle: "detalle", "agregado" o "auto" (agregado si hay más de
+    UMBRAL_NIVEL_DETALLE tareas). En la vista agregada las barras de cada
+    carril se funden en bloques; un botón permite cambiar a la vista detallada.
+    Devuelve la figura (y la muestra si mostrar=True).
+    """
+    import numpy as np
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
-    from collections import defaultdict
+    from src.model.solution_table import como_dataframe
+
+    df = como_dataframe(tareas).reset_index(drop=True)
+    df_tl = como_dataframe(timeline)
 
     map_maq = {
         row["ubicación"]: (row["nom_ubicacion"], int(row["capacidad"]))
         for _, row in df_capac.iterrows()
     }
-
-    tareas_por_maquina = defaultdict(list)
-    for t in tareas:
-        tareas_por_maquina[t["machine"]].append(t)
-
-    for m in tareas_por_maquina:
-        tareas_por_maquina[m].sort(key=lambda x: x["start"])
-
-    def asignar_slots(lista_tareas, capacidad):
-        slots = [-1] * capacidad
-        out = {}
-        for t in lista_tareas:
-            for i in range(capacidad):
-                if t["start"] >= slots[i]:
-                    out[t["t_idx"]] = i
-                    slots[i] = t["end"]
-                    break
-        return out
-
-    asignaciones = {}
-    for m, lista in tareas_por_maquina.items():
-        _, cap = map_maq.get(m, (f"Maq{m}", 1))
-        slots = asignar_slots(lista, cap)
-        for t in lista:
-            asignaciones[(m, t["t_idx"])] = slots[t["t_idx"]]
-
-    color_map = {}
-    color_idx = 0
-    for t in tareas:
-        m = t["machine"]
-        nom, cap = map_maq.get(m, (f"Maq{m}", 1))
-        slot = asignaciones[(m, t["t_idx"])]
-        t["y_label"] = f"{nom}.{slot + 1}" if cap > 1 else nom
-        if t["pedido"] not in color_map:
-            color_map[t["pedido"]] = f"hsl({(color_idx * 47) % 360}, 70%, 50%)"
-            color_idx += 1
-        t["color"] = color_map[t["pedido"]]
+    id_por_nombre = {nom: ub for ub, (nom, _) in map_maq.items()}
 
     fig = make_subplots(
         rows=2, cols=1,
@@ -55,89 +100,86 @@ def generar_diagrama_gantt(tareas, timeline, df_capac, resumen_pedidos=None):
         vertical_spacing=0.05
     )
 
-    y_labels = sorted(set(t["y_label"] for t in tareas))
-
-    def extraer_id_ubicacion(y_label):
-        base = y_label.split(".")[0]
-        for _, row in df_capac.iterrows():
-            if row["nom_ubicacion"] == base:
-                return row["ubicación"]
-        return 999
-
-    y_labels.sort(key=lambda l: (extraer_id_ubicacion(l), l))
-    y_map = {l: i for i, l in enumerate(y_labels)}
-
-    for t in tareas:
-        # Chequeamos si es retraso o adelanto
-        delta = t.get("delta_entrega_dias_laborales", 0)
-        # p.ej. +3 => Retraso de 3, -2 => Adelanto de 2
-        if delta < 0:
-            diff_text = f"✅ Adelanto: {abs(delta):.2f} días"
-        elif delta > 0:
-            diff_text = f"⚠️ Retraso: {delta:.2f} días"
-        else:
-            diff_text = f"= Sin retraso"
-
-        hover_txt = (
-            f"🧾 Pedido: {t['pedido']}<br>"
-            f"🏭 Máquina: {t['machine']}<br>"
-            f"🕒 {t['timestamp_ini']} → {t['timestamp_fin']}<br>"
-            f"👷 Operarios: {t['x_op']}<br>"
-            f"⏱️ Duración: {t['duration']} min<br>"
-            f"📅 Entrega requerida: {t['fecha_entrega_requerida']}<br>"
-            f"📅 Entrega estimada: {t['fecha_entrega_estimada']}<br>"
-            f"{diff_text}<br>"
-            f"🚀 Lead time (días lab.): {t['leadtime_dias_laborales']:.2f}"
-        )
+    n_trazas_detalle = 0
+    n_trazas_agregado = 0
+    usar_agregado = nivel_detalle == "agregado" or (
+        nivel_detalle == "auto" and len(df) > UMBRAL_NIVEL_DETALLE)
+
+    if len(df):
+        nombres = df["machine"].map(lambda m: map_maq.get(m, (f"Maq{m}", 1))[0])
+        caps = df["machine"].map(lambda m: map_maq.get(m, (f"Maq{m}", 1))[1])
+        slots = _asignar_slots(df, map_maq)
+        df["y_label"] = np.where(caps.to_numpy() > 1,
+                                 nombres + "." + (slots + 1).astype(str), nombres)
+
+        pedidos_orden = df["pedido"].drop_duplicates()
+        color_map = {p: f"hsl({(i * 47) % 360}, 70%, 50%)" for i, p in enumerate(pedidos_orden)}
+
+        y_labels = sorted(df["y_label"].unique(),
+                          key=lambda l: (id_por_nombre.get(l.split(".")[0], 999), l))
+
         fig.add_trace(go.Bar(
-            x=[t["duration"]],
-            y=[t["y_label"]],
-            base=[t["start"]],
+            x=df["duration"].to_numpy(),
+            y=df["y_label"].to_numpy(),
+            base=df["start"].to_numpy(),
             orientation="h",
-            marker=dict(color=t["color"]),
-            hovertext=hover_txt,
+            marker=dict(color=df["pedido"].map(color_map).to_numpy()),
+            hovertext=_textos_hover(df),
             hoverinfo="text",
-            showlegend=False
+            showlegend=False,
+            visible=not usar_agregado,
+            name="Tareas"
         ), row=1, col=1)
+        n_trazas_detalle = 1
 
-    fig.update_yaxes(
-        tickmode="array",
-        tickvals=y_labels,
-        autorange="reversed",
-        row=1, col=1,
-        title="Ubicación"
-    )
+        if nivel_detalle != "detalle":
+            agg = _bloques_agregados(df)
+            fig.add_trace(go.Bar(
+                x=(agg["end"] - agg["start"]).to_numpy(),
+                y=agg["y_label"].to_numpy(),
+                base=agg["start"].to_numpy(),
+                orientation="h",
+                marker=dict(color="steelblue"),
+                hovertext=agg["texto"].to_numpy(),
+                hoverinfo="text",
+                showlegend=False,
+                visible=usar_agregado,
+                name="Bloques"
+            ), row=1, col=1)
+            n_trazas_agregado = 1
+
+        fig.update_yaxes(
+            tickmode="array",
+            tickvals=y_labels,
+            categoryorder="array",
+            categoryarray=y_labels,
+            autorange="reversed",
+            row=1, col=1,
+            title="Ubicación"
+        )
 
-    for seg in timeline:
-        t_ini = seg["t_ini"]
-        t_fin = seg["t_fin"]
-        cap = seg["operarios_turno"]
-        occ = seg["ocupacion"]
-        porc = seg["%ocup"]
-        ts_ini = seg["timestamp_ini"]
-        ts_fin = seg["timestamp_fin"]
-
-        fig.add_trace(go.Scatter(
-            x=[t_ini, t_fin, t_fin, t_ini],
-            y=[0, 0, cap, cap],
-            fill="toself",
-            fillcolor="lightgray",
-            line=dict(color="lightgray"),
-            opacity=0.5,
-            hoverinfo="skip",
-            showlegend=False
+    if len(df_tl):
+        tl = df_tl.sort_values("t_ini", kind="stable")
+        x = np.append(tl["t_ini"].to_numpy(), tl["t_fin"].to_numpy()[-1])
+        cap = tl["operarios_turno"].to_numpy()
+        occ = tl["ocupacion"].to_numpy()
+        texto = (tl["timestamp_ini"].astype(str) + " → " + tl["timestamp_fin"].astype(str) + "<br>"
+                 + tl["ocupacion"].astype(str) + "/" + tl["operarios_turno"].astype(str)
+                 + " → " + tl["%ocup"].astype(str) + "%").to_numpy()
+
+        fig.add_trace(go.Scattergl(
+            x=x, y=np.append(cap, cap[-1]),
+            mode="lines", line=dict(color="lightgray", shape="hv"),
+            fill="tozeroy", fillcolor="rgba(211,211,211,0.5)",
+            hoverinfo="skip", showlegend=False, name="Operarios turno"
         ), row=2, col=1)
 
-        fig.add_trace(go.Scatter(
-            x=[t_ini, t_fin, t_fin, t_ini],
-            y=[0, 0, occ, occ],
-            fill="toself",
-            fillcolor="blue",
-            line=dict(color="blue"),
-            opacity=0.7,
-            text=f"{ts_ini} → {ts_fin}<br>{occ}/{cap} → {porc}%",
-            hoverinfo="text",
-            showlegend=False
+        fig.add_trace(go.Scattergl(
+            x=x, y=np.append(occ, occ[-1]),
+            mode="lines", line=dict(color="blue", shape="hv"),
+            fill="tozeroy", fillcolor="rgba(0,0,255,0.5)",
+            text=np.append(texto, texto[-1]), hoverinfo="text",
+            showlegend=False, name="Ocupación"
         ), row=2, col=1)
 
     fig.update_yaxes(title="Operarios activos", row=2, col=1)
@@ -173,6 +215,18 @@ def generar_diagrama_gantt(tareas, timeline, df_capac, resumen_pedidos=None):
             font=dict(size=12),
         )
 
+    if n_trazas_agregado:
+        # Orden de trazas: [detalle, agregado, turno, ocupación]
+        resto = [True] * (len(fig.data) - 2)
+        fig.update_layout(updatemenus=[dict(
+            type="buttons", direction="left", x=0, y=1.08, xanchor="left",
+            active=1 if usar_agregado else 0,
+            buttons=[
+                dict(label="Detalle", method="restyle", args=[{"visible": [True, False] + resto}]),
+                dict(label="Agregado", method="restyle", args=[{"visible": [False, True] + resto}]),
+            ]
+        )])
+
     fig.update_layout(
         title=layout_title,
         barmode="overlay",
@@ -181,4 +235,28 @@ def generar_diagrama_gantt(tareas, timeline, df_capac, resumen_pedidos=None):
         width=1200
     )
 
-    fig.show()
+    if mostrar:
+        fig.show()
+    return fig
+
+def exportar_gantt_html(tareas, timeline, df_capac, resumen_pedidos, output_dir,
+                        nivel_detalle="auto", nombre=None):
+    """
+    Exportación sin navegador: escribe el Gantt como un HTML autocontenido
+    (plotly.js embebido una sola vez; los arrays numéricos se serializan en
+    binario compacto) en output_dir. Devuelve la ruta del archivo.
+    """
+    import os
+    from datetime import datetime
+
+    os.makedirs(output_dir, exist_ok=True)
+    fig = generar_diagrama_gantt(tareas, timeline, df_capac, resumen_pedidos,
+                                 nivel_detalle=nivel_detalle, mostrar=False)
+
+    nombre = nombre or f"gantt_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+    ruta = os.path.join(output_dir, nombre)
+    fig.write_html(ruta, include_plotlyjs=True, full_html=True, auto_open=False,
+                   config={"responsive": True, "displaylogo": False})
+
+    print(f"\n📊 Gantt exportado a: {ruta}")
+    return ruta
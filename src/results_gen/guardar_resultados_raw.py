@@ -1,24 +1,40 @@
 # PATH: src/results_gen/guardar_resultados_raw.py
 
 import os
+import json
 import pickle
 from datetime import datetime
-def guardar_resultados_raw(df_capac, tareas, timeline, resumen_pedidos, output_dir, ruta_archivo_base):
+
+from src.model.solution_table import como_registros, como_dataframe
+
+FORMATO_RAW = "autoplanner-raw"
+VERSION_RAW = 1
+MANIFIESTO = "manifest.json"
+
+def guardar_resultados_raw(df_capac, tareas, timeline, resumen_pedidos, output_dir, ruta_archivo_base,
+                           formato="columnar"):
+    """
+    Guarda la solución en output_dir/raw.
+      - formato="columnar": carpeta con tablas Parquet (tareas, timeline,
+        capacidades, pedidos) + manifest.json versionado con métricas y
+        metadatos del solver. Se lee con cargar_resultados_raw.
+      - formato="pickle": el .pkl histórico.
+    Devuelve la ruta escrita.
+    """
     raw_dir = os.path.join(output_dir, "raw")
     os.makedirs(raw_dir, exist_ok=True)
 
     nombre_base = os.path.splitext(os.path.basename(ruta_archivo_base))[0]
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nombre_archivo = f"{nombre_base}_{timestamp}.pkl"
-    raw_path = os.path.join(raw_dir, nombre_archivo)
 
-    with open(raw_path, "wb") as f:
-        pickle.dump({
-            "capacidades": df_capac,
-            "tareas": tareas,
-            "timeline": timeline,
-            "resumen_pedidos": resumen_pedidos  # 👈 se guarda también
-        }, f)
+    if formato == "pickle":
+        raw_path = os.path.join(raw_dir, f"{nombre_base}_{timestamp}.pkl")
+        _guardar_pickle(raw_path, df_capac, tareas, timeline, resumen_pedidos)
+    else:
+        raw_path = os.path.join(raw_dir, f"{nombre_base}_{timestamp}")
+        metadatos = getattr(tareas, "metadatos", {})
+        guardar_columnar(raw_path, df_capac, tareas, timeline, resumen_pedidos,
+                         origen=ruta_archivo_base, solver=metadatos)
 
     print(f"\n✅ Resultados crudos guardados correctamente:")
     print(f"   - 📁 Ruta: {raw_path}")
@@ -29,3 +45,64 @@ def guardar_resultados_raw(df_capac, tareas, timeline, resumen_pedidos, output_d
     if resumen_pedidos:
         print(f"       • resumen_pedidos (incluye métricas + dataframe de pedidos)")
 
+    return raw_path
+
+def _guardar_pickle(raw_path, df_capac, tareas, timeline, resumen_pedidos):
+    with open(raw_path, "wb") as f:
+        pickle.dump({
+            "capacidades": df_capac,
+            "tareas": como_registros(tareas),
+            "timeline": como_registros(timeline),
+            "resumen_pedidos": resumen_pedidos  # 👈 se guarda también
+        }, f)
+
+def _a_json(valor):
+    """Convierte escalares NumPy/pandas a tipos JSON nativos."""
+    if hasattr(valor, "item"):
+        return valor.item()
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return valor
+
+def guardar_columnar(destino, df_capac, tareas, timeline, resumen_pedidos, origen=None, solver=None):
+    """
+    Escribe la carpeta columnar: una tabla Parquet por conjunto de datos y un
+    manifiesto JSON con versión, métricas globales y metadatos del solver.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(destino, exist_ok=True)
+
+    tablas = {
+        "tareas": como_dataframe(tareas),
+        "timeline": como_dataframe(timeline),
+        "capacidades": como_dataframe(df_capac),
+    }
+    metricas = {}
+    if resumen_pedidos and isinstance(resumen_pedidos, tuple):
+        resumen_metr, df_pedidos = resumen_pedidos
+        metricas = {k: _a_json(v) for k, v in resumen_metr.items()}
+        if df_pedidos is not None:
+            tablas["pedidos"] = df_pedidos.rename_axis("pedido").reset_index()
+
+    info_tablas = {}
+    for nombre, df in tablas.items():
+        archivo = f"{nombre}.parquet"
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(tabla, os.path.join(destino, archivo), compression="zstd")
+        info_tablas[nombre] = {"archivo": archivo, "filas": tabla.num_rows, "columnas": tabla.column_names}
+
+    manifiesto = {
+        "formato": FORMATO_RAW,
+        "version": VERSION_RAW,
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "origen": origen,
+        "metricas": metricas,
+        "solver": {k: _a_json(v) for k, v in (solver or {}).items()},
+        "tablas": info_tablas,
+    }
+    with open(os.path.join(destino, MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+
+    return destino
@@ -0,0 +1,175 @@
+# PATH: src/results_gen/historial_runs.py
+
+import os
+import json
+import sqlite3
+import hashlib
+from datetime import datetime
+
+from src.model.solution_table import como_dataframe
+
+NOMBRE_HISTORIAL = "historial_runs.sqlite"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    creado          TEXT NOT NULL,
+    archivo_entrada TEXT,
+    hash_entrada    TEXT,
+    estado          TEXT,
+    objetivo        REAL,
+    cota            REAL,
+    tiempo_solver_s REAL,
+    ramas           INTEGER,
+    conflictos      INTEGER,
+    metricas        TEXT,
+    ruta_excel      TEXT,
+    ruta_raw        TEXT
+);
+CREATE TABLE IF NOT EXISTS tareas (
+    run_id        INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    pedido        TEXT NOT NULL,
+    t_idx         INTEGER NOT NULL,
+    machine       INTEGER,
+    start         INTEGER,
+    end           INTEGER,
+    x_op          INTEGER,
+    duration      INTEGER,
+    timestamp_ini TEXT,
+    timestamp_fin TEXT
+);
+CREATE TABLE IF NOT EXISTS pedidos (
+    run_id                INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    pedido                TEXT NOT NULL,
+    fecha_final           TEXT,
+    fecha_requerida       TEXT,
+    fecha_materiales      TEXT,
+    delta_entrega_laboral REAL,
+    leadtime_laboral      REAL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_creado      ON runs(creado);
+CREATE INDEX IF NOT EXISTS ix_runs_hash        ON runs(hash_entrada);
+CREATE INDEX IF NOT EXISTS ix_tareas_run       ON tareas(run_id);
+CREATE INDEX IF NOT EXISTS ix_tareas_pedido    ON tareas(pedido, run_id);
+CREATE INDEX IF NOT EXISTS ix_tareas_ts        ON tareas(timestamp_ini);
+CREATE INDEX IF NOT EXISTS ix_pedidos_pedido   ON pedidos(pedido, run_id);
+CREATE INDEX IF NOT EXISTS ix_pedidos_run      ON pedidos(run_id);
+"""
+
+def ruta_historial_defecto(output_dir):
+    return os.path.join(output_dir, NOMBRE_HISTORIAL)
+
+def conectar(ruta_db):
+    """Abre (y crea si hace falta) la base de datos del historial."""
+    carpeta = os.path.dirname(ruta_db)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    con = sqlite3.connect(ruta_db)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.executescript(ESQUEMA)
+    return con
+
+def hash_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del archivo de entrada (identifica runs sobre el mismo libro)."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+def _texto_fechas(df, columnas):
+    """Fechas como texto ISO (ordenable en SQLite); NaT -> NULL."""
+    import pandas as pd
+
+    df = df.copy()
+    for c in columnas:
+        if c in df.columns:
+            serie = pd.to_datetime(df[c], errors="coerce")
+            df[c] = serie.dt.strftime("%Y-%m-%dT%H:%M:%S").where(serie.notna(), None)
+    return df
+
+def _filas(df, columnas):
+    df = df.reindex(columns=columnas)
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+def registrar_run(ruta_db, ruta_entrada, tareas, resumen_pedidos=None, ruta_excel=None, ruta_raw=None):
+    """
+    Inserta un run completo (cabecera, tareas y KPIs por pedido) en una única
+    transacción. Devuelve el run_id.
+    """
+    metadatos = getattr(tareas, "metadatos", {})
+    metricas, df_pedidos = {}, None
+    if resumen_pedidos and isinstance(resumen_pedidos, tuple):
+        metricas, df_pedidos = resumen_pedidos
+
+    hash_entrada = hash_archivo(ruta_entrada) if ruta_entrada and os.path.isfile(ruta_entrada) else None
+
+    cols_tareas = ["pedido", "t_idx", "machine", "start", "end", "x_op", "duration",
+                   "timestamp_ini", "timestamp_fin"]
+    df_tareas = _texto_fechas(como_dataframe(tareas), ["timestamp_ini", "timestamp_fin"])
+
+    cols_pedidos = ["pedido", "fecha_final", "fecha_requerida", "fecha_materiales",
+                    "delta_entrega_laboral", "leadtime_laboral"]
+    if df_pedidos is not None:
+        df_pedidos = _texto_fechas(df_pedidos.rename_axis("pedido").reset_index(),
+                                   ["fecha_final", "fecha_requerida", "fecha_materiales"])
+
+    con = conectar(ruta_db)
+    try:
+        with con:
+            cur = con.execute(
+                "INSERT INTO runs (creado, archivo_entrada, hash_entrada, estado, objetivo, cota, "
+                "tiempo_solver_s, ramas, conflictos, metricas, ruta_excel, ruta_raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(timespec="seconds"), ruta_entrada, hash_entrada,
+                 metadatos.get("estado"), metadatos.get("objetivo"), metadatos.get("cota"),
+                 metadatos.get("tiempo_solver_s"), metadatos.get("ramas"), metadatos.get("conflictos"),
+                 json.dumps({k: float(v) for k, v in metricas.items()}), ruta_excel, ruta_raw)
+            )
+            run_id = cur.lastrowid
+
+            con.executemany(
+                f"INSERT INTO tareas (run_id, {', '.join(cols_tareas)}) VALUES (?{', ?' * len(cols_tareas)})",
+                ((run_id,) + fila for fila in _filas(df_tareas, cols_tareas))
+            )
+            if df_pedidos is not None:
+                con.executemany(
+                    f"INSERT INTO pedidos (run_id, {', '.join(cols_pedidos)}) VALUES (?{', ?' * len(cols_pedidos)})",
+                    ((run_id,) + fila for fila in _filas(df_pedidos, cols_pedidos))
+                )
+    finally:
+        con.close()
+
+    return run_id
+
+def ultimo_run(ruta_db):
+    """Cabecera del run más reciente como dict (o None si no hay runs)."""
+    if not os.path.isfile(ruta_db):
+        return None
+    con = conectar(ruta_db)
+    con.row_factory = sqlite3.Row
+    try:
+        fila = con.execute("SELECT * FROM runs ORDER BY run_id DESC LIMIT 1").fetchone()
+    finally:
+        con.close()
+    return dict(fila) if fila else None
+
+def tendencia_retraso_pedido(ruta_db, pedido, ultimos_runs=30):
+    """
+    Evolución de fecha_final / retraso (días laborables) de un pedido en los
+    últimos N runs en los que aparece. Devuelve un DataFrame.
+    """
+    import pandas as pd
+
+    con = conectar(ruta_db)
+    try:
+        return pd.read_sql_query(
+            "SELECT r.run_id, r.creado, p.fecha_final, p.fecha_requerida, "
+            "       p.delta_entrega_laboral, p.leadtime_laboral "
+            "FROM pedidos p JOIN runs r ON r.run_id = p.run_id "
+            "WHERE p.pedido = ? ORDER BY p.run_id DESC LIMIT ?",
+            con, params=(str(pedido), int(ultimos_runs))
+        )
+    finally:
+        con.close()
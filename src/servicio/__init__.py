@@ -0,0 +1,2 @@
+# PATH: src/servicio/__init__.py
+
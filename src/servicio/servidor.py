@@ -0,0 +1,147 @@
+# PATH: src/servicio/servidor.py
+
+"""
+Servicio HTTP local de planificación (sólo biblioteca estándar):
+
+    POST   /trabajos                       JSON {"ruta": ..., "opciones": {...}}
+                                           o el .xlsx como cuerpo (?nombre=libro.xlsx)
+    GET    /trabajos                       lista de trabajos
+    GET    /trabajos/<id>                  estado, progreso (objetivo, cota, tiempo) y resultado
+    POST   /trabajos/<id>/cancelar         (o DELETE /trabajos/<id>)
+    GET    /trabajos/<id>/archivos/<tipo>  descarga: excel | gantt_html
+
+Arranque:  python -m src serve [--host 127.0.0.1] [--puerto 8765]
+"""
+
+import os
+import json
+import shutil
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.servicio.trabajos import GestorTrabajos
+
+TIPOS_DESCARGA = {
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "gantt_html": "text/html; charset=utf-8",
+}
+MAX_SUBIDA = 200 * 1024 * 1024
+
+class ManejadorPlanificacion(BaseHTTPRequestHandler):
+    server_version = "AutoplannerServicio/1.0"
+
+    @property
+    def gestor(self):
+        return self.server.gestor
+
+    # ── utilidades ───────────────────────────────────────────────────────────
+    def _json(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _error(self, codigo, mensaje):
+        self._json(codigo, {"error": mensaje})
+
+    def _partes(self):
+        url = urlparse(self.path)
+        return [p for p in url.path.split("/") if p], parse_qs(url.query)
+
+    # ── rutas ────────────────────────────────────────────────────────────────
+    def do_GET(self):
+        partes, _ = self._partes()
+        if partes == ["trabajos"]:
+            return self._json(HTTPStatus.OK, self.gestor.listar())
+        if len(partes) == 2 and partes[0] == "trabajos":
+            trabajo = self.gestor.estado(partes[1])
+            if trabajo is None:
+                return self._error(HTTPStatus.NOT_FOUND, "trabajo no encontrado")
+            return self._json(HTTPStatus.OK, trabajo)
+        if len(partes) == 4 and partes[0] == "trabajos" and partes[2] == "archivos":
+            return self._descargar(partes[1], partes[3])
+        self._error(HTTPStatus.NOT_FOUND, "ruta no encontrada")
+
+    def do_POST(self):
+        partes, query = self._partes()
+        if partes == ["trabajos"]:
+            return self._crear_trabajo(query)
+        if len(partes) == 3 and partes[0] == "trabajos" and partes[2] == "cancelar":
+            return self._cancelar(partes[1])
+        self._error(HTTPStatus.NOT_FOUND, "ruta no encontrada")
+
+    def do_DELETE(self):
+        partes, _ = self._partes()
+        if len(partes) == 2 and partes[0] == "trabajos":
+            return self._cancelar(partes[1])
+        self._error(HTTPStatus.NOT_FOUND, "ruta no encontrada")
+
+    def _crear_trabajo(self, query):
+        longitud = int(self.headers.get("Content-Length") or 0)
+        if longitud <= 0 or longitud > MAX_SUBIDA:
+            return self._error(HTTPStatus.BAD_REQUEST, "cuerpo vacío o demasiado grande")
+
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                peticion = json.loads(self.rfile.read(longitud))
+                ruta, opciones = peticion["ruta"], peticion.get("opciones")
+            else:
+                ruta = self.gestor.ruta_subida(query.get("nombre", ["entrada.xlsx"])[0])
+                with open(ruta, "wb") as f:
+                    restante = longitud
+                    while restante:
+                        bloque = self.rfile.read(min(restante, 1 << 20))
+                        if not bloque:
+                            raise ValueError("subida incompleta")
+                        f.write(bloque)
+                        restante -= len(bloque)
+                opciones = json.loads(query["opciones"][0]) if "opciones" in query else None
+            id_trabajo = self.gestor.enviar(ruta, opciones)
+        except (KeyError, ValueError, FileNotFoundError) as e:
+            return self._error(HTTPStatus.BAD_REQUEST, str(e))
+
+        self._json(HTTPStatus.ACCEPTED, self.gestor.estado(id_trabajo))
+
+    def _cancelar(self, id_trabajo):
+        if not self.gestor.cancelar(id_trabajo):
+            return self._error(HTTPStatus.NOT_FOUND, "trabajo no encontrado")
+        self._json(HTTPStatus.OK, self.gestor.estado(id_trabajo))
+
+    def _descargar(self, id_trabajo, tipo):
+        trabajo = self.gestor.estado(id_trabajo)
+        if trabajo is None or tipo not in TIPOS_DESCARGA:
+            return self._error(HTTPStatus.NOT_FOUND, "trabajo o tipo de archivo no encontrado")
+        rutas = (trabajo.get("resultado") or {}).get("rutas") or {}
+        ruta = rutas.get(tipo)
+        if not ruta or not os.path.isfile(ruta):
+            return self._error(HTTPStatus.NOT_FOUND, f"el trabajo no tiene archivo '{tipo}'")
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", TIPOS_DESCARGA[tipo])
+        self.send_header("Content-Length", str(os.path.getsize(ruta)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(ruta)}"')
+        self.end_headers()
+        with open(ruta, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+def servir(directorio, host="127.0.0.1", puerto=8765, procesos=None, workers_por_trabajo=None,
+           tiempo_max=None):
+    """Arranca el servicio y bloquea hasta Ctrl+C."""
+    opciones = {k: v for k, v in (("procesos", procesos), ("workers_por_trabajo", workers_por_trabajo),
+                                  ("tiempo_max", tiempo_max)) if v is not None}
+    gestor = GestorTrabajos(directorio, **opciones)
+    servidor = ThreadingHTTPServer((host, puerto), ManejadorPlanificacion)
+    servidor.gestor = gestor
+
+    print(f"🌐 Servicio de planificación en http://{host}:{puerto} "
+          f"({gestor.procesos} trabajos x {gestor.workers_por_trabajo} hilos CP-SAT) | datos: {gestor.directorio}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        gestor.cerrar()
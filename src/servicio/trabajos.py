@@ -0,0 +1,234 @@
+# PATH: src/servicio/trabajos.py
+
+import os
+import time
+import uuid
+import queue
+import threading
+import collections
+import multiprocessing as mp
+
+from src.cli import planificar_archivo, TIEMPO_MAX_DEFECTO, WORKERS_DEFECTO
+
+ESTADOS_FINALES = ("TERMINADO", "CANCELADO", "ERROR")
+GRACIA_CANCELACION_S = 10   # tras pedir StopSearch, tiempo antes de matar el proceso
+OPCIONES_CLIENTE = ("tiempo_max", "contraer", "formatos", "gantt_html", "generar_acciones")
+
+def _ejecutar_trabajo(id_trabajo, ruta_excel, opciones, eventos, parar):
+    """Proceso worker: planifica y publica progreso/resultado en la cola de eventos."""
+    def publicar_progreso(progreso, _callback):
+        eventos.put((id_trabajo, "progreso", progreso))
+
+    resumen = planificar_archivo(ruta_excel, opciones, observadores=[publicar_progreso], parar=parar)
+    eventos.put((id_trabajo, "fin", resumen))
+
+class GestorTrabajos:
+    """
+    Cola de trabajos de planificación. Cada trabajo corre en su propio
+    proceso (así se puede cancelar aunque CP-SAT no devuelva el control) y
+    como mucho `procesos` a la vez, por defecto núcleos // hilos CP-SAT.
+    Un único hilo de control lanza procesos, recoge eventos de progreso y
+    detecta procesos terminados. Cada trabajo tiene su propia cola de
+    eventos: matar un proceso mientras escribe puede dejar su cola a medias
+    o con el lock tomado, así que la de un proceso matado se descarta sin
+    leerla y no afecta a los demás trabajos.
+    """
+
+    def __init__(self, directorio, procesos=None, workers_por_trabajo=WORKERS_DEFECTO,
+                 tiempo_max=TIEMPO_MAX_DEFECTO):
+        self.directorio = os.path.abspath(directorio)
+        os.makedirs(self.directorio, exist_ok=True)
+        self.workers_por_trabajo = workers_por_trabajo
+        self.tiempo_max = tiempo_max
+        self.procesos = procesos or max(1, (os.cpu_count() or 1) // workers_por_trabajo)
+
+        # spawn: el servidor tiene hilos y hacer fork con hilos vivos no es seguro
+        self._ctx = mp.get_context("spawn")
+        self._trabajos = {}
+        self._pendientes = collections.deque()
+        self._ejecutando = {}   # id -> (proceso, evento parar, cola de eventos; None si se ha matado)
+        self._lock = threading.Lock()
+        self._cerrar = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="gestor_trabajos", daemon=True)
+        self._hilo.start()
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def ruta_subida(self, nombre):
+        carpeta = os.path.join(self.directorio, "subidas")
+        os.makedirs(carpeta, exist_ok=True)
+        base = os.path.basename(nombre or "entrada.xlsx")
+        return os.path.join(carpeta, f"{uuid.uuid4().hex[:8]}_{base}")
+
+    def enviar(self, ruta_excel, opciones=None):
+        if not os.path.isfile(ruta_excel):
+            raise FileNotFoundError(f"No existe el libro: {ruta_excel}")
+
+        id_trabajo = uuid.uuid4().hex[:12]
+        opciones_trabajo = {
+            "output_dir": os.path.join(self.directorio, id_trabajo),
+            "tiempo_max": self.tiempo_max,
+            "num_workers": self.workers_por_trabajo,
+            "contraer": False,
+            "debug": False,
+            "formatos": ("xlsx",),
+            "gantt_html": True,
+            "guardar_raw": True,
+            "guardar_historial": True,
+            "ruta_historial": os.path.join(self.directorio, "historial_runs.sqlite"),
+            "generar_acciones": True,
+        }
+        for clave, valor in (opciones or {}).items():
+            if clave not in OPCIONES_CLIENTE:
+                raise ValueError(f"Opción no admitida: {clave}")
+            opciones_trabajo[clave] = tuple(valor) if clave == "formatos" else valor
+        opciones_trabajo["tiempo_max"] = min(float(opciones_trabajo["tiempo_max"]), self.tiempo_max)
+
+        with self._lock:
+            self._trabajos[id_trabajo] = {
+                "id": id_trabajo,
+                "archivo": ruta_excel,
+                "estado": "EN_COLA",
+                "creado": time.time(),
+                "inicio": None,
+                "fin": None,
+                "progreso": None,
+                "resultado": None,
+                "_opciones": opciones_trabajo,
+                "_cancelado_en": None,
+            }
+            self._pendientes.append(id_trabajo)
+        return id_trabajo
+
+    def estado(self, id_trabajo):
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            return self._publico(trabajo) if trabajo else None
+
+    def listar(self):
+        with self._lock:
+            return [self._publico(t) for t in self._trabajos.values()]
+
+    def cancelar(self, id_trabajo):
+        """Cancela un trabajo en cola o en ejecución. Devuelve False si no existe."""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None:
+                return False
+            if id_trabajo in self._pendientes:
+                self._pendientes.remove(id_trabajo)
+                trabajo.update(estado="CANCELADO", fin=time.time())
+            elif id_trabajo in self._ejecutando and trabajo["_cancelado_en"] is None:
+                _, parar, _ = self._ejecutando[id_trabajo]
+                parar.set()   # StopSearch en el worker; si no responde, se mata en _bucle
+                trabajo["_cancelado_en"] = time.time()
+                trabajo["estado"] = "CANCELANDO"
+            return True
+
+    def cerrar(self):
+        self._cerrar.set()
+        self._hilo.join()
+        with self._lock:
+            for id_trabajo in list(self._ejecutando):
+                self._matar(id_trabajo)
+
+    # ── Hilo de control ──────────────────────────────────────────────────────
+    @staticmethod
+    def _publico(trabajo):
+        publico = {k: v for k, v in trabajo.items() if not k.startswith("_")}
+        if trabajo["inicio"]:
+            publico["transcurrido_s"] = round((trabajo["fin"] or time.time()) - trabajo["inicio"], 1)
+        return publico
+
+    def _bucle(self):
+        while not self._cerrar.is_set():
+            self._procesar_eventos()
+            self._revisar_procesos()
+            with self._lock:
+                self._lanzar_pendientes()
+            self._cerrar.wait(0.2)
+
+    def _procesar_eventos(self):
+        with self._lock:
+            colas = [(id_trabajo, cola) for id_trabajo, (_, _, cola) in self._ejecutando.items() if cola is not None]
+        for id_trabajo, cola in colas:
+            self._leer_cola(id_trabajo, cola)
+
+    def _leer_cola(self, id_trabajo, cola):
+        while True:
+            try:
+                _, tipo, datos = cola.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                trabajo = self._trabajos.get(id_trabajo)
+                if trabajo is None:
+                    continue
+                if tipo == "progreso":
+                    trabajo["progreso"] = datos
+                elif tipo == "fin":
+                    trabajo["resultado"] = datos
+                    estado = datos["estado"]
+                    trabajo["estado"] = estado if estado in ("CANCELADO", "ERROR") else "TERMINADO"
+                    trabajo["fin"] = time.time()
+
+    def _matar(self, id_trabajo):
+        """terminate() y descarte de la cola del trabajo (llamar con el lock)."""
+        proceso, parar, cola = self._ejecutando[id_trabajo]
+        proceso.terminate()
+        if cola is not None:
+            cola.close()
+        self._ejecutando[id_trabajo] = (proceso, parar, None)
+
+    def _revisar_procesos(self):
+        """
+        Se llama sin el lock: recoge los procesos terminados, lee lo que quede
+        en sus colas (sin el lock, como en _bucle; sólo si el proceso salió
+        por sí mismo) y entonces cierra los trabajos que acabaron sin evento 'fin'.
+        """
+        terminados = []
+        with self._lock:
+            for id_trabajo, (proceso, _, cola) in list(self._ejecutando.items()):
+                trabajo = self._trabajos[id_trabajo]
+                if proceso.is_alive():
+                    if trabajo["_cancelado_en"] and time.time() - trabajo["_cancelado_en"] > GRACIA_CANCELACION_S:
+                        self._matar(id_trabajo)
+                    continue
+                del self._ejecutando[id_trabajo]
+                terminados.append((id_trabajo, proceso.exitcode, cola))
+        if not terminados:
+            return
+
+        for id_trabajo, codigo, cola in terminados:
+            if cola is None:
+                continue
+            # Con código 0 la cola está completa (el proceso vacía su buffer al salir)
+            if codigo == 0:
+                self._leer_cola(id_trabajo, cola)
+            cola.close()
+
+        # Proceso terminado sin evento 'fin' (matado o caído)
+        with self._lock:
+            for id_trabajo, codigo, _ in terminados:
+                trabajo = self._trabajos[id_trabajo]
+                if trabajo["estado"] in ESTADOS_FINALES:
+                    continue
+                trabajo["fin"] = time.time()
+                if trabajo["_cancelado_en"]:
+                    trabajo["estado"] = "CANCELADO"
+                else:
+                    trabajo["estado"] = "ERROR"
+                    trabajo["resultado"] = {"error": f"el proceso terminó con código {codigo}"}
+
+    def _lanzar_pendientes(self):
+        while self._pendientes and len(self._ejecutando) < self.procesos:
+            id_trabajo = self._pendientes.popleft()
+            trabajo = self._trabajos[id_trabajo]
+            parar = self._ctx.Event()
+            eventos = self._ctx.Queue()
+            proceso = self._ctx.Process(
+                target=_ejecutar_trabajo,
+                args=(id_trabajo, trabajo["archivo"], trabajo["_opciones"], eventos, parar),
+                name=f"plan_{id_trabajo}", daemon=True)
+            proceso.start()
+            self._ejecutando[id_trabajo] = (proceso, parar, eventos)
+            trabajo.update(estado="EJECUTANDO", inicio=time.time())
@@ -0,0 +1 @@
+# PATH: src/tuning/__init__.py
@@ -0,0 +1,210 @@
+# PATH: src/tuning/ajuste.py
+
+"""
+Ajuste offline de parámetros de CP-SAT sobre un corpus volcado (ver
+corpus.py): cada (instancia, perfil de parámetros) se resuelve en un pool
+de procesos con el mismo presupuesto de tiempo e hilos, se registra la
+traza de soluciones y se recomienda un perfil por clase de tamaño.
+"""
+
+import os
+import json
+import time
+import random
+import itertools
+
+import pandas as pd
+
+from src.tuning.corpus import clase_tamano, cargar_modelo, listar_corpus
+
+# parámetro de CP-SAT -> valores a explorar
+ESPACIO_PARAMETROS = {
+    "linearization_level": [0, 1, 2],
+    "search_branching": ["AUTOMATIC_SEARCH", "FIXED_SEARCH", "PSEUDO_COST_SEARCH",
+                         "PORTFOLIO_WITH_QUICK_RESTART_SEARCH"],
+    "optimize_with_core": [False, True],
+    "cp_model_probing_level": [0, 2],
+    "symmetry_level": [0, 2],
+}
+GAP_OBJETIVO = 0.01   # gap relativo frente a la mejor solución conocida de la instancia
+
+def generar_perfiles(espacio=None, modo="aleatorio", n=20, semilla=0):
+    """
+    Lista de perfiles (dicts parámetro -> valor). modo="rejilla" recorre el
+    producto cartesiano completo; "aleatorio" toma n combinaciones distintas.
+    El perfil vacío (valores por defecto de CP-SAT) va siempre primero.
+    """
+    espacio = espacio or ESPACIO_PARAMETROS
+    claves = sorted(espacio)
+    combinaciones = [dict(zip(claves, valores)) for valores in itertools.product(*(espacio[c] for c in claves))]
+    if modo == "aleatorio" and n < len(combinaciones):
+        combinaciones = random.Random(semilla).sample(combinaciones, n)
+    return [{}] + combinaciones
+
+def nombre_perfil(perfil):
+    if not perfil:
+        return "defecto"
+    return ",".join(f"{k}={v}" for k, v in sorted(perfil.items()))
+
+def aplicar_perfil(parametros, perfil):
+    """Aplica un perfil (enums como texto, p.ej. "FIXED_SEARCH") a solver.parameters."""
+    for clave, valor in perfil.items():
+        tipo = type(getattr(parametros, clave))
+        if isinstance(valor, str) and hasattr(tipo, "__members__"):
+            valor = tipo.__members__[valor]
+        setattr(parametros, clave, valor)
+
+_MODELOS = {}   # caché por proceso del pool: ruta -> CpModel ya parseado
+
+def ejecutar_run(ruta_modelo, perfil, tiempo_max, num_workers, semilla=0):
+    """
+    Resuelve una instancia con un perfil. Devuelve un dict con estado,
+    objetivo y cota finales, tiempo hasta la primera solución y la traza
+    [(t, objetivo)] de soluciones mejorantes (para el tiempo hasta el gap).
+    """
+    from ortools.sat.python import cp_model
+
+    if ruta_modelo not in _MODELOS:
+        _MODELOS[ruta_modelo] = cargar_modelo(ruta_modelo)
+    model = _MODELOS[ruta_modelo]
+
+    traza = []
+
+    class _Traza(cp_model.CpSolverSolutionCallback):
+        def on_solution_callback(self):
+            traza.append((round(self.WallTime(), 3), self.ObjectiveValue()))
+
+    solver = cp_model.CpSolver()
+    aplicar_perfil(solver.parameters, perfil)
+    solver.parameters.max_time_in_seconds = tiempo_max
+    solver.parameters.num_search_workers = num_workers
+    solver.parameters.random_seed = semilla
+    status = solver.Solve(model, _Traza())
+    hay_solucion = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return {
+        "estado": solver.StatusName(status),
+        "objetivo": solver.ObjectiveValue() if hay_solucion else None,
+        "cota": solver.BestObjectiveBound() if hay_solucion else None,
+        "tiempo_s": round(solver.WallTime(), 3),
+        "t_primera_s": traza[0][0] if traza else None,
+        "soluciones": len(traza),
+        "traza": traza,
+    }
+
+def _tiempo_hasta_gap(traza, referencia, gap):
+    if referencia is None:
+        return None
+    for t, objetivo in traza:
+        if objetivo - referencia <= gap * max(abs(referencia), 1):
+            return t
+    return None
+
+def ajustar(directorio_corpus, perfiles, tiempo_max, num_workers=1, procesos=None, semillas=1,
+            gap=GAP_OBJETIVO, directorio_salida=None):
+    """
+    Lanza todas las combinaciones instancia x perfil x semilla en un
+    ProcessPoolExecutor y devuelve (df_runs, recomendaciones). Con
+    directorio_salida escribe runs.csv y recomendaciones.json.
+
+    Métricas por run: t_primera_s, t_gap_s (tiempo hasta quedar a `gap`
+    de la mejor solución conocida de la instancia entre todos los runs) y
+    objetivo_rel (objetivo final / mejor conocido).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    instancias = listar_corpus(directorio_corpus)
+    if not instancias:
+        raise ValueError(f"No hay modelos volcados (*.pb.txt) en {directorio_corpus}")
+    procesos = procesos or max(1, (os.cpu_count() or 1) // num_workers)
+    trabajos = [(inst, perfil, semilla) for inst in instancias for perfil in perfiles for semilla in range(semillas)]
+    print(f"🎛️ Ajuste: {len(instancias)} instancias x {len(perfiles)} perfiles x {semillas} semillas = "
+          f"{len(trabajos)} runs de {tiempo_max} s | {procesos} procesos x {num_workers} hilos")
+
+    t0 = time.perf_counter()
+    filas = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {pool.submit(ejecutar_run, inst["ruta"], perfil, tiempo_max, num_workers, semilla):
+                   (inst, perfil, semilla) for inst, perfil, semilla in trabajos}
+        for i, fut in enumerate(as_completed(futuros), 1):
+            inst, perfil, semilla = futuros[fut]
+            try:
+                resultado = fut.result()
+            except Exception as e:
+                resultado = {"estado": "ERROR", "error": f"{type(e).__name__}: {e}", "traza": []}
+            filas.append({
+                "instancia": inst["nombre"],
+                "clase": inst.get("clase") or clase_tamano(inst.get("tareas", 0)),
+                "tareas": inst.get("tareas"),
+                "perfil": nombre_perfil(perfil),
+                "parametros": json.dumps(perfil, sort_keys=True),
+                "semilla": semilla,
+                **resultado,
+            })
+            if i % max(1, len(trabajos) // 20) == 0 or i == len(trabajos):
+                print(f"   {i}/{len(trabajos)} runs ({time.perf_counter() - t0:.0f} s)")
+
+    df = pd.DataFrame(filas)
+    referencia = df.groupby("instancia")["objetivo"].min()
+    df["referencia"] = df["instancia"].map(referencia)
+    df["t_gap_s"] = [_tiempo_hasta_gap(traza, ref if pd.notna(ref) else None, gap)
+                     for traza, ref in zip(df["traza"], df["referencia"])]
+    df["objetivo_rel"] = df["objetivo"] / df["referencia"].where(df["referencia"] != 0, 1)
+    df = df.drop(columns="traza")
+
+    recomendaciones = recomendar_perfiles(df, tiempo_max)
+    if directorio_salida:
+        os.makedirs(directorio_salida, exist_ok=True)
+        df.to_csv(os.path.join(directorio_salida, "runs.csv"), index=False)
+        with open(os.path.join(directorio_salida, "recomendaciones.json"), "w", encoding="utf-8") as f:
+            json.dump(recomendaciones, f, ensure_ascii=False, indent=2)
+    return df, recomendaciones
+
+def recomendar_perfiles(df_runs, tiempo_max):
+    """
+    Por clase de tamaño, el perfil con mejor objetivo relativo medio; a
+    igualdad, menor tiempo mediano hasta el gap (los runs que no lo
+    alcanzan cuentan como tiempo_max) y hasta la primera solución.
+    """
+    df = df_runs.copy()
+    # Sin solución: peor que cualquier run con solución
+    df["objetivo_rel"] = df["objetivo_rel"].fillna(df["objetivo_rel"].max() * 10 if df["objetivo_rel"].notna().any()
+                                                   else float("inf"))
+    df["t_gap_s"] = df["t_gap_s"].fillna(tiempo_max)
+    df["t_primera_s"] = df["t_primera_s"].fillna(tiempo_max)
+
+    recomendaciones = {}
+    for clase, grupo in df.groupby("clase"):
+        tabla = grupo.groupby(["perfil", "parametros"]).agg(
+            objetivo_rel_medio=("objetivo_rel", "mean"),
+            t_gap_mediano_s=("t_gap_s", "median"),
+            t_primera_mediano_s=("t_primera_s", "median"),
+            runs=("instancia", "size"),
+        ).reset_index().sort_values(["objetivo_rel_medio", "t_gap_mediano_s", "t_primera_mediano_s"])
+        mejor = tabla.iloc[0]
+        defecto = tabla[tabla["perfil"] == "defecto"]
+        recomendaciones[clase] = {
+            "perfil": json.loads(mejor["parametros"]),
+            "nombre": mejor["perfil"],
+            "objetivo_rel_medio": round(float(mejor["objetivo_rel_medio"]), 5),
+            "t_gap_mediano_s": float(mejor["t_gap_mediano_s"]),
+            "t_primera_mediano_s": float(mejor["t_primera_mediano_s"]),
+            "instancias": int(grupo["instancia"].nunique()),
+            "defecto": None if defecto.empty else {
+                "objetivo_rel_medio": round(float(defecto.iloc[0]["objetivo_rel_medio"]), 5),
+                "t_gap_mediano_s": float(defecto.iloc[0]["t_gap_mediano_s"]),
+            },
+        }
+    return recomendaciones
+
+def imprimir_recomendaciones(recomendaciones):
+    print("\n🎯 Perfil recomendado por clase de tamaño:")
+    for clase, r in recomendaciones.items():
+        base = r["defecto"]
+        comparacion = (f" | defecto: obj_rel={base['objetivo_rel_medio']} t_gap={base['t_gap_mediano_s']} s"
+                       if base else "")
+        print(f"   {clase:<8} {r['nombre']}  (obj_rel={r['objetivo_rel_medio']} t_gap={r['t_gap_mediano_s']} s "
+              f"t_primera={r['t_primera_mediano_s']} s, {r['instancias']} instancias){comparacion}")
+
+def perfil_para_instancia(recomendaciones, n_tareas):
+    """Parámetros recomendados para un modelo de n_tareas (o {} si su clase no está)."""
+    return dict((recomendaciones.get(clase_tamano(n_tareas)) or {}).get("perfil") or {})
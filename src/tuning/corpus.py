@@ -0,0 +1,134 @@
+# PATH: src/tuning/corpus.py
+
+"""
+Corpus de modelos para el ajuste de parámetros: cada instancia se guarda
+como el proto del CpModel de crear_modelo_cp en texto (<nombre>.pb.txt)
+más sus metadatos (<nombre>.json: tamaño, clase, origen).
+"""
+
+import os
+import json
+import time
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Clase de tamaño por nº de tareas del modelo (límite superior exclusivo)
+CLASES_TAMANO = ((200, "pequena"), (2000, "mediana"), (float("inf"), "grande"))
+
+def clase_tamano(n_tareas):
+    for limite, clase in CLASES_TAMANO:
+        if n_tareas < limite:
+            return clase
+
+def volcar_modelo(model, directorio, nombre, metadatos=None):
+    """Escribe <nombre>.pb.txt y <nombre>.json en directorio. Devuelve la ruta del proto."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta_modelo = os.path.join(directorio, f"{nombre}.pb.txt")
+    model.ExportToFile(ruta_modelo)
+
+    proto = model.Proto()
+    with open(ruta_modelo, "rb") as f:
+        huella = hashlib.sha256(f.read()).hexdigest()
+    meta = {
+        "nombre": nombre,
+        "variables": len(proto.variables),
+        "restricciones": len(proto.constraints),
+        "sha256": huella,
+        "fecha_volcado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        **(metadatos or {}),
+    }
+    meta.setdefault("clase", clase_tamano(meta.get("tareas", 0)))
+    with open(os.path.join(directorio, f"{nombre}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+    return ruta_modelo
+
+def cargar_modelo(ruta_modelo):
+    from ortools.sat.python import cp_model
+
+    model = cp_model.CpModel()
+    with open(ruta_modelo, encoding="utf-8") as f:
+        model.Proto().parse_text_format(f.read())
+    return model
+
+def listar_corpus(directorio):
+    """Metadatos de cada instancia del corpus, con la clave "ruta" al proto."""
+    instancias = []
+    for nombre in sorted(os.listdir(directorio)):
+        if not nombre.endswith(".pb.txt"):
+            continue
+        base = nombre[:-len(".pb.txt")]
+        ruta_json = os.path.join(directorio, f"{base}.json")
+        meta = {"nombre": base}
+        if os.path.exists(ruta_json):
+            with open(ruta_json, encoding="utf-8") as f:
+                meta = json.load(f)
+        meta["ruta"] = os.path.join(directorio, nombre)
+        instancias.append(meta)
+    return instancias
+
+def _desplazar_laborables(fecha, dias, n):
+    """
+    fecha + n días laborables de `dias` (ordenados), conservando la hora.
+    Si la fecha no es laborable cuenta desde el siguiente laborable; fuera
+    del calendario se desplaza en días naturales.
+    """
+    if n == 0 or pd.isna(fecha):
+        return fecha
+    dia = fecha.normalize()
+    pos = int(np.searchsorted(dias, dia.to_datetime64())) + n
+    if pos >= len(dias):
+        return fecha + pd.Timedelta(days=n)
+    return pd.Timestamp(dias[pos]) + (fecha - dia)
+
+def replicar_pedidos(entradas, factor, semilla=0):
+    """
+    Instancia sintética a partir de una real: cada pedido se repite
+    `factor` veces (sufijo _s<k>) con las fechas desplazadas un nº
+    aleatorio de días laborables del calendario. Devuelve un dict como el
+    de preparar_entradas (sólo las claves que usa crear_modelo_cp).
+    """
+    rng = np.random.default_rng(semilla)
+    dias = np.sort(pd.to_datetime(entradas["df_calend"]["dia"]).dt.normalize().unique())
+    job_dict, precedences, filas = {}, {}, []
+    for k in range(factor):
+        sufijo = "" if k == 0 else f"_s{k}"
+        for _, fila in entradas["df_entregas"].iterrows():
+            ref = str(fila["referencia"])
+            if ref not in entradas["job_dict"]:
+                continue
+            nueva = f"{ref}{sufijo}"
+            job_dict[nueva] = entradas["job_dict"][ref]
+            precedences[nueva] = entradas["precedences"].get(ref, [])
+            desplazamiento = int(rng.integers(0, max(1, len(dias) // 2))) if k else 0
+            filas.append({**fila.to_dict(), "referencia": nueva,
+                          "fecha_entrega": _desplazar_laborables(fila["fecha_entrega"], dias, desplazamiento),
+                          "fecha_recepcion_materiales": _desplazar_laborables(
+                              fila["fecha_recepcion_materiales"], dias, desplazamiento)})
+    return {**entradas, "job_dict": job_dict, "precedences": precedences, "df_entregas": pd.DataFrame(filas)}
+
+def volcar_instancia(entradas, directorio, nombre, origen=None, contraer=False):
+    """Construye el modelo de unas entradas (preparar_entradas) y lo vuelca con sus metadatos."""
+    from src.model.model import crear_modelo_cp
+    from src.model.model_reduction import contraer_cadenas
+
+    job_dict, precedences, reduccion = entradas["job_dict"], entradas["precedences"], None
+    if contraer:
+        job_dict, precedences, reduccion = contraer_cadenas(job_dict, precedences)
+    registro = {}
+    model, _ = crear_modelo_cp(job_dict, precedences, entradas["machine_capacity"], entradas["intervals"],
+                               entradas["capacity_per_interval"], entradas["df_entregas"], entradas["df_calend"],
+                               tablas_duracion=reduccion["tablas_duracion"] if reduccion else None,
+                               registro=registro)
+    n_tareas = sum(len(t) for t in job_dict.values())
+    return volcar_modelo(model, directorio, nombre, {
+        "origen": origen,
+        "pedidos": len(job_dict),
+        "tareas": n_tareas,
+        "turnos": len(entradas["intervals"]),
+        "ubicaciones": len({t[1] for tareas in job_dict.values() for t in tareas}),
+        "horizonte": registro["horizonte"],
+        "contraido": contraer,
+        "clase": clase_tamano(n_tareas),
+    })